@@ -1,11 +1,75 @@
-from flask import Flask
+from flask import Flask, request, jsonify
+import hashlib
+import numpy as np
+from src.config.configuration import Configuration
+from src.serving.predictor import get_predictor
+from src.serving.micro_batcher import MicroBatcher
+from src.serving.prediction_cache import PredictionCache
 
 app = Flask(__name__)
 
+# One model and one batcher per worker process, shared by all request threads
+model_serving_config = Configuration().get_model_serving_config()
+predictor = get_predictor(model_file_path=model_serving_config.model_file_path)
+micro_batcher = MicroBatcher(predict_function=predictor.predict,
+                             max_batch_size=model_serving_config.max_batch_size,
+                             max_wait_ms=model_serving_config.max_wait_ms)
+prediction_cache = PredictionCache(max_entries=model_serving_config.prediction_cache_max_entries,
+                                   ttl_seconds=model_serving_config.prediction_cache_ttl_seconds,
+                                   sqlite_file_path=model_serving_config.prediction_cache_sqlite_file_path)
+
 @app.route("/", methods=['GET','POST'])
 
 def index() -> None:
     return "Machine Learning Project"
 
+@app.route("/predict", methods=['POST'])
+
+def predict():
+
+    """
+    Predicts the label of every uploaded x-ray image. Concurrent requests share one forward pass.
+    """
+
+    uploaded_files = [uploaded_file for _, uploaded_file in request.files.items(multi=True)]
+    if not uploaded_files:
+        return jsonify({'error': "No image uploaded"}), 400
+
+    try:
+        model_version = predictor.get_model_version()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+
+    # Resubmitted images are answered from the cache, only the others are decoded and predicted
+    uploads = [uploaded_file.read() for uploaded_file in uploaded_files]
+    image_hashes = [hashlib.sha256(image_bytes).hexdigest() for image_bytes in uploads]
+    probabilities = [prediction_cache.get(model_version, image_hash) for image_hash in image_hashes]
+    missing_indices = [index for index, probability in enumerate(probabilities) if probability is None]
+
+    images = []
+    for index in missing_indices:
+        try:
+            images.append(predictor.preprocess(uploads[index]))
+        except Exception:
+            return jsonify({'error': f"Can not decode image [{uploaded_files[index].filename}]"}), 400
+
+    if images:
+        try:
+            predicted_probabilities = micro_batcher.predict(np.stack(images))
+        except Exception as e:
+            return jsonify({'error': str(e)}), 503
+
+        for index, probability in zip(missing_indices, predicted_probabilities):
+            probabilities[index] = probability
+            prediction_cache.put(model_version, image_hashes[index], probability)
+
+    return jsonify([dict(file_name=uploaded_file.filename, **predictor.get_prediction(probability))
+                    for uploaded_file, probability in zip(uploaded_files, probabilities)])
+
+@app.route("/cache/stats", methods=['GET'])
+
+def cache_stats():
+    return jsonify(prediction_cache.get_stats())
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
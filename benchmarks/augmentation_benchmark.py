@@ -0,0 +1,134 @@
+"""
+Benchmarks the vectorized batch augmentation against the per image ImageDataGenerator path
+and checks that both produce the same output distributions.
+
+Usage: python -m benchmarks.augmentation_benchmark [--repeats 5] [--samples 2048] [--seed 42]
+"""
+import sys
+import time
+import json
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+from src.constant import *
+from src.utils.augmentation import augment_batch, augment_numpy_batch, get_affine_matrices, warp_batch
+from src.utils.drift_detector import ks_2samp
+
+
+def get_keras_generator() -> ImageDataGenerator:
+    return ImageDataGenerator(rotation_range=ROTATION_RANGE, horizontal_flip=HORIZONTAL_FLIP,
+                              width_shift_range=WIDTH_SHIFT_RANGE, height_shift_range=HEIGHT_SHIFT_RANGE,
+                              shear_range=SHEAR_RANGE, zoom_range=ZOOM_RANGE)
+
+
+def get_probe_images(batch_size:int, rng:np.random.Generator) -> np.ndarray:
+
+    """
+    Returns images with a bright off center square on a gradient, so every transform
+    moves measurable mass.
+    """
+
+    rows, cols = np.meshgrid(np.linspace(0, 1, IMAGE_SIZE), np.linspace(0, 1, IMAGE_SIZE), indexing='ij')
+    image = 0.3 * rows + 0.1 * cols
+    image[40:100, 130:190] = 1.0
+    images = np.repeat(image[None, :, :, None], IMAGE_COLOR_CHANNELS, axis=3).repeat(batch_size, axis=0)
+    return (images + rng.normal(0, 0.01, images.shape)).astype(np.float32)
+
+
+def get_output_features(images:np.ndarray) -> dict:
+
+    """
+    Returns per image summaries compared between the augmentation paths.
+    """
+
+    gray = images.mean(axis=3)
+    mass = np.clip(gray - 0.5, 0, None)
+    total_mass = mass.sum(axis=(1, 2)) + 1e-12
+    rows, cols = np.meshgrid(np.arange(IMAGE_SIZE), np.arange(IMAGE_SIZE), indexing='ij')
+
+    return {
+        'mean_intensity': gray.mean(axis=(1, 2)),
+        'bright_fraction': (gray > 0.5).mean(axis=(1, 2)),
+        'center_row': (mass * rows).sum(axis=(1, 2)) / total_mass,
+        'center_col': (mass * cols).sum(axis=(1, 2)) / total_mass,
+    }
+
+
+def time_path(augment, images:np.ndarray, repeats:int) -> float:
+    augment(images)
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        augment(images)
+    return (time.perf_counter() - start_time) / repeats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--samples', type=int, default=2048)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    images = get_probe_images(BATCH_SIZE, rng)
+    keras_generator = get_keras_generator()
+    tf_seed = tf.constant([args.seed, 0], dtype=tf.int64)
+
+    paths = {
+        'keras_per_image': lambda batch: np.stack([keras_generator.random_transform(image) for image in batch]),
+        'numpy_vectorized': lambda batch: augment_numpy_batch(batch, rng),
+        'tensorflow_vectorized': lambda batch: augment_batch(tf.constant(batch), tf_seed).numpy(),
+    }
+
+    timings = {name: time_path(augment, images, args.repeats) for name, augment in paths.items()}
+
+    # Same matrices through the numpy warp and the tensorflow op must give the same pixels
+    matrices = get_affine_matrices(BATCH_SIZE, IMAGE_SIZE, IMAGE_SIZE, np.random.default_rng(args.seed))
+    transforms = np.stack([matrices[:, 1, 1], matrices[:, 1, 0], matrices[:, 1, 2], matrices[:, 0, 1],
+                           matrices[:, 0, 0], matrices[:, 0, 2], np.zeros(BATCH_SIZE), np.zeros(BATCH_SIZE)], axis=1)
+    tf_warped = tf.raw_ops.ImageProjectiveTransformV3(images=images, transforms=transforms.astype(np.float32),
+                                                      output_shape=[IMAGE_SIZE, IMAGE_SIZE], fill_value=0.0,
+                                                      interpolation=AUGMENTATION_INTERPOLATION,
+                                                      fill_mode=AUGMENTATION_FILL_MODE).numpy()
+    max_pixel_difference = float(np.abs(warp_batch(images, matrices) - tf_warped).max())
+
+    # Output distributions of the keras and vectorized paths over many draws
+    probe_images = get_probe_images(args.samples, rng)
+    keras_features = get_output_features(paths['keras_per_image'](probe_images))
+    distribution_checks = {}
+
+    # Bonferroni correction, every feature of every path is one test
+    p_value_threshold = DRIFT_P_VALUE_THRESHOLD / (2 * len(keras_features))
+
+    for name in ('numpy_vectorized', 'tensorflow_vectorized'):
+        outputs = np.concatenate([paths[name](probe_images[start:start + BATCH_SIZE]) if name == 'numpy_vectorized' else
+                                  augment_batch(tf.constant(probe_images[start:start + BATCH_SIZE]),
+                                                tf.constant([args.seed, start], dtype=tf.int64)).numpy()
+                                  for start in range(0, args.samples, BATCH_SIZE)])
+        features = get_output_features(outputs)
+
+        distribution_checks[name] = {}
+        for feature, values in features.items():
+            statistic, p_value = ks_2samp(keras_features[feature], values)
+            distribution_checks[name][feature] = {'ks_statistic': statistic, 'p_value': p_value,
+                                                  'is_equivalent': p_value >= p_value_threshold}
+
+    is_equivalent = max_pixel_difference < 1e-3 and all(check['is_equivalent'] for checks in distribution_checks.values()
+                                                        for check in checks.values())
+
+    print(json.dumps({
+        'batch_size': BATCH_SIZE,
+        'seconds_per_batch': timings,
+        'speedup_over_keras': {name: timings['keras_per_image'] / timing for name, timing in timings.items()},
+        'max_pixel_difference_numpy_tensorflow': max_pixel_difference,
+        'p_value_threshold': p_value_threshold,
+        'distribution_checks': distribution_checks,
+        'is_equivalent': is_equivalent
+    }, indent=4))
+
+    return 0 if is_equivalent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
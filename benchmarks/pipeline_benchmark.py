@@ -0,0 +1,408 @@
+"""
+Benchmarks the training pipeline end to end on synthetic chest x-ray datasets of several sizes.
+
+For every scale a chest_xray/{train,test,val}/{NORMAL,PNEUMONIA} zip is generated once into the
+data directory and served from a local HTTP server with Range support, so download_zip_data runs
+unchanged. The pipeline is run cold with profiling on, and the duration, throughput and peak
+memory of every stage are read from the run profile. Results are appended to a json history file
+and compared with the last result of the same scale, image size, epochs and weights.
+
+Usage: python -m benchmarks.pipeline_benchmark [--scales 1k 10k 100k 1M] [--image-size 64] [--epochs 1]
+                                               [--seed 42] [--config-file config/config.yml]
+                                               [--data-dir benchmarks/data] [--history-file benchmarks/pipeline_history.json]
+                                               [--regression-threshold 0.2] [--pretrained-weights imagenet]
+
+By default the model starts from random weights, so runs need no network and time only the pipeline.
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import platform
+import threading
+import functools
+import contextlib
+import subprocess
+import http.server
+import numpy as np
+import yaml
+from PIL import Image
+from src.constant import *
+from src.utils.utils import read_yaml_file
+
+
+SCALE_MULTIPLIERS = {'': 1, 'k': 10 ** 3, 'M': 10 ** 6}
+SPLIT_FRACTIONS = {TRAIN_DATA: 0.8, TEST_DATA: 0.1, VAL_DATA: 0.1}
+# Close to the class balance of the real chest x-ray dataset
+LABEL_FRACTIONS = {'NORMAL': 0.27, 'PNEUMONIA': 0.73}
+DATASET_INFO_FILE_NAME = 'dataset.json'
+# Stage durations below this many seconds are too noisy to flag as regressions
+MIN_REGRESSION_SECONDS = 0.5
+
+
+def parse_scale(scale:str) -> int:
+    match = re.fullmatch(r'(\d+)([kM]?)', scale)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"Scale [{scale}] is not a number of images like 1000, 10k or 1M")
+    return int(match[1]) * SCALE_MULTIPLIERS[match[2]]
+
+
+def get_image_counts(image_count:int) -> dict:
+
+    """
+    Splits an image count over every split and label, with at least one image in each.
+    """
+
+    return {split: {label: max(1, round(image_count * split_fraction * label_fraction))
+                    for label, label_fraction in LABEL_FRACTIONS.items()}
+            for split, split_fraction in SPLIT_FRACTIONS.items()}
+
+
+def get_image_bytes(label:str, image_size:int, rng:np.random.Generator) -> bytes:
+
+    """
+    Returns a unique grayscale jpeg, a gradient with noise, with a bright blob for PNEUMONIA so the
+    labels can be learned. Every image differs, so nothing is deduplicated by content hash.
+    """
+
+    rows = np.linspace(0, 1, image_size)[:, None]
+    image = 80 + 60 * rows + rng.normal(0, 20, (image_size, image_size))
+
+    if label == 'PNEUMONIA':
+        center_row, center_col = rng.integers(image_size // 4, 3 * image_size // 4, size=2)
+        blob_rows, blob_cols = np.ogrid[:image_size, :image_size]
+        image += 90 * np.exp(-((blob_rows - center_row) ** 2 + (blob_cols - center_col) ** 2) / (2 * (image_size / 8) ** 2))
+
+    image_buffer = io.BytesIO()
+    Image.fromarray(np.clip(image, 0, 255).astype(np.uint8)).save(image_buffer, format='JPEG', quality=85)
+    return image_buffer.getvalue()
+
+
+def generate_dataset_zip(data_dir:str, image_count:int, image_size:int, seed:int) -> dict:
+
+    """
+    Writes the synthetic chest_xray tree straight into a zip, members are stored since jpegs do not
+    compress. A zip generated before with the same parameters is reused.
+    """
+
+    dataset_dir = os.path.join(data_dir, f"{image_count}_{image_size}_{seed}")
+    dataset_info_file_path = os.path.join(dataset_dir, DATASET_INFO_FILE_NAME)
+
+    if os.path.exists(dataset_info_file_path):
+        with open(dataset_info_file_path) as dataset_info_file:
+            return json.load(dataset_info_file)
+
+    os.makedirs(dataset_dir, exist_ok=True)
+    zip_file_path = os.path.join(dataset_dir, UNZIPED_DATA_FILE_NAME + ZIP_EXTENSION)
+    image_counts = get_image_counts(image_count)
+    rng = np.random.default_rng(seed)
+
+    start_time = time.perf_counter()
+    with zipfile.ZipFile(zip_file_path + '.tmp', 'w', compression=zipfile.ZIP_STORED) as zip_file:
+        for split, label_counts in image_counts.items():
+            for label, label_count in label_counts.items():
+                for index in range(label_count):
+                    zip_file.writestr(f"{UNZIPED_DATA_FILE_NAME}/{split}/{label}/{split}_{label}_{index}.jpeg",
+                                      get_image_bytes(label, image_size, rng))
+    os.replace(zip_file_path + '.tmp', zip_file_path)
+
+    dataset_info = {
+        'zip_file_path': zip_file_path,
+        'image_count': sum(sum(label_counts.values()) for label_counts in image_counts.values()),
+        'image_counts': image_counts,
+        'image_size': image_size,
+        'seed': seed,
+        'zip_bytes': os.path.getsize(zip_file_path),
+        'generation_seconds': time.perf_counter() - start_time
+    }
+
+    with open(dataset_info_file_path, 'w') as dataset_info_file:
+        json.dump(dataset_info, dataset_info_file, indent=4)
+
+    return dataset_info
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+
+    """
+    Serves files like SimpleHTTPRequestHandler and answers Range requests with partial content,
+    the way the data source does for resumed downloads. A Range with an If-Range that is not the
+    current Last-Modified date gets the whole file, since the file changed.
+    """
+
+    def end_headers(self):
+        self.send_header('Accept-Ranges', 'bytes')
+        super().end_headers()
+
+    def send_head(self):
+        self.range_length = None
+        range_header = self.headers.get('Range')
+        file_path = self.translate_path(self.path)
+
+        if range_header is None or not os.path.isfile(file_path):
+            return super().send_head()
+
+        last_modified = self.date_time_string(int(os.stat(file_path).st_mtime))
+        if_range = self.headers.get('If-Range')
+        if if_range is not None and if_range != last_modified:
+            return super().send_head()
+
+        match = re.fullmatch(r'bytes=(\d+)-(\d*)', range_header.strip())
+        if match is None:
+            self.send_error(400, "Unsupported Range header")
+            return None
+
+        file_size = os.path.getsize(file_path)
+        start = int(match[1])
+        end = min(int(match[2]) if match[2] else file_size - 1, file_size - 1)
+
+        if start >= file_size or start > end:
+            self.send_response(416)
+            self.send_header('Content-Range', f"bytes */{file_size}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        range_file = open(file_path, 'rb')
+        range_file.seek(start)
+        self.range_length = end - start + 1
+
+        self.send_response(206)
+        self.send_header('Content-Type', self.guess_type(file_path))
+        self.send_header('Content-Range', f"bytes {start}-{end}/{file_size}")
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('Content-Length', str(self.range_length))
+        self.end_headers()
+        return range_file
+
+    def copyfile(self, source, outputfile):
+        if self.range_length is None:
+            return super().copyfile(source, outputfile)
+
+        remaining = self.range_length
+        while remaining > 0:
+            chunk = source.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            remaining -= len(chunk)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_directory(directory:str):
+
+    """
+    Serves a directory on a free local port while the context is open, yields the base url.
+    """
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(RangeRequestHandler, directory=directory))
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def write_benchmark_config(config_file_path:str, benchmark_config_file_path:str, data_source_url:str,
+                           artifact_dir:str, epochs:int, pretrained_weights:str) -> None:
+
+    """
+    Copies the pipeline config with the synthetic data source, a fresh artifact directory,
+    profiling on and the stage cache off, so every stage runs cold.
+    """
+
+    config_file_info = read_yaml_file(file_path=config_file_path)
+
+    config_file_info[TRAINING_PIPELINE_CONFIG_KEY].update({TRAINING_PIPELINE_ARTIFACT_DIR: artifact_dir,
+                                                           TRAINING_PIPELINE_IS_STAGE_CACHE_ENABLED: False,
+                                                           TRAINING_PIPELINE_IS_PROFILED: True})
+    config_file_info[DATA_INGESTION_CONFIG_KEY].update({DATA_INGESTION_DOWNLOAD_URL: data_source_url,
+                                                        DATA_INGESTION_DOWNLOAD_SHA256: None})
+    config_file_info[MODEL_TRAINER_CONFIG_KEY].update({MODEL_TRAINER_EPOCHS: epochs,
+                                                       MODEL_TRAINER_PRETRAINED_WEIGHTS: pretrained_weights})
+
+    with open(benchmark_config_file_path, 'w') as benchmark_config_file:
+        yaml.safe_dump(config_file_info, benchmark_config_file, sort_keys=False)
+
+
+def run_pipeline_benchmark(benchmark_config_file_path:str, time_stamp:str, image_count:int) -> dict:
+
+    """
+    Runs the pipeline once and returns duration, throughput and peak memory of every stage.
+    Throughput is the number of images of the dataset over the stage duration.
+    """
+
+    # Imported here, the pipeline pulls in tensorflow and every component
+    from src.config.configuration import Configuration
+    from src.pipe.pipeline import Pipeline
+
+    config = Configuration(config_file_path=benchmark_config_file_path, current_time_stamp=time_stamp)
+
+    start_time = time.perf_counter()
+    Pipeline(config).run_pipeline()
+    duration = time.perf_counter() - start_time
+
+    with open(os.path.join(config.training_pipeline_config.profile_dir, PROFILE_RUN_FILE_NAME)) as run_profile_file:
+        run_profile = json.load(run_profile_file)
+
+    stages = {stage: {
+        'duration_seconds': stage_record['duration_seconds'],
+        'images_per_second': image_count / stage_record['duration_seconds'] if stage_record['duration_seconds'] > 0 else None,
+        'cpu_seconds': stage_record['cpu_seconds'],
+        'children_cpu_seconds': stage_record['children_cpu_seconds'],
+        'peak_rss': stage_record['peak_rss'],
+        'bytes_read': stage_record['bytes_read'],
+        'bytes_written': stage_record['bytes_written']
+    } for stage, stage_record in run_profile['stages'].items()}
+
+    return {
+        'duration_seconds': duration,
+        'images_per_second': image_count / duration,
+        'peak_rss': max((stage['peak_rss'] for stage in stages.values()), default=None),
+        'stages': stages,
+        'run_profile_file_path': os.path.join(config.training_pipeline_config.profile_dir, PROFILE_RUN_FILE_NAME)
+    }
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_code_version() -> str:
+
+    """
+    Hashes the source of the pipeline and every module it uses, so uncommitted changes get
+    their own version.
+    """
+
+    from src.pipe import pipeline
+    from src.pipe.stage_cache import get_code_version
+    return get_code_version(pipeline)
+
+
+def read_history(history_file_path:str) -> list:
+    if not os.path.exists(history_file_path):
+        return []
+    with open(history_file_path) as history_file:
+        return json.load(history_file)
+
+
+def write_history(history_file_path:str, history:list) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(history_file_path)), exist_ok=True)
+    with open(history_file_path + '.tmp', 'w') as history_file:
+        json.dump(history, history_file, indent=4)
+    os.replace(history_file_path + '.tmp', history_file_path)
+
+
+def compare_with_history(result:dict, history:list, regression_threshold:float) -> dict:
+
+    """
+    Compares the stage durations of a result with the last result of the same scale, image size,
+    epochs and weights. A stage regresses when it got slower by more than regression_threshold.
+    """
+
+    previous_results = [previous_result for previous_result in history
+                        if all(previous_result[key] == result[key] for key in ('image_count', 'image_size', 'epochs', 'pretrained_weights'))]
+
+    if not previous_results:
+        return None
+
+    previous_result = previous_results[-1]
+    durations = {stage: (previous_result['stages'][stage]['duration_seconds'], stage_result['duration_seconds'])
+                 for stage, stage_result in result['stages'].items() if stage in previous_result['stages']}
+    durations['total'] = (previous_result['duration_seconds'], result['duration_seconds'])
+
+    return {
+        'previous_time_stamp': previous_result['time_stamp'],
+        'previous_git_commit': previous_result['git_commit'],
+        'duration_ratios': {stage: current / previous if previous > 0 else None for stage, (previous, current) in durations.items()},
+        'regressed_stages': [stage for stage, (previous, current) in durations.items()
+                             if current - previous > MIN_REGRESSION_SECONDS and current > previous * (1 + regression_threshold)]
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', type=parse_scale, default=[parse_scale('1k')])
+    parser.add_argument('--image-size', type=int, default=64)
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--config-file', default=CONFIG_FILE_PATH)
+    parser.add_argument('--data-dir', default=os.path.join('benchmarks', 'data'))
+    parser.add_argument('--history-file', default=os.path.join('benchmarks', 'pipeline_history.json'))
+    parser.add_argument('--regression-threshold', type=float, default=0.2)
+    parser.add_argument('--pretrained-weights', default=None)
+    args = parser.parse_args()
+
+    data_dir = os.path.abspath(args.data_dir)
+    history = read_history(args.history_file)
+    git_commit = get_git_commit()
+    code_version = get_code_version()
+    is_regressed = False
+
+    import tensorflow as tf
+
+    for image_count in args.scales:
+        dataset_info = generate_dataset_zip(data_dir, image_count, args.image_size, args.seed)
+        time_stamp = f"{CURRENT_TIME_STAMP}-{image_count}"
+
+        run_dir = os.path.join(data_dir, 'runs', time_stamp)
+        os.makedirs(run_dir, exist_ok=True)
+        benchmark_config_file_path = os.path.join(run_dir, CONFIG_FILE_NAME)
+
+        dataset_dir = os.path.dirname(dataset_info['zip_file_path'])
+        with serve_directory(dataset_dir) as base_url:
+            write_benchmark_config(args.config_file, benchmark_config_file_path,
+                                   data_source_url=f"{base_url}/{os.path.basename(dataset_info['zip_file_path'])}",
+                                   artifact_dir=os.path.join(run_dir, 'artifact'), epochs=args.epochs,
+                                   pretrained_weights=args.pretrained_weights)
+
+            pipeline_result = run_pipeline_benchmark(benchmark_config_file_path, time_stamp, dataset_info['image_count'])
+
+        result = {
+            'time_stamp': time_stamp,
+            'git_commit': git_commit,
+            'code_version': code_version,
+            'python_version': platform.python_version(),
+            'tensorflow_version': tf.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'image_count': dataset_info['image_count'],
+            'image_size': args.image_size,
+            'epochs': args.epochs,
+            'pretrained_weights': args.pretrained_weights,
+            'zip_bytes': dataset_info['zip_bytes'],
+            **pipeline_result
+        }
+
+        # Generated zips are kept for the next runs, of the artifacts only the run profile is kept
+        result['run_profile_file_path'] = shutil.copy(result['run_profile_file_path'], run_dir)
+        shutil.rmtree(os.path.join(run_dir, 'artifact'), ignore_errors=True)
+
+        comparison = compare_with_history(result, history, args.regression_threshold)
+        is_regressed = is_regressed or bool(comparison and comparison['regressed_stages'])
+
+        history.append(result)
+        write_history(args.history_file, history)
+
+        print(json.dumps({'result': result, 'comparison': comparison}, indent=4))
+
+    return 1 if is_regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
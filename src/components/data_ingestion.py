@@ -1,14 +1,19 @@
 import sys, os
 import zipfile
-from six.moves import urllib
-from src.constant import CSV_EXTENSION, TEST_DATA, TRAIN_DATA, UNZIPED_DATA_FILE_NAME, VAL_DATA
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from src.constant import CHANGE_TYPE, CONTENT_HASH, CHANGE_TYPE_ADDED, CHANGE_TYPE_CHANGED, CHANGE_TYPE_REMOVED, CSV_EXTENSION, IMAGE_LABEL, INGESTION_MODE_STREAM, LABEL_IMAGE_PATH, MANIFEST_STATE_COLUMNS, RECORD_SHARD_READ_BATCH_SIZE, RELATIVE_IMAGE_PATH, SPLIT_NAME, UNZIPED_DATA_FILE_NAME, ZIP_MEMBER_SEPARATOR
 from src.logger import logging
 from src.exception import CustomException
 from src.entity.config_entity import DataIngestionConfig
 from src.entity.artifact_entity import DataIngestionArtifact
-from src.utils.utils import convert_into_csv_format, description_base_dir, description_label_dirs
+from src.utils.download_manager import DownloadManager
+from src.utils.profiler import profile_methods
+from src.utils.record_shards import ShardReader, ShardWriter
+from src.utils.utils import build_manifest_state, convert_into_columnar_manifest, convert_into_csv_format, diff_manifest_state, find_zip_member_dir, get_split_from_manifest, map_splits, read_image_bytes, read_manifest_state, scan_label_image_dirs, write_manifest_rows
 
 
+@profile_methods
 class DataIngestion:
     
     def __init__(self, data_ingestion_config: DataIngestionConfig):
@@ -23,6 +28,8 @@ class DataIngestion:
         
         """
         Downloads the ziped data from source url into local_zip_data_dir_path.
+        The download is resumable, verified with sha256 and kept in data_cache, so 
+        later runs link the cached copy instead of downloading it again.
         
             Parameters: None
 
@@ -39,9 +46,6 @@ class DataIngestion:
             
             
             # Creating a directory ziped_data
-            if os.path.exists(local_zip_data_dir):
-                os.remove(local_zip_data_dir)
-                
             os.makedirs(local_zip_data_dir, exist_ok=True)
             
             
@@ -52,8 +56,13 @@ class DataIngestion:
             local_zip_data_dir_path = os.path.join(local_zip_data_dir,basename)
             
             logging.info(f"Downloading of ziped data file has started.")
-            # To download ziped data file in the directory
-            urllib.request.urlretrieve(download_url,local_zip_data_dir_path)
+            # To download ziped data file in the cache, only missing bytes are fetched
+            download_manager = DownloadManager(cache_dir=self.data_ingestion_config.data_cache_dir)
+            cached_zip_data_file_path = download_manager.download(
+                url=download_url,
+                sha256=self.data_ingestion_config.data_source_sha256
+            )
+            DownloadManager.link_file(cached_zip_data_file_path, local_zip_data_dir_path)
             logging.info(f"Downloading of ziped data file completed.")
             
             return local_zip_data_dir_path
@@ -88,6 +97,12 @@ class DataIngestion:
             # Extracting the ziped file in raw_data directory
             with zipfile.ZipFile(local_zip_data_dir_path, 'r') as zip_ref:
                 zip_ref.extractall(local_raw_data_dir_path)
+                
+                # Keeping the archived modification times, so unchanged images keep their mtime across runs
+                for zip_info in zip_ref.infolist():
+                    if not zip_info.is_dir():
+                        member_mtime = datetime(*zip_info.date_time).timestamp()
+                        os.utime(os.path.join(local_raw_data_dir_path, zip_info.filename), (member_mtime, member_mtime))
             logging.info("Extaracted of ziped file completed.")
             
             return local_raw_data_dir_path
@@ -95,15 +110,15 @@ class DataIngestion:
         except Exception as e:
             raise CustomException(e,sys) from e
         
-    def get_raw_data_train_test_val_path(self, local_raw_data_dir_path: str) -> tuple[str,str,str]:
+    def get_raw_data_split_paths(self, local_raw_data_dir_path: str) -> dict:
         
         """
-        Returns paths for raw data of train, test and validation.
+        Returns paths for raw data of every split.
         
             Parameters: local_raw_data_dir_path (str)
 
             Returns: 
-                local_train_raw_data_dir (str), local_test_raw_data_dir (str), local_val_raw_data_dir (str): Paths of train, test and validation directories containing csv data.
+                raw_data_file_paths (dict): Split -> path of the raw data directory of the split.
 
         """
         
@@ -112,37 +127,66 @@ class DataIngestion:
             # Creating a file path to chest_xray in raw_data directory
             file_local_raw_data_dir_path = os.path.join(local_raw_data_dir_path,UNZIPED_DATA_FILE_NAME)
             
-            # Creating a file path to train directory in chest_xray
-            local_train_raw_data_dir_path = os.path.join(file_local_raw_data_dir_path,TRAIN_DATA)
-            logging.info(f"Raw train data directory : [{local_train_raw_data_dir_path}]")
+            raw_data_file_paths = {}
+            for split in self.data_ingestion_config.splits:
+                
+                # Creating a file path to the split directory in chest_xray
+                raw_data_file_paths[split] = os.path.join(file_local_raw_data_dir_path, split)
+                logging.info(f"Raw [{split}] data directory : [{raw_data_file_paths[split]}]")
+                
+                if not os.path.isdir(raw_data_file_paths[split]):
+                    raise Exception(f"Split [{split}] is not in the raw data : [{raw_data_file_paths[split]}]")
             
-            # Creating a file path to test directory in chest_xray
-            local_test_raw_data_dir_path = os.path.join(file_local_raw_data_dir_path, TEST_DATA)
-            logging.info(f"Raw test data directory : [{local_test_raw_data_dir_path}]")
+            return raw_data_file_paths
             
-            # Creating a file path to val directory in chest_xray
-            local_val_raw_data_dir_path = os.path.join(file_local_raw_data_dir_path, VAL_DATA)
-            logging.info(f"Raw validation data directory : [{local_val_raw_data_dir_path}]")
+        except Exception as e:
+            raise CustomException(e,sys) from e
+        
+    def get_zip_data_split_paths(self, local_zip_data_dir_path: str) -> dict:
+        
+        """
+        Returns streamed paths for the data of every split inside the ziped data file.
+        Nothing is extracted, the paths are of the form archive.zip!chest_xray/train
+        
+            Parameters: local_zip_data_dir_path (str)
+
+            Returns: 
+                raw_data_file_paths (dict): Split -> streamed path of the split directory.
+
+        """
+        
+        try:
             
-            return local_train_raw_data_dir_path, local_test_raw_data_dir_path, local_val_raw_data_dir_path
+            # Member directory of chest_xray in the ziped data file
+            zip_member_dir = find_zip_member_dir(zip_file_path=local_zip_data_dir_path, dir_name=UNZIPED_DATA_FILE_NAME)
+            file_local_zip_data_dir_path = local_zip_data_dir_path + ZIP_MEMBER_SEPARATOR + zip_member_dir
+            
+            raw_data_file_paths = {}
+            for split in self.data_ingestion_config.splits:
+                
+                # Creating a streamed path to the split directory in chest_xray
+                raw_data_file_paths[split] = file_local_zip_data_dir_path + '/' + split
+                logging.info(f"Streamed [{split}] data directory : [{raw_data_file_paths[split]}]")
+            
+            return raw_data_file_paths
             
         except Exception as e:
             raise CustomException(e,sys) from e
         
-    def get_ingested_csv_train_test_val_path(self) -> tuple[str,str,str]:
+    def get_ingested_csv_split_paths(self) -> dict:
         
         """
-        Returns paths for ingested csv data for train, test and validation.
+        Returns paths for ingested csv data of every split, creating their directories.
         
             Parameters: None
 
             Returns: 
-                local_train_csv_data_dir (str), local_test_csv_data_dir (str), local_val_csv_data_dir (str): Paths of train, test and validation directories containing csv data.
+                local_csv_data_dirs (dict): Split -> path of the directory containing the csv data of the split.
 
         """
         
         try:
-            # Location of ingested_data directory containg train, test and val data csv
+            # Location of ingested_data directory containg the csv data of every split
             local_ingested_csv_data_dir = self.data_ingestion_config.local_ingested_csv_data_dir
             
             # Creating a ingested_data directory
@@ -152,107 +196,238 @@ class DataIngestion:
             os.makedirs(local_ingested_csv_data_dir,exist_ok=True)
             
             
-            # Location for train_data that contain train data csv
-            local_train_csv_data_dir = self.data_ingestion_config.local_train_csv_data_dir
+            # Location for <split>_csv_data that contain the csv data of a split
+            local_csv_data_dirs = self.data_ingestion_config.local_csv_data_dirs
             
-            # Creating a train_data directory in ingested_data
-            if os.path.exists(local_train_csv_data_dir):
-                os.remove(local_train_csv_data_dir)
-                
-            os.makedirs(local_train_csv_data_dir,exist_ok=True)
+            # Creating a <split>_csv_data directory in ingested_data for every split
+            for local_csv_data_dir in local_csv_data_dirs.values():
+                if os.path.exists(local_csv_data_dir):
+                    os.remove(local_csv_data_dir)
+                    
+                os.makedirs(local_csv_data_dir,exist_ok=True)
             
             
-            # Location for test_data that contain test data csv
-            local_test_csv_data_dir = self.data_ingestion_config.local_test_csv_data_dir
+            return local_csv_data_dirs
             
-            # Creating a test_data directory in ingested_data
-            if os.path.exists(local_test_csv_data_dir):
-                os.remove(local_test_csv_data_dir)
-                
-            os.makedirs(local_test_csv_data_dir,exist_ok=True)
             
+        except Exception as e:
+            raise CustomException(e,sys) from e
+        
+    def get_manifest_state_and_diff(self, manifest: dict) -> tuple[str,str]:
+        
+        """
+        Persists the manifest state (path, size, mtime and content hash) of the current source and 
+        writes its diff against the state of the last run. Only new or modified images are hashed.
+        The content hashes are added to the manifest as a Content_Hash column.
+        
+        The diff is an audit record of what changed, no stage reads it. Unchanged images are skipped
+        through their content hashes instead: record shards of a split are reused when its hashes
+        match, and the image stats cache and tensor store only process hashes they have not seen.
+        
+            Parameters: manifest (dict): Columnar manifest with file size and mtime
+
+            Returns: 
+                manifest_state_file_path (str), manifest_diff_file_path (str)
+
+        """
+        
+        try:
             
-            # Location for val_data that contain test data csv
-            local_val_csv_data_dir = self.data_ingestion_config.local_val_csv_data_dir
+            manifest_state_file_path = self.data_ingestion_config.manifest_state_file_path
+            manifest_diff_file_path = self.data_ingestion_config.manifest_diff_file_path
             
-            # Creating a val_data directory in ingested_data
-            if os.path.exists(local_val_csv_data_dir):
-                os.remove(local_val_csv_data_dir)
-                
-            os.makedirs(local_val_csv_data_dir,exist_ok=True)
+            # Manifest state of the last run, empty on the first run
+            previous_manifest_state = read_manifest_state(state_file_path=manifest_state_file_path)
+            logging.info(f" Previous manifest state has [{len(previous_manifest_state)}] images.")
+            
+            manifest_state = build_manifest_state(manifest=manifest, previous_manifest_state=previous_manifest_state)
+            manifest_diff = diff_manifest_state(previous_manifest_state=previous_manifest_state, manifest_state=manifest_state)
+            manifest[CONTENT_HASH] = [row[CONTENT_HASH] for row in manifest_state]
             
+            change_counts = {change_type: 0 for change_type in (CHANGE_TYPE_ADDED, CHANGE_TYPE_CHANGED, CHANGE_TYPE_REMOVED)}
+            for row in manifest_diff:
+                change_counts[row[CHANGE_TYPE]] += 1
+            logging.info(f" Manifest diff against the last run : [{change_counts}]")
             
-            return local_train_csv_data_dir, local_test_csv_data_dir, local_val_csv_data_dir
+            write_manifest_rows(file_path=manifest_diff_file_path, rows=manifest_diff, column_names=MANIFEST_STATE_COLUMNS + [CHANGE_TYPE])
+            write_manifest_rows(file_path=manifest_state_file_path, rows=manifest_state, column_names=MANIFEST_STATE_COLUMNS)
             
+            return manifest_state_file_path, manifest_diff_file_path
             
         except Exception as e:
             raise CustomException(e,sys) from e
         
-    def convert_raw_data_as_ingested_train_test_val_csv(self, local_train_csv_data_dir, local_test_csv_data_dir, local_val_csv_data_dir, local_train_raw_data_dir, local_test_raw_data_dir, local_val_raw_data_dir) -> DataIngestionArtifact:
+    def export_split_record_shards(self, manifest: dict, split: str) -> None:
         
         """
-        Converts raw train, test and validation data into trai, test and validation csv files.
+        Packs the images of one split into fixed size record shards and points their Label_Image_Path 
+        in the manifest at the records. The split is packed again only when its images or their content
+        hashes differ from its shards. Splits own disjoint rows of the manifest, so splits run concurrently.
         
-            Parameters: None
+            Parameters: 
+                manifest (dict): Columnar manifest with content hashes
+                split (str)
+
+            Returns: None
+
+        """
+        
+        try:
+            
+            record_shards_dir = self.data_ingestion_config.record_shards_dir
+            
+            split_indices = [index for index, image_split in enumerate(manifest[SPLIT_NAME]) if image_split == split]
+            relative_paths = ['/'.join([split, manifest[IMAGE_LABEL][index], os.path.basename(manifest[LABEL_IMAGE_PATH][index])])
+                              for index in split_indices]
+            
+            content_hashes = {relative_path: manifest[CONTENT_HASH][index] for index, relative_path in zip(split_indices, relative_paths)}
+            
+            record_paths = {}
+            shard_reader = ShardReader(shards_dir=record_shards_dir, split=split)
+            if shard_reader.is_complete() and dict(zip(shard_reader.index[RELATIVE_IMAGE_PATH], shard_reader.index[CONTENT_HASH])) == content_hashes:
+                record_paths = shard_reader.get_record_paths()
+                
+            if not split_indices or record_paths:
+                logging.info(f" Reusing record shards of [{split}].")
+            else:
+                logging.info(f" Packing [{len(split_indices)}] images of [{split}] into record shards.")
+                
+                # Images are read ahead on a thread pool in bounded batches, records are written in manifest order
+                with ShardWriter(shards_dir=record_shards_dir, split=split, shard_size=self.data_ingestion_config.record_shard_size) as shard_writer, \
+                     ThreadPoolExecutor() as executor:
+                    for batch_start in range(0, len(split_indices), RECORD_SHARD_READ_BATCH_SIZE):
+                        batch_indices = split_indices[batch_start:batch_start + RECORD_SHARD_READ_BATCH_SIZE]
+                        batch_bytes = executor.map(read_image_bytes, [manifest[LABEL_IMAGE_PATH][index] for index in batch_indices])
+                        
+                        for index, relative_path, record_bytes in zip(batch_indices, relative_paths[batch_start:], batch_bytes):
+                            record_paths[relative_path] = shard_writer.write(record_bytes=record_bytes, relative_path=relative_path,
+                                                                             label=manifest[IMAGE_LABEL][index],
+                                                                             content_hash=manifest[CONTENT_HASH][index])
+            
+            for index, relative_path in zip(split_indices, relative_paths):
+                manifest[LABEL_IMAGE_PATH][index] = record_paths[relative_path]
+                
+        except Exception as e:
+            raise CustomException(e,sys) from e
+        
+    def export_record_shards(self, manifest: dict) -> str:
+        
+        """
+        Packs the images of every split into record shards, one split per thread, so later stages
+        read a few large files instead of many small ones.
+        
+            Parameters: 
+                manifest (dict): Columnar manifest with content hashes
 
             Returns: 
-                data_ingestion_artifact (named tuple) -> It contains file path for the following directiories
+                record_shards_dir (str)
+
+        """
+        
+        try:
             
-                1. raw_data_train_file_path (path to raw train data)
-                2. raw_data_test_file_path (path to raw test data)
-                3. raw_data_val_file_path (path to val data)
-                4. ingested_data_csv_train_file_path (path to train csv)
-                5. ingested_data_csv_test_file_path (path to test csv)
-                6. ingested_data_csv_val_file_path (path to val csv)
-            )
+            record_shards_dir = self.data_ingestion_config.record_shards_dir
+            
+            map_splits(lambda split: self.export_split_record_shards(manifest=manifest, split=split), self.data_ingestion_config.splits)
+                    
+            logging.info(f" Record shards : [{record_shards_dir}]")
+            
+            return record_shards_dir
+            
+        except Exception as e:
+            raise CustomException(e,sys) from e
+        
+    def export_split_csv(self, manifest: dict, split: str, local_csv_data_dir: str) -> str:
+        
+        """
+        Converts the raw data of one split into its csv file.
+        
+            Parameters: 
+                manifest (dict): Columnar manifest of all splits
+                split (str), local_csv_data_dir (str)
+
+            Returns: 
+                ingested_data_csv_file_path (str)
 
         """
         
         try:
             
-            # Getting train_csv_data for train_raw_data in train_data//ingested_data
-            logging.info(f" Store directory for train data csv : [{local_train_csv_data_dir}]")
-            _,_, train_label_data_dir_path = description_base_dir(dir_path=local_train_raw_data_dir)
-            train_label_images_paths, train_images_labels = description_label_dirs(label_data_dir_paths=train_label_data_dir_path)
-            convert_into_csv_format(label_images_paths = train_label_images_paths,label_images_labels = train_images_labels, store_dir = local_train_csv_data_dir)
+            # Getting <split>_csv_data for the raw data of the split in <split>_csv_data//ingested_data
+            logging.info(f" Store directory for [{split}] data csv : [{local_csv_data_dir}]")
+            label_images_paths, images_labels = get_split_from_manifest(manifest=manifest, split=split)
+            convert_into_csv_format(label_images_paths = label_images_paths,label_images_labels = images_labels, store_dir = local_csv_data_dir)
             
+            # Creating a path to the csv data of the split
+            ingested_data_csv_file_path = os.path.join(local_csv_data_dir, os.path.basename(local_csv_data_dir) + CSV_EXTENSION)
+            logging.info(f" [{split}] csv data directory : [{ingested_data_csv_file_path}]")
             
-            # Getting test_csv_data for train_raw_data in test_data//ingested_data
-            logging.info(f" Store directory for test data csv : [{local_test_csv_data_dir}]")
-            _,_, test_label_data_dir_path = description_base_dir(dir_path=local_test_raw_data_dir)
-            test_label_images_paths, test_images_labels = description_label_dirs(label_data_dir_paths=test_label_data_dir_path)
-            convert_into_csv_format(label_images_paths = test_label_images_paths,label_images_labels = test_images_labels, store_dir = local_test_csv_data_dir)
+            return ingested_data_csv_file_path
             
+        except Exception as e:
+            raise CustomException(e,sys) from e
+        
+    def convert_raw_data_as_ingested_split_csv(self, local_csv_data_dirs: dict, raw_data_file_paths: dict) -> DataIngestionArtifact:
+        
+        """
+        Converts the raw data of every split into a manifest and, optionally, one csv file per split.
+        
+            Parameters: 
+                local_csv_data_dirs (dict): Split -> directory of the csv data of the split
+                raw_data_file_paths (dict): Split -> raw data directory of the split
+
+            Returns: 
+                data_ingestion_artifact (named tuple) -> It contains file path for the following directiories
             
-            # Getting test_csv_data for train_raw_data in val_data//ingested_data
-            logging.info(f" Store directory for validation data csv : [{local_val_csv_data_dir}]")
-            _,_, val_label_data_dir_path = description_base_dir(dir_path=local_val_raw_data_dir)
-            val_label_images_paths, val_images_labels = description_label_dirs(label_data_dir_paths=val_label_data_dir_path)
-            convert_into_csv_format(label_images_paths = val_label_images_paths,label_images_labels = val_images_labels, store_dir = local_val_csv_data_dir)
+                1. splits (names of the ingested splits)
+                2. raw_data_file_paths (split -> path to raw data of the split)
+                3. ingested_data_csv_file_paths (split -> path to csv of the split, empty when csv is not exported)
+                4. manifest_state_file_path (path to manifest state of this run)
+                5. manifest_diff_file_path (path to images added, changed or removed since the last run)
+                6. ingested_data_manifest_file_path (path to columnar manifest of all splits, None when not written)
+                7. ingested_data_record_shards_dir (path to record shards of all splits, None when not exported)
+            )
+
+        """
+        
+        try:
+            
+            splits = self.data_ingestion_config.splits
+            
+            # Scanning the raw data of every split in a single parallel pass
+            manifest = scan_label_image_dirs(split_dirs={split: raw_data_file_paths[split] for split in splits}, is_stat=True)
+            logging.info(f" Scanned [{len(manifest[LABEL_IMAGE_PATH])}] label images in raw data.")
             
-            # Train, test & validation csv file name
-            train_csv_file = os.path.basename(local_train_csv_data_dir) + CSV_EXTENSION
-            test_csv_file = os.path.basename(local_test_csv_data_dir) + CSV_EXTENSION
-            val_csv_file = os.path.basename(local_val_csv_data_dir) + CSV_EXTENSION
+            # Persisting the manifest state and its diff against the last run
+            manifest_state_file_path, manifest_diff_file_path = self.get_manifest_state_and_diff(manifest=manifest)
             
-            # Creating a path to train, test and csv data
-            ingested_data_csv_train_file_path = os.path.join(local_train_csv_data_dir,train_csv_file)
-            logging.info(f" Train csv data directory : [{ingested_data_csv_train_file_path}]")
+            # Packing the images into record shards, the manifests then point at the records
+            ingested_data_record_shards_dir = None
+            if self.data_ingestion_config.record_shards_dir is not None:
+                ingested_data_record_shards_dir = self.export_record_shards(manifest=manifest)
             
-            ingested_data_csv_test_file_path = os.path.join(local_test_csv_data_dir,test_csv_file)
-            logging.info(f" Test csv data directory : [{ingested_data_csv_test_file_path}]")
+            # Writing one columnar manifest of all splits, memory mapped by the later stages
+            ingested_data_manifest_file_path = self.data_ingestion_config.manifest_file_path
+            if ingested_data_manifest_file_path is not None:
+                convert_into_columnar_manifest(manifest=manifest, file_path=ingested_data_manifest_file_path)
+                logging.info(f" Columnar manifest : [{ingested_data_manifest_file_path}]")
             
-            ingested_data_csv_val_file_path = os.path.join(local_val_csv_data_dir,val_csv_file)
-            logging.info(f" Validation csv data directory : [{ingested_data_csv_val_file_path}]")
+            # Per split csv files are only an export option next to the columnar manifest, written one split per thread
+            ingested_data_csv_file_paths = {}
+            if self.data_ingestion_config.is_export_csv_manifest:
+                ingested_data_csv_file_paths = map_splits(
+                    lambda split: self.export_split_csv(manifest=manifest, split=split, local_csv_data_dir=local_csv_data_dirs[split]),
+                    splits)
             
             
             data_ingestion_artifcat = DataIngestionArtifact(
-                raw_data_train_file_path = local_train_raw_data_dir,
-                raw_data_test_file_path = local_test_raw_data_dir,
-                raw_data_val_file_path = local_val_raw_data_dir,
-                ingested_data_csv_train_file_path = ingested_data_csv_train_file_path,
-                ingested_data_csv_test_file_path= ingested_data_csv_test_file_path,
-                ingested_data_csv_val_file_path= ingested_data_csv_val_file_path,
+                splits = splits,
+                raw_data_file_paths = raw_data_file_paths,
+                ingested_data_csv_file_paths = ingested_data_csv_file_paths,
+                manifest_state_file_path = manifest_state_file_path,
+                manifest_diff_file_path = manifest_diff_file_path,
+                ingested_data_manifest_file_path = ingested_data_manifest_file_path,
+                ingested_data_record_shards_dir = ingested_data_record_shards_dir,
                 is_ingested= True,
                 message = f"Data Ingestion completed successfully"
             )
@@ -267,11 +442,17 @@ class DataIngestion:
     def initiate_data_ingestion(self) -> DataIngestionArtifact:
         try:
             local_zip_data_dir_path = self.download_zip_data()
-            local_raw_data_dir_path = self.extract_zip_data(local_zip_data_dir_path=local_zip_data_dir_path)
-            local_train_raw_data_dir, local_test_raw_data_dir, local_val_raw_data_dir = self.get_raw_data_train_test_val_path(local_raw_data_dir_path=local_raw_data_dir_path)
-            local_train_csv_data_dir, local_test_csv_data_dir, local_val_csv_data_dir = self.get_ingested_csv_train_test_val_path()
             
-            return self.convert_raw_data_as_ingested_train_test_val_csv(local_train_csv_data_dir, local_test_csv_data_dir, local_val_csv_data_dir, local_train_raw_data_dir, local_test_raw_data_dir, local_val_raw_data_dir)
+            if self.data_ingestion_config.ingestion_mode == INGESTION_MODE_STREAM:
+                # Images are read straight out of the ziped data, raw_data is never written
+                raw_data_file_paths = self.get_zip_data_split_paths(local_zip_data_dir_path=local_zip_data_dir_path)
+            else:
+                local_raw_data_dir_path = self.extract_zip_data(local_zip_data_dir_path=local_zip_data_dir_path)
+                raw_data_file_paths = self.get_raw_data_split_paths(local_raw_data_dir_path=local_raw_data_dir_path)
+            
+            local_csv_data_dirs = self.get_ingested_csv_split_paths()
+            
+            return self.convert_raw_data_as_ingested_split_csv(local_csv_data_dirs=local_csv_data_dirs, raw_data_file_paths=raw_data_file_paths)
             
         except Exception as e:
             raise CustomException(e,sys) from e
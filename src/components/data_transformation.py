@@ -6,17 +6,15 @@ from src.logger import logging
 from src.utils.utils import *
 from src.exception import CustomException
 from src.entity.artifact_entity import *
+from src.utils.ingested_dataset import IngestedDataset
+from src.utils.profiler import profile_methods
+from src.utils.tensor_store import TensorStore
+from src.utils.augmentation import augment_batch
 
 import tensorflow as tf
-import efficientnet.keras as efn
-from tensorflow.keras.callbacks import Callback
-from keras.models import Model
-from keras.layers import Dense, GlobalAveragePooling2D
-from keras.callbacks import ReduceLROnPlateau, ModelCheckpoint
-from tensorflow.keras.metrics import Recall, Precision
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 
 
+@profile_methods
 class DataTransformation:
     
     def __init__(self, data_transformation_config: DataTransformationConfig,
@@ -26,218 +24,252 @@ class DataTransformation:
             
             self.data_transformation_config = data_transformation_config
             self.data_ingestion_artifact = data_ingestion_artifcat
+            self.ingested_dataset = IngestedDataset(data_ingestion_artifact = data_ingestion_artifcat)
+            self.tensor_store = TensorStore(store_dir = data_transformation_config.tensor_store_dir)
+            self.image_counts: dict = {}
             
         except Exception as e:
             raise CustomException(e,sys) from e
         
-    def get_data_generator_flow(self):
+    def get_image_positions_and_labels(self, split: str):
         
         """
-        It returns kwargs of data generator and data flow.
+        It adds the images of a split to the tensor store and returns where every image is
+        stored together with its class index. Images that can not be decoded are left out.
         
-            Parameters: None
+            Parameters: 
+                split (str)
 
             Returns: 
-                datagen_kwargs (generator), dataflow_kwargs (generator)
+                image_positions (numpy array), image_labels (numpy array)
         """
         
         try:
             
-            datagen_kwargs = dict(rescale = IMAGE_RESCALE)
-            dataflow_kwargs = dict(target_size=(IMAGE_SIZE, IMAGE_SIZE), 
-                        batch_size = BATCH_SIZE, 
-                        interpolation = INTERPOLATION, 
-                        class_mode = CLASS_MODE)
+            split_df = self.ingested_dataset.get_split_df(split)
+            
+            image_labels = split_df[IMAGE_LABEL].astype(str).map({label: index for index, label in enumerate(LABELS)})
+            
+            if image_labels.isna().any():
+                raise Exception(f"Labels of [{split}] are not in {LABELS} : {split_df[IMAGE_LABEL][image_labels.isna()].unique()}")
+            
+            content_hashes = split_df[CONTENT_HASH].tolist() if CONTENT_HASH in split_df.columns else None
+            image_positions = self.tensor_store.add_images(image_paths=split_df[LABEL_IMAGE_PATH].astype(str).tolist(),
+                                                           content_hashes=content_hashes,
+                                                           max_workers=self.data_transformation_config.preprocessing_max_workers)
             
-            return datagen_kwargs, dataflow_kwargs
+            is_stored = image_positions[:, 0] >= 0
+            if not is_stored.all():
+                logging.info(f"Leaving out [{int((~is_stored).sum())}] images of [{split}] that can not be decoded.")
+            
+            self.image_counts[split] = int(is_stored.sum())
+            
+            return image_positions[is_stored], image_labels.to_numpy(dtype='float32')[is_stored]
         
         except Exception as e:
             raise CustomException(e,sys) from e
         
-    def get_train_data_generator(self, datagen_kwargs, dataflow_kwargs):
+    def get_split_dataset(self, split: str, is_augmented: bool, is_shuffled: bool):
         
         """
-        It returns train data generator and store genrated data in 
-        transformed_train_data directory.
+        It returns a tf.data pipeline over every image of a split, built from the ingestion
+        manifest. Images are decoded and resized once into the tensor store, every epoch gathers
+        whole batches of memory mapped uint8 tensors, rescales them and augments each batch in
+        memory with one affine warp. Shuffle and augmentation are seeded with augmentation_seed.
         
             Parameters: 
-                datagen_kwargs (generator), dataflow_kwargs (generator)
+                split (str), is_augmented (bool), is_shuffled (bool)
 
             Returns: 
-                train_datagen (Generator containing transformed training images for modeling)
+                dataset (tf.data.Dataset): Batches of (images, labels)
         """
         
         try:
             
-            # Path to label directory in transformed_train_data_dir
-            label_zero_train_data_dir = os.path.join(
-                self.data_transformation_config.transformed_train_data_dir,
-                LABELS[0])
+            image_positions, image_labels = self.get_image_positions_and_labels(split)
+            logging.info(f"Building [{split}] input pipeline over [{len(image_positions)}] images.")
             
-            label_one_train_data_dir = os.path.join(
-                self.data_transformation_config.transformed_train_data_dir,
-                LABELS[1])
+            seed = self.data_transformation_config.augmentation_seed
+            is_deterministic = seed is not None or not is_shuffled
             
-            # Creating label directory in transformed_train_data_dir
-            os.makedirs(label_zero_train_data_dir, exist_ok=True)
-            os.makedirs(label_one_train_data_dir, exist_ok=True)
+            dataset = tf.data.Dataset.from_tensor_slices((image_positions, image_labels))
             
-            for label in LABELS:
-                
-                train_datagen = tf.keras.preprocessing.image.ImageDataGenerator(
-                    rotation_range=5,
-                    horizontal_flip=True,
-                    width_shift_range=0.1, 
-                    height_shift_range=0.1,
-                    shear_range=0.1, 
-                    zoom_range=0.1,
-                    **datagen_kwargs)
-                
-                train_generator = train_datagen.flow_from_directory(
-                    directory = self.data_ingestion_artifact.raw_data_train_file_path, 
-                    subset="training", 
-                    shuffle=True, 
-                    save_to_dir = self.data_transformation_config.transformed_train_data_dir +'/'+ label, 
-                    save_prefix='aug', 
-                    classes=[label],
-                    **dataflow_kwargs)
-                
-                batch = next(train_generator)
+            if is_shuffled:
+                dataset = dataset.shuffle(max(1, min(len(image_positions), SHUFFLE_BUFFER_SIZE)), seed=seed, reshuffle_each_iteration=True)
+            
+            def load_batch(batch_positions, batch_labels):
+                images = tf.numpy_function(self.tensor_store.get_images, [batch_positions], tf.uint8)
+                images.set_shape((None, IMAGE_SIZE, IMAGE_SIZE, IMAGE_COLOR_CHANNELS))
+                return tf.cast(images, tf.float32) * IMAGE_RESCALE, batch_labels
                 
-            return train_datagen
+            dataset = dataset.batch(BATCH_SIZE).map(load_batch, num_parallel_calls=tf.data.AUTOTUNE, deterministic=is_deterministic)
+            
+            if is_augmented:
+                # One seed per batch, drawn again on every epoch, so epochs differ but runs repeat
+                batch_seeds = tf.data.Dataset.random(seed=seed, rerandomize_each_iteration=True).batch(2)
                 
+                dataset = tf.data.Dataset.zip((dataset, batch_seeds)).map(
+                    lambda batch, batch_seed: (augment_batch(batch[0], batch_seed), batch[1]),
+                    num_parallel_calls=tf.data.AUTOTUNE, deterministic=is_deterministic)
+            
+            return dataset.prefetch(tf.data.AUTOTUNE)
+        
         except Exception as e:
             raise CustomException(e,sys) from e
         
-        
-    def get_test_data_generator(self, datagen_kwargs, dataflow_kwargs):
+    def get_eval_dataset(self, split: str):
         
         """
-        It returns test data generator and store genrated data in 
-        transformed_test_data directory.
+        It returns the deterministic evaluation pipeline of a split. Images are only resized
+        and rescaled, in manifest order, without shuffle or augmentation, in batches of
+        EVAL_BATCH_SIZE. The resized tensors come from the memory mapped tensor store, which is
+        shared by all runs, so repeated evaluations gather them again instead of keeping a copy.
         
             Parameters: 
-                datagen_kwargs (generator), dataflow_kwargs (generator)
+                split (str)
 
             Returns: 
-                test_datagen (Generator containing transformed testing images for modeling)
+                dataset (tf.data.Dataset): Batches of (images, labels)
         """
         
         try:
             
-            # Path to label directory in transformed_train_data_dir
-            label_zero_test_data_dir = os.path.join(
-                self.data_transformation_config.transformed_test_data_dir,
-                LABELS[0])
+            image_positions, image_labels = self.get_image_positions_and_labels(split)
+            logging.info(f"Building [{split}] evaluation pipeline over [{len(image_positions)}] images.")
             
-            label_one_test_data_dir = os.path.join(
-                self.data_transformation_config.transformed_test_data_dir,
-                LABELS[1])
+            def load_batch(batch_positions, batch_labels):
+                images = tf.numpy_function(self.tensor_store.get_images, [batch_positions], tf.uint8)
+                images.set_shape((None, IMAGE_SIZE, IMAGE_SIZE, IMAGE_COLOR_CHANNELS))
+                return tf.cast(images, tf.float32) * IMAGE_RESCALE, batch_labels
             
-            # Creating label directory in transformed_train_data_dir
-            os.makedirs(label_zero_test_data_dir, exist_ok=True)
-            os.makedirs(label_one_test_data_dir, exist_ok=True)
+            dataset = tf.data.Dataset.from_tensor_slices((image_positions, image_labels)).batch(EVAL_BATCH_SIZE)
+            dataset = dataset.map(load_batch, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
             
-            for label in LABELS:
-                
-                test_datagen = tf.keras.preprocessing.image.ImageDataGenerator(
-                    rotation_range=5,
-                    horizontal_flip=True,
-                    width_shift_range=0.1, 
-                    height_shift_range=0.1,
-                    shear_range=0.1, 
-                    zoom_range=0.1,
-                    **datagen_kwargs)
-                
-                test_generator = test_datagen.flow_from_directory(
-                    directory = self.data_ingestion_artifact.raw_data_test_file_path, 
-                    subset="training", 
-                    shuffle=True, 
-                    save_to_dir = self.data_transformation_config.transformed_test_data_dir +'/'+ label, 
-                    save_prefix='aug', 
-                    classes=[label],
-                    **dataflow_kwargs)
-                
-                batch = next(test_generator)
-                
-            return test_datagen
+            return dataset.prefetch(tf.data.AUTOTUNE)
         
         except Exception as e:
             raise CustomException(e,sys) from e
         
-        
-    def get_val_data_generator(self, datagen_kwargs, dataflow_kwargs):
+    def save_augmented_samples(self, dataset, sample_dir: str, sample_count: int) -> int:
         
         """
-        It returns validation data generator and store genrated data in 
-        transformed_val_data directory.
+        It saves the first augmented images of a dataset as png files, only used to audit
+        the augmentation. Nothing is written during normal runs.
         
             Parameters: 
-                datagen_kwargs (generator), dataflow_kwargs (generator)
+                dataset (tf.data.Dataset), sample_dir (str), sample_count (int)
 
             Returns: 
-                test_datagen (Generator containing transformed validation images for modeling)
+                saved_count (int)
         """
         
         try:
             
-            # Path to label directory in transformed_train_data_dir
-            label_zero_val_data_dir = os.path.join(
-                self.data_transformation_config.transformed_val_data_dir,
-                LABELS[0])
-            
-            label_one_val_data_dir = os.path.join(
-                self.data_transformation_config.transformed_val_data_dir,
-                LABELS[1])
-            
-            # Creating label directory in transformed_train_data_dir
-            os.makedirs(label_zero_val_data_dir, exist_ok=True)
-            os.makedirs(label_one_val_data_dir, exist_ok=True)
+            os.makedirs(sample_dir, exist_ok=True)
+            saved_count = 0
             
-            for label in LABELS:
-                
-                val_datagen = tf.keras.preprocessing.image.ImageDataGenerator(
-                    rotation_range=5,
-                    horizontal_flip=True,
-                    width_shift_range=0.1, 
-                    height_shift_range=0.1,
-                    shear_range=0.1, 
-                    zoom_range=0.1,
-                    **datagen_kwargs)
-                
-                val_generator = val_datagen.flow_from_directory(
-                    directory = self.data_ingestion_artifact.raw_data_val_file_path, 
-                    subset="training", 
-                    shuffle=True, 
-                    save_to_dir = self.data_transformation_config.transformed_val_data_dir +'/'+ label, 
-                    save_prefix='aug', 
-                    classes=[label],
-                    **dataflow_kwargs)
+            for images, labels in dataset:
+                for image, label in zip(images, labels.numpy()):
+                    if saved_count == sample_count:
+                        break
+                    
+                    image_file_path = os.path.join(sample_dir, f"{AUGMENTATION_AUDIT_FILE_PREFIX}_{saved_count}_{LABELS[int(label)]}.png")
+                    tf.io.write_file(image_file_path, tf.io.encode_png(tf.cast(tf.clip_by_value(image / IMAGE_RESCALE, 0, 255), tf.uint8)))
+                    saved_count += 1
+                    
+                if saved_count == sample_count:
+                    break
                 
-                batch = next(val_generator)
-                
-            return val_datagen
+            logging.info(f"Saved [{saved_count}] augmented images for audit into [{sample_dir}]")
+            
+            return saved_count
         
         except Exception as e:
             raise CustomException(e,sys) from e
         
+    def get_transformed_dataset(self, split: str):
+        
+        """
+        It builds the input pipeline of one split. Train is augmented and shuffled, every other
+        split is evaluated in order.
+        
+            Parameters: 
+                split (str)
+
+            Returns: 
+                dataset (tf.data.Dataset)
+        """
+        
+        try:
+            
+            if split == TRAIN_DATA:
+                return self.get_split_dataset(split=split, is_augmented=True, is_shuffled=True)
+            
+            return self.get_eval_dataset(split=split)
+            
+        except Exception as e:
+            raise CustomException(e, sys) from e
+        
+    def get_transformed_datasets(self) -> dict:
+        
+        """
+        It builds the input pipelines of all splits, one split per thread. Manifests are loaded
+        concurrently, images are added to the tensor store one split after another.
+        
+            Parameters: None
+
+            Returns: 
+                transformed_datasets (dict): split -> dataset
+        """
+        
+        try:
+            
+            return map_splits(self.get_transformed_dataset, self.data_ingestion_artifact.splits)
+            
+        except Exception as e:
+            raise CustomException(e, sys) from e
+        
+    def load_data_transformation_artifact(self, data_transformation_artifact: DataTransformationArtifact) -> DataTransformationArtifact:
+        
+        """
+        It completes an artifact loaded from the stage cache. Datasets are not stored, they are rebuilt
+        over the tensor store, which already holds every image, so nothing is decoded again.
+        
+            Parameters: 
+                data_transformation_artifact (DataTransformationArtifact): Cached artifact without datasets
+
+            Returns: 
+                data_transformation_artifact (DataTransformationArtifact)
+        """
+        
+        try:
+            
+            data_transformation_artifact = data_transformation_artifact._replace(transformed_datasets = self.get_transformed_datasets(),
+                                                                                 image_counts = self.image_counts)
+            
+            logging.info(f"Data Transformation Artifact : {data_transformation_artifact}")
+            
+            return data_transformation_artifact
+            
+        except Exception as e:
+            raise CustomException(e, sys) from e
+    
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         
         try:
             
-            datagen_kwargs, dataflow_kwargs = self.get_data_generator_flow()
-            transformed_train_data = self.get_train_data_generator(datagen_kwargs=datagen_kwargs, dataflow_kwargs=dataflow_kwargs)
-            transformed_test_data = self.get_test_data_generator(datagen_kwargs=datagen_kwargs, dataflow_kwargs=dataflow_kwargs)
-            transformed_val_data = self.get_val_data_generator(datagen_kwargs=datagen_kwargs, dataflow_kwargs=dataflow_kwargs)
+            transformed_datasets = self.get_transformed_datasets()
+            
+            # Augmented samples are only persisted when requested for audit
+            audit_sample_count = self.data_transformation_config.audit_sample_count
+            if audit_sample_count > 0:
+                self.save_augmented_samples(transformed_datasets[TRAIN_DATA], self.data_transformation_config.transformed_data_dirs[TRAIN_DATA], audit_sample_count)
             
             data_transformation_artifact = DataTransformationArtifact(
                 
-                transformed_train_data = transformed_train_data,
-                transformed_test_data = transformed_test_data,
-                transformed_val_data = transformed_val_data,
-                transformed_train_data_dir = self.data_transformation_config.transformed_train_data_dir,
-                transformed_test_data_dir = self.data_transformation_config.transformed_test_data_dir,
-                transformed_val_data_dir = self.data_transformation_config.transformed_val_data_dir,
+                transformed_datasets = transformed_datasets,
+                transformed_data_dirs = self.data_transformation_config.transformed_data_dirs,
+                image_counts = self.image_counts,
                 is_transformed = True,
                 message = "Data Transformation is completed"
             )
@@ -6,14 +6,15 @@ from src.exception import CustomException
 from src.entity.config_entity import *
 from src.entity.artifact_entity import *
 from src.utils.utils import *
-
-from evidently.model_profile import Profile
-from evidently.model_profile.sections import DataDriftProfileSection
-from evidently.dashboard import Dashboard
-from evidently.dashboard.tabs import DataDriftTab
-import json
+from src.utils.ingested_dataset import IngestedDataset
+from src.utils.profiler import profile_methods
+from src.utils.schema_validator import SchemaValidator
+from src.utils.image_validator import validate_images, write_stats_table
+from src.utils.drift_detector import get_data_drift_report, render_data_drift_report_page
+import time
 
 
+@profile_methods
 class DataValidation:
     
     def __init__(self, data_validation_config: DataValidationConfig, data_ingestion_artifact: DataIngestionArtifact) :
@@ -22,36 +23,39 @@ class DataValidation:
             self.data_validation_config = data_validation_config
             self.data_ingestion_artifact = data_ingestion_artifact
             self.schema_file_info = read_yaml_file(file_path = data_validation_config.schema_file_path)
+            self.ingested_dataset = IngestedDataset(data_ingestion_artifact = data_ingestion_artifact)
+            self.schema_validator = SchemaValidator(schema_file_info = self.schema_file_info)
+            self.schema_validation_results = None
+            self.image_stats = None
+            self.data_drift_report = None
             
         except Exception as e:
             raise CustomException(e,sys) from e
     
-    def get_train_test_and_val_df(self):
+    def get_split_dfs(self) -> dict:
         
         """
-        It returns dataframes for test, train and validation data
+        It returns the dataframes of every split. Each split is loaded once, concurrently,
+        and shared by every validation check.
         
             Parameters: None
 
             Returns: 
-                train_df (dataframe), test_df (dataframe), val_df (dataframe)
+                split_dfs (dict): split -> dataframe
         """
         
         try:
             
-            train_df = pd.read_csv(self.data_ingestion_artifact.ingested_data_csv_train_file_path)
-            test_df = pd.read_csv(self.data_ingestion_artifact.ingested_data_csv_test_file_path)
-            val_df = pd.read_csv(self.data_ingestion_artifact.ingested_data_csv_val_file_path)
-            
-            return train_df, test_df, val_df
+            return self.ingested_dataset.get_split_dfs()
+        
         except Exception as e:
             raise CustomException(e,sys) from e
         
         
-    def is_train_test_and_val_file_exit(self) -> None:
+    def is_split_files_exit(self) -> None:
         
         """
-        It checks if dataframes for test, train and validation data exits
+        It checks if the ingested data of every split exits
         
             Parameters: None
 
@@ -59,151 +63,238 @@ class DataValidation:
         """
         
         try:
-            logging.info("Checking if training, testing and validation dataframes exits")
+            logging.info("Checking if the dataframes of every split exits")
             
-            is_train_file_exit = False
-            is_test_file_exit = False
-            is_val_file_exit = False
+            manifest_file_path = self.data_ingestion_artifact.ingested_data_manifest_file_path
             
-            train_file_path = self.data_ingestion_artifact.ingested_data_csv_train_file_path
-            test_file_path = self.data_ingestion_artifact.ingested_data_csv_test_file_path
-            val_file_path = self.data_ingestion_artifact.ingested_data_csv_val_file_path
+            if manifest_file_path is not None:
+                if not os.path.exists(manifest_file_path):
+                    raise Exception(f"Manifest file : {manifest_file_path} is not present.")
+                
+                logging.info(f"Columnar manifest for every split exits.")
+                return
+            
+            ingested_data_csv_file_paths = self.data_ingestion_artifact.ingested_data_csv_file_paths
             
-            is_train_file_exit = os.path.exists(train_file_path)
-            is_test_file_exit = os.path.exists(test_file_path)
-            is_val_file_exit = os.path.exists(val_file_path)
+            missing_file_paths = {split: ingested_data_csv_file_paths.get(split) for split in self.data_ingestion_artifact.splits
+                                  if ingested_data_csv_file_paths.get(split) is None or not os.path.exists(ingested_data_csv_file_paths[split])}
             
-            if is_train_file_exit == is_test_file_exit == is_val_file_exit == True:
-                logging.info(f"Dataframes for training, testing and validation exits.")
+            if not missing_file_paths:
+                logging.info(f"Dataframes for {self.data_ingestion_artifact.splits} exits.")
             else:
-                message = f"Training file : {train_file_path}, testing file : {test_file_path} and validation file : {val_file_path} is not present."
+                message = f"Files of splits {missing_file_paths} are not present."
                 
                 raise Exception(message)
             
         except Exception as e:
             raise CustomException(e,sys) from e
         
-    def validate_dataset_schema(self) -> bool:
+    def validate_dataset_schema(self) -> dict:
         
         """
-        It validates the train, test and val dataframes with our schema file.
+        It validates the dataframe of every split with our schema file, one split per thread. The
+        schema is compiled into vectorized checks once and the results are reused by the reports.
+        A split violating the schema fails the validation, once the schema report is written.
         
             Parameters: None
 
             Returns: 
-                is_train_valid (bool), is_test_valid (bool), is_val_valid (bool)
+                split_validity (dict): split -> is_valid (bool)
         """        
         
         try:
             
-            # result = (on_false, on_true)[condition]
-            
-            is_train_valid = False
-            is_test_valid = False
-            is_val_valid = False
+            if self.schema_validation_results is None:
+                
+                logging.info(f"Validating the schema of the dataframes of every split.")
+                
+                self.schema_validation_results = self.schema_validator.validate_splits(split_dfs=self.get_split_dfs())
+                
+                for split, result in self.schema_validation_results.items():
+                    logging.info(f"[{split}] dataframe has a validation result {result[SCHEMA_RESULT_IS_VALID]}, "
+                                 f"column errors : {result[SCHEMA_RESULT_COLUMN_ERRORS]}, "
+                                 f"violations per column : {result[SCHEMA_RESULT_COLUMN_VIOLATION_COUNTS]} .")
+                    
+                self.save_schema_validation_report()
+            
+            split_validity = {split: result[SCHEMA_RESULT_IS_VALID] for split, result in self.schema_validation_results.items()}
+            
+            # Schema violations cancel the stages waiting for validation, like missing files and corrupt images
+            schema_errors = {split: {key: self.schema_validation_results[split][key]
+                                     for key in (SCHEMA_RESULT_COLUMN_ERRORS, SCHEMA_RESULT_COLUMN_VIOLATION_COUNTS)}
+                             for split, is_valid in split_validity.items() if not is_valid}
+            if schema_errors:
+                message = (f"Dataframes of splits {list(schema_errors)} violate the schema : {schema_errors}, "
+                           f"see the schema validation report in [{self.data_validation_config.data_validation_reports_file_path}]")
+                raise Exception(message)
             
-            logging.info(f"Validating the schema of training, testing and validating dataframe.")
-            train_df, test_df, val_df = self.get_train_test_and_val_df()
+            return split_validity
             
+        except Exception as e:
+            raise CustomException(e,sys) from e
+        
+    def save_schema_validation_report(self) -> None:
+        
+        """
+        It writes the schema validation results of every split as json. Rows with at least
+        one violation are listed by their index.
+        
+            Parameters: None
 
-            logging.info(f"Starting to validate train dataframe.")
-            is_train_valid = (False,True)[train_df.columns[0] == self.schema_file_info[SCHEMA_DATA_COLUMNS][0] and 
-                              train_df.columns[1] == self.schema_file_info[SCHEMA_DATA_COLUMNS][1] and 
-                              train_df.dtypes[train_df.columns[0]] == self.schema_file_info[SCHEMA_DATA_COLUMN_DATATYPES][SCHEMA_DATA_LABEL_IMAGE_PATH] and 
-                              train_df.dtypes[train_df.columns[1]] == self.schema_file_info[SCHEMA_DATA_COLUMN_DATATYPES][SCHEMA_DATA_IMAGE_LABEL] and 
-                              train_df[train_df.columns[1]].unique()[0] == self.schema_file_info[SCHEMA_DATA_DOMIAN_VALUES][SCHEMA_DATA_IMAGE_LABEL][0] and
-                              train_df[train_df.columns[1]].unique()[1] == self.schema_file_info[SCHEMA_DATA_DOMIAN_VALUES][SCHEMA_DATA_IMAGE_LABEL][1]]
-            logging.info(f"Train Dataframe has a validation result {is_train_valid} .")
-            
-            logging.info(f"Starting to validate test dataframe.")
-            is_test_valid = (False,True)[test_df.columns[0] == self.schema_file_info[SCHEMA_DATA_COLUMNS][0] and 
-                              test_df.columns[1] == self.schema_file_info[SCHEMA_DATA_COLUMNS][1] and 
-                              test_df.dtypes[test_df.columns[0]] == self.schema_file_info[SCHEMA_DATA_COLUMN_DATATYPES][SCHEMA_DATA_LABEL_IMAGE_PATH] and 
-                              test_df.dtypes[test_df.columns[1]] == self.schema_file_info[SCHEMA_DATA_COLUMN_DATATYPES][SCHEMA_DATA_IMAGE_LABEL] and 
-                              test_df[test_df.columns[1]].unique()[0] == self.schema_file_info[SCHEMA_DATA_DOMIAN_VALUES][SCHEMA_DATA_IMAGE_LABEL][0] and
-                              test_df[test_df.columns[1]].unique()[1] == self.schema_file_info[SCHEMA_DATA_DOMIAN_VALUES][SCHEMA_DATA_IMAGE_LABEL][1]]
-            logging.info(f"Test Dataframe has a validation result {is_test_valid} .")
-            
-            logging.info(f"Starting to validate validation dataframe.")
-            is_val_valid = (False,True)[val_df.columns[0] == self.schema_file_info[SCHEMA_DATA_COLUMNS][0] and 
-                              val_df.columns[1] == self.schema_file_info[SCHEMA_DATA_COLUMNS][1] and 
-                              val_df.dtypes[val_df.columns[0]] == self.schema_file_info[SCHEMA_DATA_COLUMN_DATATYPES][SCHEMA_DATA_LABEL_IMAGE_PATH] and 
-                              val_df.dtypes[val_df.columns[1]] == self.schema_file_info[SCHEMA_DATA_COLUMN_DATATYPES][SCHEMA_DATA_IMAGE_LABEL] and 
-                              val_df[val_df.columns[1]].unique()[0] == self.schema_file_info[SCHEMA_DATA_DOMIAN_VALUES][SCHEMA_DATA_IMAGE_LABEL][0] and
-                              val_df[val_df.columns[1]].unique()[1] == self.schema_file_info[SCHEMA_DATA_DOMIAN_VALUES][SCHEMA_DATA_IMAGE_LABEL][1]]
-            logging.info(f"Validation Dataframe has a validation result {is_val_valid} .")
-            
-            return is_train_valid, is_test_valid, is_val_valid
+            Returns: None
+        """
+        
+        try:
+            data_validation_reports_file_path = self.data_validation_config.data_validation_reports_file_path
+            
+            os.makedirs(data_validation_reports_file_path, exist_ok=True)
+            
+            schema_validation_report_file_path = os.path.join(
+                data_validation_reports_file_path,
+                DATA_VALIDATION_SCHEMA_REPORT_FILE_NAME +
+                JSON_EXTENTION
+            )
             
+            schema_validation_report = {}
+            for split, result in self.schema_validation_results.items():
+                split_report = {key: value for key, value in result.items() if key != SCHEMA_RESULT_ROW_VIOLATION_COUNTS}
+                split_report[SCHEMA_RESULT_VIOLATING_ROWS] = result[SCHEMA_RESULT_ROW_VIOLATION_COUNTS].nonzero()[0].tolist()
+                schema_validation_report[split] = split_report
+                
+            with open(schema_validation_report_file_path, 'w') as report_file:
+                json.dump(schema_validation_report, report_file, indent=6)
+                
         except Exception as e:
             raise CustomException(e,sys) from e
         
+    def save_split_text_report(self, split: str, split_df: pd.DataFrame) -> str:
+        
+        """
+        It writes the text report of one split, its columns, row count and rows per class.
+        
+            Parameters: 
+                split (str), split_df (dataframe)
+
+            Returns: 
+                text_report_file_path (str)
+        """
+        
+        try:
+            
+            text_report_file_path = os.path.join(self.data_validation_config.data_validation_reports_file_path,
+                                                 split + SPLIT_REPORT_SUFFIX + TEXT_EXTENTION)
+            
+            logging.info(f"Writing validation reports for {split} dataframe.")
+            
+            # Row counts of every class come from the schema validation, any number of classes is supported
+            label_counts = self.schema_validation_results[split][SCHEMA_RESULT_LABEL_COUNTS]
+            
+            with open(text_report_file_path, 'a') as text_report:
+                text_report.write('No. of features in dataframe : ' + str(len(split_df.columns)) + '\n')
+                text_report.write('No. of rows in dataframe : ' + str(split_df.shape[0])+ '\n')
+                text_report.write('Features in dataframe : ' + str(split_df.columns)+ '\n')
+                text_report.write('Categories in ' + str(split_df.columns[1]) + ' : ' + str(list(label_counts))+ '\n')
+                for label, label_count in label_counts.items():
+                    text_report.write('No. of rows for ' + str(label) + ' : ' + str(label_count)+ '\n')
+                    
+            return text_report_file_path
+                
+        except Exception as e:
+            raise CustomException(e, sys) from e
+        
     def get_validation_reports(self):
         try:
-            is_train_valid, is_test_valid, is_val_valid = self.validate_dataset_schema()
-            train_df, test_df, val_df = self.get_train_test_and_val_df()
+            # Runs after validate_dataset_schema passed, its results hold the label counts
+            if self.schema_validation_results is None:
+                raise Exception("Schema of the dataframes is not validated yet, run validate_dataset_schema first")
+            
+            split_dfs = self.get_split_dfs()
             
-            # Validation report directory path for train, test and val data
+            # Validation report directory path for the data of every split
             data_validation_reports_file_path = self.data_validation_config.data_validation_reports_file_path
             
             os.makedirs(data_validation_reports_file_path, exist_ok=True)
             
-            train_data_validation_text_report_file_path = os.path.join(data_validation_reports_file_path,TRAIN_REPORT +
-                                                                TEXT_EXTENTION)
-            
-            test_data_validation_text_report_file_path = os.path.join(data_validation_reports_file_path,TEST_REPORT +
-                                                                TEXT_EXTENTION)
+            map_splits(lambda split: self.save_split_text_report(split, split_dfs[split]), list(split_dfs))
+                
+        except Exception as e:
+            raise CustomException(e, sys) from e
+        
+    def validate_images(self) -> pd.DataFrame:
+        
+        """
+        It checks the header of every image and decodes it in worker processes, recording
+        dimensions, channels, bit depth and corrupt or duplicate files in a per image stats table.
+        Images whose content hash is already in the stats cache are not decoded again.
+        
+            Parameters: None
 
-            val_data_validation_text_report_file_path = os.path.join(data_validation_reports_file_path,VAL_REPORT +
-                                                                TEXT_EXTENTION)            
+            Returns: 
+                image_stats (dataframe)
+        """
+        
+        try:
+            if self.image_stats is not None:
+                return self.image_stats
+            
+            split_dfs = self.get_split_dfs()
+            splits = [split for split, split_df in split_dfs.items() for _ in range(len(split_df))]
+            all_df = pd.concat([split_df[[column for column in (LABEL_IMAGE_PATH, CONTENT_HASH) if column in split_df.columns]]
+                                for split_df in split_dfs.values()], ignore_index=True)
+            
+            content_hashes = all_df[CONTENT_HASH].tolist() if CONTENT_HASH in all_df.columns else None
+            
+            logging.info(f"Validating [{len(all_df)}] images.")
+            image_stats = validate_images(
+                image_paths = all_df[LABEL_IMAGE_PATH].tolist(),
+                content_hashes = content_hashes,
+                cache_file_path = self.data_validation_config.image_stats_cache_file_path,
+                max_workers = self.data_validation_config.image_validation_max_workers
+            )
+            image_stats.insert(0, SPLIT_NAME, pd.Categorical(splits))
             
-            if is_train_valid == True and is_test_valid == True and is_val_valid == True:
-                
-                logging.info(f"Writing validation reports for train dataframe.")
-                
-                text_report = open(train_data_validation_text_report_file_path, 'a')
-                text_report.write('No. of features in dataframe : ' + str(len(train_df.columns)) + '\n')
-                text_report.write('No. of rows in dataframe : ' + str(train_df.shape[0])+ '\n')
-                text_report.write('Features in dataframe : ' + str(train_df.columns)+ '\n')
-                text_report.write('Categories in ' + str(train_df.columns[1]) + ' : ' + str(train_df.Image_Label.unique())+ '\n')
-                text_report.write('No. of rows for ' + str(train_df.Image_Label.unique()[0]) + ' : ' + str(len(train_df[train_df.Image_Label == train_df.Image_Label.unique()[0]]))+ '\n')
-                text_report.write('No. of rows for ' + str(train_df.Image_Label.unique()[1]) + ' : ' + str(len(train_df[train_df.Image_Label == train_df.Image_Label.unique()[1]]))+ '\n')
-                text_report.close()
-                
-                logging.info(f"Writing validation reports for test dataframe.")
-                
-                text_report = open(test_data_validation_text_report_file_path, 'a')
-                text_report.write('No. of features in dataframe : ' + str(len(test_df.columns)) + '\n')
-                text_report.write('No. of rows in dataframe : ' + str(test_df.shape[0])+ '\n')
-                text_report.write('Features in dataframe : ' + str(test_df.columns)+ '\n')
-                text_report.write('Categories in ' + str(test_df.columns[1]) + ' : ' + str(test_df.Image_Label.unique())+ '\n')
-                text_report.write('No. of rows for ' + str(test_df.Image_Label.unique()[0]) + ' : ' + str(len(test_df[test_df.Image_Label == test_df.Image_Label.unique()[0]]))+ '\n')
-                text_report.write('No. of rows for ' + str(test_df.Image_Label.unique()[1]) + ' : ' + str(len(test_df[test_df.Image_Label == test_df.Image_Label.unique()[1]]))+ '\n')
-                text_report.close()
-                
-                
-                logging.info(f"Writing validation reports for validation dataframe.")
-                
-                text_report = open(val_data_validation_text_report_file_path, 'a')
-                text_report.write('No. of features in dataframe : ' + str(len(val_df.columns)) + '\n')
-                text_report.write('No. of rows in dataframe : ' + str(val_df.shape[0])+ '\n')
-                text_report.write('Features in dataframe : ' + str(val_df.columns)+ '\n')
-                text_report.write('Categories in ' + str(val_df.columns[1]) + ' : ' + str(val_df.Image_Label.unique())+ '\n')
-                text_report.write('No. of rows for ' + str(val_df.Image_Label.unique()[0]) + ' : ' + str(len(val_df[val_df.Image_Label == val_df.Image_Label.unique()[0]]))+ '\n')
-                text_report.write('No. of rows for ' + str(val_df.Image_Label.unique()[1]) + ' : ' + str(len(val_df[val_df.Image_Label == val_df.Image_Label.unique()[1]]))+ '\n')
-                text_report.close()
+            write_stats_table(image_stats, self.data_validation_config.image_stats_file_path)
+            self.image_stats = image_stats
+            
+            corrupt_images = image_stats[image_stats[IS_CORRUPT]]
+            logging.info(f"Image validation found [{len(corrupt_images)}] corrupt and [{int(image_stats[IS_DUPLICATE].sum())}] duplicate images.")
+            
+            if not corrupt_images.empty:
+                message = f"Corrupt images : {corrupt_images[[LABEL_IMAGE_PATH, IMAGE_ERROR]].head(IMAGE_VALIDATION_MAX_REPORTED_ERRORS).values.tolist()}"
+                raise Exception(message)
+            
+            return image_stats
+        
+        except Exception as e:
+            raise CustomException(e,sys) from e
+        
+    def get_data_drift_report(self) -> dict:
+        
+        """
+        It compares every other split with the train split on per image summaries
+        (intensity histogram, mean and std intensity, resolution and aspect ratio). The report
+        is computed once and shared by the json and html reports.
+        
+            Parameters: None
+
+            Returns: 
+                report (dict)
+        """
+        
+        try:
+            if self.data_drift_report is None:
+                self.data_drift_report = get_data_drift_report(image_stats=self.validate_images(), reference_split=TRAIN_DATA)
                 
+            return self.data_drift_report
+        
         except Exception as e:
-            raise CustomException(e, sys) from e
+            raise CustomException(e,sys) from e
         
     def get_and_save_data_drift_report(self):
         try:
-            profile = Profile(sections=[DataDriftProfileSection()])
-            train_df, test_df, val_df = self.get_train_test_and_val_df()
-            profile.calculate(train_df,test_df)
-            report = json.loads(profile.json())
+            report = self.get_data_drift_report()
                 
-                # Validation report directory path for train, test and val data
+            # Validation report directory path for the data of every split
             data_validation_reports_file_path = self.data_validation_config.data_validation_reports_file_path
                 
             os.makedirs(data_validation_reports_file_path, exist_ok=True)
@@ -225,11 +316,9 @@ class DataValidation:
             
     def save_data_drift_report_page(self):
         try:
-            dashboard = Dashboard(tabs=[DataDriftTab()])
-            train_df, test_df, val_df = self.get_train_test_and_val_df()
-            dashboard.calculate(train_df,test_df)
+            report = self.get_data_drift_report()
             
-            # Validation report directory path for train, test and val data
+            # Validation report directory path for the data of every split
             data_validation_reports_file_path = self.data_validation_config.data_validation_reports_file_path
             
             os.makedirs(data_validation_reports_file_path, exist_ok=True)
@@ -240,7 +329,8 @@ class DataValidation:
                 HTML_EXTENSION
             )
             
-            dashboard.save(data_validation_webpage_report_file_path)
+            with open(data_validation_webpage_report_file_path, 'w') as report_page:
+                report_page.write(render_data_drift_report_page(report))
             
         except Exception as e:
             raise CustomException(e,sys) from e
@@ -251,22 +341,73 @@ class DataValidation:
             report = self.get_and_save_data_drift_report()
             self.save_data_drift_report_page()
             
-            return True
+            logging.info(f"Data drift detected : [{report[DRIFT_DETECTED_KEY]}]")
+            
+            return report[DRIFT_DETECTED_KEY]
+        except Exception as e:
+            raise CustomException(e,sys) from e
+        
+    def save_validation_timings(self, check_timings: dict) -> None:
+        
+        """
+        It writes the time taken by each validation check and by loading each split.
+        
+            Parameters: 
+                check_timings (dict): check name -> seconds
+
+            Returns: None
+        """
+        
+        try:
+            data_validation_reports_file_path = self.data_validation_config.data_validation_reports_file_path
+            
+            os.makedirs(data_validation_reports_file_path, exist_ok=True)
+            
+            validation_timings_file_path = os.path.join(
+                data_validation_reports_file_path,
+                DATA_VALIDATION_TIMINGS_FILE_NAME +
+                JSON_EXTENTION
+            )
+            
+            validation_timings = {
+                VALIDATION_CHECK_TIMINGS_KEY: check_timings,
+                VALIDATION_DATASET_LOADS_KEY: self.ingested_dataset.get_load_report()
+            }
+            
+            with open(validation_timings_file_path, 'w') as timings_file:
+                json.dump(validation_timings, timings_file, indent=6)
+                
+            logging.info(f"Data Validation Timings : {validation_timings}")
+            
         except Exception as e:
             raise CustomException(e,sys) from e
         
     def initiate_data_validation(self) -> DataValidationArtifact:
         try:
-            self.is_train_test_and_val_file_exit()
-            self.validate_dataset_schema()
-            self.get_validation_reports()
-            self.is_data_drift_found()
+            check_timings, check_results = {}, {}
+            
+            for validation_check in (self.is_split_files_exit,
+                                     self.validate_dataset_schema,
+                                     self.get_validation_reports,
+                                     self.validate_images,
+                                     self.is_data_drift_found):
+                start_time = time.perf_counter()
+                check_results[validation_check.__name__] = validation_check()
+                check_timings[validation_check.__name__] = time.perf_counter() - start_time
+                
+            self.save_validation_timings(check_timings=check_timings)
+            
+            # Drift does not fail the validation, it is recorded for the later stages and the reviewers
+            is_data_drift_found = bool(check_results[self.is_data_drift_found.__name__])
             
             data_validation_artifact = DataValidationArtifact(
                 schema_file_path= self.data_validation_config.schema_file_path,
                 data_validation_reports_file_path= self.data_validation_config.data_validation_reports_file_path,
+                image_stats_file_path= self.data_validation_config.image_stats_file_path,
+                is_data_drift_found= is_data_drift_found,
                 is_validated= True,
-                message= "Data Validation Performed Sucessfully"
+                message= "Data Validation Performed Sucessfully" +
+                         (", data drift found, see the data drift report" if is_data_drift_found else "")
             )
             
             logging.info(f"Data Validation Artifact : {data_validation_artifact}")
@@ -274,4 +415,4 @@ class DataValidation:
             return data_validation_artifact
             
         except Exception as e:
-            raise CustomException(e,sys) from e
\ No newline at end of file
+            raise CustomException(e,sys) from e
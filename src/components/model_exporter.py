@@ -0,0 +1,222 @@
+from src.constant import *
+from src.entity.config_entity import *
+from src.entity.artifact_entity import *
+from src.logger import logging
+from src.exception import CustomException
+from src.utils.utils import read_image_bytes
+from src.utils.ingested_dataset import IngestedDataset
+from src.utils.profiler import profile_methods
+from src.serving.predictor import Predictor, TFLitePredictor
+import os, sys
+import json
+import time
+import numpy as np
+
+import tensorflow as tf
+import efficientnet.tfkeras
+
+
+@profile_methods
+class ModelExporter:
+
+    def __init__(self, model_exporter_config: ModelExporterConfig,
+                 data_ingestion_artifact: DataIngestionArtifact,
+                 model_trainer_artifact: ModelTrainerArtifact):
+        try:
+            logging.info(f"{'>>' * 30}Model Exporter Started{'<<' * 30}")
+
+            self.model_exporter_config = model_exporter_config
+            self.model_trainer_artifact = model_trainer_artifact
+            self.ingested_dataset = IngestedDataset(data_ingestion_artifact)
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_sample_images(self, split: str, sample_count: int):
+
+        """
+        It reads and preprocesses a seeded sample of a split exactly like the prediction service.
+        Images that can not be decoded are left out.
+
+            Parameters:
+                split (str), sample_count (int)
+
+            Returns:
+                images (numpy array), image_labels (numpy array)
+        """
+
+        try:
+
+            split_df = self.ingested_dataset.get_split_df(split)
+            split_df = split_df.sample(n=min(sample_count, len(split_df)), random_state=EXPORT_SAMPLE_SEED)
+
+            images, image_labels = [], []
+            for image_path, image_label in zip(split_df[LABEL_IMAGE_PATH].astype(str), split_df[IMAGE_LABEL].astype(str)):
+                try:
+                    images.append(Predictor.preprocess(read_image_bytes(image_path)))
+                    image_labels.append(LABELS.index(image_label))
+                except Exception:
+                    continue
+
+            if not images:
+                raise Exception(f"No image of [{split}] can be decoded")
+
+            return np.stack(images), np.array(image_labels)
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def export_model(self, model) -> str:
+
+        """
+        It converts the trained model to tflite. With is_quantized, weights and activations are
+        quantized to int8, calibrated on a sample of the validation data; inputs and outputs stay
+        float so the exported model is a drop in replacement.
+
+            Parameters: model (Model)
+
+            Returns:
+                exported_model_file_path (str)
+        """
+
+        try:
+
+            converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+            if self.model_exporter_config.is_quantized:
+                calibration_images, _ = self.get_sample_images(VAL_DATA, self.model_exporter_config.calibration_sample_count)
+                logging.info(f"Calibrating int8 quantization on [{len(calibration_images)}] images of [{VAL_DATA}]")
+
+                converter.optimizations = [tf.lite.Optimize.DEFAULT]
+                converter.representative_dataset = lambda: ([image[None]] for image in calibration_images)
+                converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+            exported_model_file_path = self.model_exporter_config.exported_model_file_path
+            os.makedirs(os.path.dirname(exported_model_file_path), exist_ok=True)
+
+            with open(exported_model_file_path, 'wb') as exported_model_file:
+                exported_model_file.write(converter.convert())
+
+            logging.info(f"Exported model saved at [{exported_model_file_path}]")
+
+            return exported_model_file_path
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    @staticmethod
+    def get_model_report(predict_function, images: np.ndarray, image_labels: np.ndarray, model_file_path: str):
+
+        """
+        It predicts the images one at a time, as the prediction service does for a single request,
+        and reports the accuracy, the per image latency and the size of a model.
+
+            Parameters:
+                predict_function (function), images (numpy array), image_labels (numpy array), model_file_path (str)
+
+            Returns:
+                model_report (dict), probabilities (numpy array)
+        """
+
+        # First call builds the graph or allocates the tensors, it is not timed
+        predict_function(images[:1])
+
+        probabilities, latencies = [], []
+        for image in images:
+            start_time = time.perf_counter()
+            probabilities.append(float(np.asarray(predict_function(image[None])).reshape(-1)[0]))
+            latencies.append(time.perf_counter() - start_time)
+
+        probabilities = np.array(probabilities)
+        latency_percentiles = np.percentile(np.array(latencies) * 1000, EXPORT_LATENCY_PERCENTILES)
+
+        model_report = {
+            'model_file_path': model_file_path,
+            'size_bytes': os.path.getsize(model_file_path),
+            'accuracy': float(np.mean((probabilities >= PREDICTION_THRESHOLD) == image_labels)),
+            'latency_ms': {'mean': float(np.mean(latencies) * 1000),
+                           **{f"p{percentile}": float(value) for percentile, value in zip(EXPORT_LATENCY_PERCENTILES, latency_percentiles)}}
+        }
+
+        return model_report, probabilities
+
+    def save_export_report(self, export_report: dict) -> str:
+
+        """
+        It saves the comparison of the exported and trained models as json.
+
+            Parameters: export_report (dict)
+
+            Returns:
+                export_report_file_path (str)
+        """
+
+        try:
+
+            export_report_file_path = self.model_exporter_config.export_report_file_path
+            os.makedirs(os.path.dirname(export_report_file_path), exist_ok=True)
+
+            with open(export_report_file_path, 'w') as export_report_file:
+                json.dump(export_report, export_report_file, indent=6)
+
+            return export_report_file_path
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def initiate_model_exporter(self) -> ModelExporterArtifact:
+
+        try:
+
+            trained_model_file_path = self.model_trainer_artifact.trained_model_file_path
+            model = tf.keras.models.load_model(trained_model_file_path)
+
+            exported_model_file_path = self.export_model(model)
+
+            # Both models are compared on the same test images, through the same preprocessing as serving
+            images, image_labels = self.get_sample_images(TEST_DATA, self.model_exporter_config.evaluation_sample_count)
+            logging.info(f"Comparing exported and trained models on [{len(images)}] images of [{TEST_DATA}]")
+
+            trained_model_report, trained_probabilities = self.get_model_report(
+                lambda batch: model(batch, training=False), images, image_labels, trained_model_file_path)
+
+            exported_predictor = TFLitePredictor(model_file_path=exported_model_file_path)
+            exported_model_report, exported_probabilities = self.get_model_report(
+                exported_predictor.predict, images, image_labels, exported_model_file_path)
+
+            accuracy_delta = exported_model_report['accuracy'] - trained_model_report['accuracy']
+
+            export_report = {
+                'is_quantized': self.model_exporter_config.is_quantized,
+                'evaluation_image_count': int(len(images)),
+                'trained_model': trained_model_report,
+                'exported_model': exported_model_report,
+                'accuracy_delta': accuracy_delta,
+                'label_agreement': float(np.mean((trained_probabilities >= PREDICTION_THRESHOLD) ==
+                                                 (exported_probabilities >= PREDICTION_THRESHOLD))),
+                'max_probability_difference': float(np.max(np.abs(trained_probabilities - exported_probabilities))),
+                'size_ratio': exported_model_report['size_bytes'] / trained_model_report['size_bytes'],
+                'latency_speedup': trained_model_report['latency_ms']['mean'] / exported_model_report['latency_ms']['mean']
+            }
+
+            export_report_file_path = self.save_export_report(export_report)
+            logging.info(f"Accuracy delta [{accuracy_delta:+.4f}], size [{exported_model_report['size_bytes']}] bytes, "
+                         f"latency [{exported_model_report['latency_ms']['mean']:.2f}] ms per image")
+
+            model_exporter_artifact = ModelExporterArtifact(
+                exported_model_file_path = exported_model_file_path,
+                export_report_file_path = export_report_file_path,
+                accuracy_delta = accuracy_delta,
+                is_exported = True,
+                message = "Model Export is completed"
+            )
+
+            logging.info(f"Model Exporter Artifact : {model_exporter_artifact}")
+
+            return model_exporter_artifact
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def __del__(self):
+        logging.info(f"{'>>' * 30}Model Exporter Log Completed{'<<' * 30}")
@@ -0,0 +1,322 @@
+from src.constant import *
+from src.entity.config_entity import *
+from src.entity.artifact_entity import *
+from src.logger import logging
+from src.exception import CustomException
+from src.utils.profiler import profile_methods
+import os, sys
+import re
+import glob
+import json
+import time
+import numpy as np
+
+import tensorflow as tf
+import efficientnet.tfkeras as efn
+from tensorflow.keras.callbacks import Callback, ReduceLROnPlateau, ModelCheckpoint
+from tensorflow.keras.layers import Dense, GlobalAveragePooling2D
+from tensorflow.keras.metrics import Recall, Precision
+from tensorflow.keras.models import Model
+
+
+class TrainingThroughputCallback(Callback):
+
+    """
+    Records the wall time of every training step and the throughput of every epoch.
+    """
+
+    def __init__(self, images_per_epoch: int):
+        super().__init__()
+        self.images_per_epoch = images_per_epoch
+        self.epoch_reports: list = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.step_times: list = []
+        self.epoch_start_time = time.perf_counter()
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self.step_start_time = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.step_times.append(time.perf_counter() - self.step_start_time)
+
+    def on_epoch_end(self, epoch, logs=None):
+
+        # Epoch time includes validation, images per second only counts the training steps
+        training_seconds = float(np.sum(self.step_times))
+        step_time_percentiles = np.percentile(self.step_times, STEP_TIME_PERCENTILES) if self.step_times else [0.0] * len(STEP_TIME_PERCENTILES)
+
+        epoch_report = {
+            'epoch': epoch + 1,
+            'epoch_seconds': time.perf_counter() - self.epoch_start_time,
+            'training_seconds': training_seconds,
+            'steps': len(self.step_times),
+            'images_per_second': self.images_per_epoch / training_seconds if training_seconds > 0 else 0.0,
+            'step_time_seconds': {f"p{percentile}": float(value) for percentile, value in zip(STEP_TIME_PERCENTILES, step_time_percentiles)},
+            'metrics': {name: float(value) for name, value in (logs or {}).items()}
+        }
+
+        self.epoch_reports.append(epoch_report)
+        logging.info(f"Epoch [{epoch + 1}] : [{epoch_report['images_per_second']:.2f}] images/sec, "
+                     f"step time p50 [{epoch_report['step_time_seconds']['p50']:.4f}] seconds")
+
+
+class ResumableReduceLROnPlateau(ReduceLROnPlateau):
+
+    """
+    ReduceLROnPlateau that saves its best value, wait and cooldown counters and the learning rate
+    after every epoch, so a training resumed from a checkpoint continues the schedule where it was.
+    """
+
+    def __init__(self, state_file_path: str, initial_epoch: int, **kwargs):
+        super().__init__(**kwargs)
+        self.state_file_path = state_file_path
+        self.initial_epoch = initial_epoch
+
+    def on_train_begin(self, logs=None):
+        super().on_train_begin(logs)
+
+        if self.initial_epoch == 0 or not os.path.exists(self.state_file_path):
+            return
+
+        with open(self.state_file_path) as state_file:
+            state = json.load(state_file)
+
+        # State written after the last checkpoint belongs to another epoch than the one resumed
+        if state['epoch'] != self.initial_epoch:
+            logging.info(f"Learning rate state is of epoch [{state['epoch']}], not of the resumed epoch [{self.initial_epoch}], starting it again")
+            return
+
+        self.best, self.wait, self.cooldown_counter = state['best'], state['wait'], state['cooldown_counter']
+        self.model.optimizer.learning_rate = state['learning_rate']
+
+    def on_epoch_end(self, epoch, logs=None):
+        super().on_epoch_end(epoch, logs)
+
+        with open(self.state_file_path + '.tmp', 'w') as state_file:
+            json.dump({'epoch': epoch + 1,
+                       'best': None if self.best is None else float(self.best),
+                       'wait': int(self.wait),
+                       'cooldown_counter': int(self.cooldown_counter),
+                       'learning_rate': float(np.asarray(self.model.optimizer.learning_rate))}, state_file)
+        os.replace(self.state_file_path + '.tmp', self.state_file_path)
+
+
+@profile_methods
+class ModelTrainer:
+
+    def __init__(self, model_trainer_config: ModelTrainerConfig,
+                 data_transformation_artifact: DataTransformationArtifact, training_fingerprint: str = None):
+        try:
+            logging.info(f"{'>>' * 30}Model Trainer Started{'<<' * 30}")
+
+            self.model_trainer_config = model_trainer_config
+            self.data_transformation_artifact = data_transformation_artifact
+
+            # Checkpoints are only resumed by a training of the same config, data and code
+            self.checkpoint_dir = model_trainer_config.checkpoint_dir
+            if training_fingerprint is not None:
+                self.checkpoint_dir = os.path.join(self.checkpoint_dir, training_fingerprint)
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_model(self) -> Model:
+
+        """
+        It builds an EfficientNet-B0 base with a global average pooling and sigmoid head
+        for the binary classification of the labels.
+
+            Parameters: None
+
+            Returns:
+                model (Model): Compiled model
+        """
+
+        try:
+
+            base_model = efn.EfficientNetB0(weights=self.model_trainer_config.pretrained_weights, include_top=False,
+                                            input_shape=(IMAGE_SIZE, IMAGE_SIZE, IMAGE_COLOR_CHANNELS))
+            base_model.trainable = self.model_trainer_config.is_base_trainable
+
+            features = GlobalAveragePooling2D()(base_model.output)
+            predictions = Dense(1, activation='sigmoid')(features)
+
+            model = Model(inputs=base_model.input, outputs=predictions)
+            model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=self.model_trainer_config.learning_rate),
+                          loss='binary_crossentropy',
+                          metrics=['accuracy', Precision(name='precision'), Recall(name='recall')])
+
+            return model
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_last_checkpoint(self):
+
+        """
+        It returns the latest checkpoint of an unfinished training and its epoch.
+
+            Parameters: None
+
+            Returns:
+                checkpoint_file_path (str), epoch (int): None and 0 when there is no checkpoint
+        """
+
+        checkpoints = {}
+        for checkpoint_file_path in glob.glob(os.path.join(self.checkpoint_dir, CHECKPOINT_FILE_PATTERN)):
+            epoch = re.findall(r'\d+', os.path.basename(checkpoint_file_path))
+            if epoch:
+                checkpoints[int(epoch[-1])] = checkpoint_file_path
+
+        if not checkpoints:
+            return None, 0
+
+        last_epoch = max(checkpoints)
+        return checkpoints[last_epoch], last_epoch
+
+    def remove_old_checkpoints(self, is_all: bool = False) -> None:
+
+        """
+        It keeps the last CHECKPOINTS_TO_KEEP checkpoints, or removes all of them with the learning
+        rate state and the checkpoint directory of the training once training is completed.
+
+            Parameters: is_all (bool)
+
+            Returns: None
+        """
+
+        checkpoint_file_paths = sorted(glob.glob(os.path.join(self.checkpoint_dir, CHECKPOINT_FILE_PATTERN)))
+        for checkpoint_file_path in (checkpoint_file_paths if is_all else checkpoint_file_paths[:-CHECKPOINTS_TO_KEEP]):
+            os.remove(checkpoint_file_path)
+
+        if is_all:
+            reduce_lr_state_file_path = os.path.join(self.checkpoint_dir, REDUCE_LR_STATE_FILE_NAME)
+            if os.path.exists(reduce_lr_state_file_path):
+                os.remove(reduce_lr_state_file_path)
+
+            if self.checkpoint_dir != self.model_trainer_config.checkpoint_dir and not os.listdir(self.checkpoint_dir):
+                os.rmdir(self.checkpoint_dir)
+
+    def train_model(self):
+
+        """
+        It trains the model on the transformed train data and validates it on the transformed
+        validation data. A checkpoint is written after every epoch, an interrupted training
+        resumes from the last checkpoint at the epoch it reached, with the learning rate schedule
+        it had. Checkpoints of a training with another fingerprint are never resumed.
+
+            Parameters: None
+
+            Returns:
+                model (Model), throughput_callback (TrainingThroughputCallback), initial_epoch (int)
+        """
+
+        try:
+
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            checkpoint_file_path, initial_epoch = self.get_last_checkpoint()
+
+            if checkpoint_file_path is not None:
+                logging.info(f"Resuming training from [{checkpoint_file_path}] at epoch [{initial_epoch}]")
+                model = tf.keras.models.load_model(checkpoint_file_path)
+            else:
+                model = self.get_model()
+
+            throughput_callback = TrainingThroughputCallback(images_per_epoch=self.data_transformation_artifact.image_counts[TRAIN_DATA])
+
+            callbacks = [
+                ModelCheckpoint(filepath=os.path.join(self.checkpoint_dir, CHECKPOINT_FILE_NAME), save_freq='epoch'),
+                ResumableReduceLROnPlateau(state_file_path=os.path.join(self.checkpoint_dir, REDUCE_LR_STATE_FILE_NAME), initial_epoch=initial_epoch,
+                                           monitor='val_loss', factor=REDUCE_LR_FACTOR, patience=REDUCE_LR_PATIENCE, min_lr=REDUCE_LR_MIN_LR),
+                throughput_callback,
+                tf.keras.callbacks.LambdaCallback(on_epoch_end=lambda epoch, logs: self.remove_old_checkpoints())
+            ]
+
+            model.fit(self.data_transformation_artifact.transformed_datasets[TRAIN_DATA],
+                      validation_data=self.data_transformation_artifact.transformed_datasets[VAL_DATA],
+                      epochs=self.model_trainer_config.epochs,
+                      initial_epoch=initial_epoch,
+                      callbacks=callbacks,
+                      verbose=2)
+
+            return model, throughput_callback, initial_epoch
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def save_training_report(self, throughput_callback: TrainingThroughputCallback, initial_epoch: int,
+                             split_metrics: dict) -> str:
+
+        """
+        It saves the per epoch metrics, throughput, step time percentiles and the metrics of
+        every evaluated split as json.
+
+            Parameters:
+                throughput_callback (TrainingThroughputCallback), initial_epoch (int)
+                split_metrics (dict): split -> metrics, for every split but train
+
+            Returns:
+                training_report_file_path (str)
+        """
+
+        try:
+
+            training_report_file_path = self.model_trainer_config.training_report_file_path
+            os.makedirs(os.path.dirname(training_report_file_path), exist_ok=True)
+
+            with open(training_report_file_path, 'w') as training_report_file:
+                json.dump({
+                    'resumed_from_epoch': initial_epoch,
+                    'epochs': throughput_callback.epoch_reports,
+                    'val_metrics': split_metrics[VAL_DATA],
+                    'test_metrics': split_metrics[TEST_DATA],
+                    'split_metrics': split_metrics
+                }, training_report_file, indent=6)
+
+            return training_report_file_path
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def initiate_model_trainer(self) -> ModelTrainerArtifact:
+
+        try:
+
+            model, throughput_callback, initial_epoch = self.train_model()
+
+            # Val, test and any extra holdout split are evaluated alike
+            split_metrics = {}
+            for split, dataset in self.data_transformation_artifact.transformed_datasets.items():
+                if split != TRAIN_DATA:
+                    metrics = model.evaluate(dataset, verbose=0, return_dict=True)
+                    split_metrics[split] = {name: float(value) for name, value in metrics.items()}
+
+            trained_model_file_path = self.model_trainer_config.trained_model_file_path
+            os.makedirs(os.path.dirname(trained_model_file_path), exist_ok=True)
+            model.save(trained_model_file_path)
+            logging.info(f"Trained model saved at [{trained_model_file_path}]")
+
+            training_report_file_path = self.save_training_report(throughput_callback, initial_epoch, split_metrics)
+
+            # The training is completed, the next run starts from scratch
+            self.remove_old_checkpoints(is_all=True)
+
+            model_trainer_artifact = ModelTrainerArtifact(
+                trained_model_file_path = trained_model_file_path,
+                training_report_file_path = training_report_file_path,
+                val_metrics = split_metrics[VAL_DATA],
+                test_metrics = split_metrics[TEST_DATA],
+                is_trained = True,
+                message = "Model Training is completed"
+            )
+
+            logging.info(f"Model Trainer Artifact : {model_trainer_artifact}")
+
+            return model_trainer_artifact
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def __del__(self):
+        logging.info(f"{'>>' * 30}Model Trainer Log Completed{'<<' * 30}")
@@ -3,10 +3,12 @@ from src.entity.config_entity import *
 from src.constant import *
 import os
 import sys
+import glob
 from src.exception import CustomException
 from src.logger import logging
 
-from src.utils.utils import read_yaml_file
+from src.utils.utils import is_columnar_manifest_supported, read_yaml_file
+from src.utils.image_validator import get_stats_table_extension
 
 class Configuration:
     
@@ -15,8 +17,37 @@ class Configuration:
                  current_time_stamp = CURRENT_TIME_STAMP) -> None :
         
         self.config_file_info = read_yaml_file(file_path = config_file_path)
-        self.training_pipeline_config = self.get_training_pipeline_config()
         self.time_stamp = current_time_stamp
+        self.training_pipeline_config = self.get_training_pipeline_config()
+    
+    
+    def get_splits(self) -> list:
+        
+        """
+        Returns the names of the splits every stage works on, in order. Each split is a directory
+        of the raw data, e.g. an extra holdout set or a fold, train, test and val are required.
+        
+            Parameters: None
+
+            Returns: 
+                splits (list)
+        """
+        
+        try:
+            
+            splits = list(self.config_file_info[DATA_INGESTION_CONFIG_KEY].get(DATA_INGESTION_SPLITS) or DEFAULT_SPLITS)
+            
+            if len(set(splits)) != len(splits):
+                raise Exception(f"Splits must be unique : {splits}")
+            
+            missing_splits = [split for split in REQUIRED_SPLITS if split not in splits]
+            if missing_splits:
+                raise Exception(f"Splits {splits} miss the required splits {missing_splits}")
+            
+            return splits
+            
+        except Exception as e:
+            raise CustomException(e,sys) from e
     
     
     def get_data_ingestion_config(self) -> DataIngestionConfig:
@@ -30,11 +61,17 @@ class Configuration:
                 data_ingestion_config (named tuple) -> It contains file path for the following directiories
                 
                     1. Ziped_Data (Contains downloaded ziped data)
-                    2. Raw_Data (Contains raw train, test and val data)
-                    3. Ingested_CSV_Data (Contains csv train,test and val data)
-                    4. Train_CSV_Data (Contains train csv data)
-                    5. Test_CSV_Data (Contains test csv data)
-                    6. Val_CSV_Data (Contains val csv data)
+                    2. Raw_Data (Contains raw data of every split)
+                    3. Ingested_CSV_Data (Contains csv data of every split)
+                    4. Splits (Names of the splits, train, test, val and any extra holdout or fold)
+                    5. Split_CSV_Data (Split -> directory containing the csv data of the split)
+                    6. Ingestion_Mode (extract -> unzip into raw_data, stream -> read images from the zip)
+                    7. Data_Cache (Shared cache of verified downloads, reused by every run)
+                    8. Manifest_State (Path, size, mtime and content hash of every image of the last run)
+                    9. Manifest_Diff (Images added, changed or removed since the last run)
+                    10. Manifest (Columnar arrow manifest of all splits, None when manifests are csv only)
+                    11. Record_Shards (Images of every split packed into record shards, None when not exported)
+                    12. Record_Shard_Size (Maximum size of a record shard in bytes)
         """
         
         try:
@@ -56,6 +93,16 @@ class Configuration:
             # Contains source to data
             data_source_url = data_ingestion_config_file_info[DATA_INGESTION_DOWNLOAD_URL]
             
+            # Expected sha256 of the ziped data, optional
+            data_source_sha256 = data_ingestion_config_file_info.get(DATA_INGESTION_DOWNLOAD_SHA256)
+            
+            # Path to data_cache in data_ingestion//artifact, shared by all time stamps
+            data_cache_dir = os.path.join(
+                artifact_dir,
+                DATA_INGESTION_ARTIFACT_DIR,
+                data_ingestion_config_file_info[DATA_INGESTION_CACHE_DIR]
+            )
+            
             # Path to ziped_data in data_ingestion//artifact
             local_zip_data_dir = os.path.join(
                 data_ingestion_artifcat_dir,
@@ -76,33 +123,84 @@ class Configuration:
                 data_ingestion_config_file_info[DATA_INGESTION_LOCAL_INGESTED_CSV_DATA_DIR]
             )
             
-            # Path to train_csv_data in ingested_csv_data//data_ingestion//artifact
-            local_train_csv_data_dir = os.path.join(
-                local_ingested_csv_data_dir,
-                data_ingestion_config_file_info[DATA_INGESTION_LOCAL_TRAIN_CSV_DATA_DIR]
-            )
+            # Path to <split>_csv_data in ingested_csv_data//data_ingestion//artifact, for every split
+            splits = self.get_splits()
+            local_csv_data_dirs = {
+                split: os.path.join(local_ingested_csv_data_dir, split + SPLIT_CSV_DATA_DIR_SUFFIX)
+                for split in splits
+            }
             
-            # Path to test_csv_data in ingested_csv_data//data_ingestion//artifact
-            local_test_csv_data_dir = os.path.join(
-                local_ingested_csv_data_dir,
-                data_ingestion_config_file_info[DATA_INGESTION_LOCAL_TEST_CSV_DATA_DIR]
+            
+            # Path to manifest_state.csv in manifest_state//data_ingestion//artifact, shared by all time stamps
+            manifest_state_file_path = os.path.join(
+                artifact_dir,
+                DATA_INGESTION_ARTIFACT_DIR,
+                data_ingestion_config_file_info[DATA_INGESTION_MANIFEST_STATE_DIR],
+                MANIFEST_STATE_FILE_NAME
             )
             
-            # Path to val_csv_data in ingested_csv_data//data_ingestion//artifact
-            local_val_csv_data_dir = os.path.join(
+            # Path to manifest_diff.csv in ingested_csv_data//data_ingestion//artifact, an audit record of the changed images
+            manifest_diff_file_path = os.path.join(
                 local_ingested_csv_data_dir,
-                data_ingestion_config_file_info[DATA_INGESTION_LOCAL_VAL_CSV_DATA_DIR]
+                MANIFEST_DIFF_FILE_NAME
             )
             
             
+            # Columnar manifest needs pyarrow, csv manifests are always available
+            manifest_format = data_ingestion_config_file_info.get(DATA_INGESTION_MANIFEST_FORMAT, MANIFEST_FORMAT_CSV)
+            is_export_csv_manifest = bool(data_ingestion_config_file_info.get(DATA_INGESTION_EXPORT_CSV_MANIFEST, True))
+            
+            if manifest_format not in (MANIFEST_FORMAT_ARROW, MANIFEST_FORMAT_CSV):
+                raise Exception(f"Invalid manifest format : [{manifest_format}]")
+            
+            # An arrow manifest asked for explicitly is never silently replaced by a csv one
+            if manifest_format == MANIFEST_FORMAT_ARROW and not is_columnar_manifest_supported():
+                raise Exception(f"Manifest format [{MANIFEST_FORMAT_ARROW}] needs pyarrow, install it (see requirements.txt) "
+                                f"or set {DATA_INGESTION_MANIFEST_FORMAT} to [{MANIFEST_FORMAT_CSV}] in config.yml")
+                
+            # Path to manifest.arrow in ingested_csv_data//data_ingestion//artifact
+            manifest_file_path = None
+            if manifest_format == MANIFEST_FORMAT_ARROW:
+                manifest_file_path = os.path.join(local_ingested_csv_data_dir, MANIFEST_FILE_NAME)
+            else:
+                is_export_csv_manifest = True
+            
+            
+            # Ingestion mode, defaults to extracting the ziped data
+            ingestion_mode = data_ingestion_config_file_info.get(DATA_INGESTION_MODE, INGESTION_MODE_EXTRACT)
+            
+            if ingestion_mode not in (INGESTION_MODE_EXTRACT, INGESTION_MODE_STREAM):
+                raise Exception(f"Invalid ingestion mode : [{ingestion_mode}]")
+            
+            
+            # Path to record_shards in data_ingestion//artifact, shared by all time stamps
+            record_shards_dir = None
+            if data_ingestion_config_file_info.get(DATA_INGESTION_EXPORT_RECORD_SHARDS, False):
+                record_shards_dir = os.path.join(
+                    artifact_dir,
+                    DATA_INGESTION_ARTIFACT_DIR,
+                    data_ingestion_config_file_info.get(DATA_INGESTION_RECORD_SHARDS_DIR, DATA_INGESTION_RECORD_SHARDS_DIR)
+                )
+                
+            record_shard_size = int(data_ingestion_config_file_info.get(DATA_INGESTION_RECORD_SHARD_SIZE_MB, RECORD_SHARD_SIZE_MB) * 1024 * 1024)
+            
+            
             data_ingestion_config = DataIngestionConfig(
                 data_source_url=data_source_url,
+                data_source_sha256 = data_source_sha256,
+                data_cache_dir = data_cache_dir,
                 local_zip_data_dir= local_zip_data_dir,
                 local_raw_data_dir = local_raw_data_dir,
                 local_ingested_csv_data_dir = local_ingested_csv_data_dir,
-                local_train_csv_data_dir = local_train_csv_data_dir,
-                local_test_csv_data_dir = local_test_csv_data_dir,
-                local_val_csv_data_dir = local_val_csv_data_dir
+                splits = splits,
+                local_csv_data_dirs = local_csv_data_dirs,
+                ingestion_mode = ingestion_mode,
+                manifest_state_file_path = manifest_state_file_path,
+                manifest_diff_file_path = manifest_diff_file_path,
+                manifest_file_path = manifest_file_path,
+                is_export_csv_manifest = is_export_csv_manifest,
+                record_shards_dir = record_shards_dir,
+                record_shard_size = record_shard_size
             )
             
             logging.info(f" Data Ingestion Config : [{data_ingestion_config}]")
@@ -111,7 +209,7 @@ class Configuration:
             
             
         except Exception as e:
-            raise CustomException(sys,e) from e
+            raise CustomException(e,sys) from e
         
         
     def get_data_validation_config(self) -> DataValidationConfig:
@@ -125,9 +223,10 @@ class Configuration:
             data_validation_config (named tuple) -> It contains file path for the following directiories
                 
                 1. Schema_File_Path (Path to schema.yml file in config dir)
-                2. Train_Data_Validation_File_Path (Path to a directory having all train data validation reports)
-                3. Test_Data_Validation_File_Path (Path to a directory having all test data validation reports)
-                4. Val_Data_Validation_File_Path (Path to a directory having all val data validation reports)
+                2. Data_Validation_Reports_File_Path (Path to a directory having the validation reports of every split)
+                3. Image_Stats_File_Path (Path to the per image stats table of this run)
+                4. Image_Stats_Cache_File_Path (Path to the per image stats cache shared by all runs)
+                5. Image_Validation_Max_Workers (Number of processes decoding images, None for all cpus)
         """
         try:
             
@@ -138,7 +237,7 @@ class Configuration:
             data_validation_artifact_dir = os.path.join(
                 artifact_dir,
                 DATA_VALIDATION_ARTIFACT_DIR,
-                CURRENT_TIME_STAMP
+                self.time_stamp
             )
             
             data_validation_config_file_info = self.config_file_info[DATA_VALIDATION_CONFIG_KEY]
@@ -156,9 +255,26 @@ class Configuration:
                 data_validation_config_file_info[DATA_VALIDATION_REPORTS]
             )
             
+            # Path to image_stats in validation_reports//data_validation//artifact
+            image_stats_file_path = os.path.join(
+                data_validation_reports,
+                DATA_VALIDATION_IMAGE_STATS_FILE_NAME + get_stats_table_extension()
+            )
+            
+            # Path to image_stats_cache in data_validation//artifact, shared by all time stamps
+            image_stats_cache_file_path = os.path.join(
+                artifact_dir,
+                DATA_VALIDATION_ARTIFACT_DIR,
+                data_validation_config_file_info[DATA_VALIDATION_IMAGE_STATS_CACHE_DIR],
+                DATA_VALIDATION_IMAGE_STATS_CACHE_FILE_NAME + get_stats_table_extension()
+            )
+            
             data_validation_config = DataValidationConfig(
                 schema_file_path=schema_file_path,
                 data_validation_reports_file_path=data_validation_reports,
+                image_stats_file_path=image_stats_file_path,
+                image_stats_cache_file_path=image_stats_cache_file_path,
+                image_validation_max_workers=data_validation_config_file_info.get(DATA_VALIDATION_IMAGE_VALIDATION_MAX_WORKERS)
             )
             
             return data_validation_config
@@ -177,9 +293,11 @@ class Configuration:
         Returns: 
             data_transformation_config (named tuple) -> It contains file path for the following directiories
                 
-                1. Transformed_Train_Data_Dir (Path to a directory having transformed train iamges)
-                2. Transformed_Test_Data_Dir (Path to a directory having transformed test images)
-                3. Transformed_Val_Data_Dir (Path to a directory having transformed validation images)
+                1. Transformed_Data_Dirs (Split -> path to a directory having transformed images of the split)
+                2. Tensor_Store_Dir (Path to the preprocessed image tensors shared by all runs)
+                3. Preprocessing_Max_Workers (Number of processes preprocessing images, None for all cpus)
+                4. Augmentation_Seed (Seed of the shuffle and augmentation, None for a random seed)
+                5. Audit_Sample_Count (Number of augmented images saved per split for audit, 0 saves none)
         """
         
         try:
@@ -191,7 +309,7 @@ class Configuration:
             data_transformation_artifact_dir = os.path.join(
                 artifact_dir,
                 DATA_TRANSFORMATION_ARTIFACT_DIR,
-                CURRENT_TIME_STAMP
+                self.time_stamp
             )
             
             data_transformation_config_file_info = self.config_file_info[DATA_TRANSFORMATION_CONFIG_KEY]
@@ -202,28 +320,22 @@ class Configuration:
                 data_transformation_config_file_info[DATA_TRANSFORMATION_DIR_NAME]
             )
             
-            # Path to train in transformed_data//data_transformation//artifact
-            transformed_train_data_dir = os.path.join(
-                transformed_data_dir,
-                data_transformation_config_file_info[DATA_TRANSFORMATION_TRAIN_DIR_NAME]
-            )
-            
-            # Path to test in transformed_data//data_transformation//artifact
-            transformed_test_data_dir = os.path.join(
-                transformed_data_dir,
-                data_transformation_config_file_info[DATA_TRANSFORMATION_TEST_DIR_NAME]
-            )
+            # Path to <split> in transformed_data//data_transformation//artifact, for every split
+            transformed_data_dirs = {split: os.path.join(transformed_data_dir, split) for split in self.get_splits()}
             
-            # Path to val in transformed_data//data_transformation//artifact
-            transformed_val_data_dir = os.path.join(
-                transformed_data_dir,
-                data_transformation_config_file_info[DATA_TRANSFORMATION_VAL_DIR_NAME]
+            # Path to tensor_store in data_transformation//artifact, shared by all time stamps
+            tensor_store_dir = os.path.join(
+                artifact_dir,
+                DATA_TRANSFORMATION_ARTIFACT_DIR,
+                data_transformation_config_file_info[DATA_TRANSFORMATION_TENSOR_STORE_DIR]
             )
             
             data_transformation_config = DataTransformationConfig(
-                transformed_train_data_dir = transformed_train_data_dir,
-                transformed_test_data_dir = transformed_test_data_dir,
-                transformed_val_data_dir = transformed_val_data_dir
+                transformed_data_dirs = transformed_data_dirs,
+                tensor_store_dir = tensor_store_dir,
+                preprocessing_max_workers = data_transformation_config_file_info.get(DATA_TRANSFORMATION_PREPROCESSING_MAX_WORKERS),
+                augmentation_seed = data_transformation_config_file_info.get(DATA_TRANSFORMATION_AUGMENTATION_SEED),
+                audit_sample_count = int(data_transformation_config_file_info.get(DATA_TRANSFORMATION_AUDIT_SAMPLE_COUNT) or 0)
             )
             
             return data_transformation_config
@@ -231,6 +343,214 @@ class Configuration:
         except Exception as e:
             raise CustomException(sys,e) from e
     
+    def get_model_trainer_config(self) -> ModelTrainerConfig:
+        
+        """
+        Returns a named tuple containg file paths and hyperparameters required for model training.
+        
+        Parameters: None
+
+        Returns: 
+            model_trainer_config (named tuple) -> It contains
+                
+                1. Trained_Model_File_Path (Path to the trained model of this run)
+                2. Checkpoint_Dir (Path to the checkpoints of an unfinished training, shared by all runs)
+                3. Training_Report_File_Path (Path to the per epoch metrics, throughput and step times)
+                4. Epochs, Learning_Rate, Pretrained_Weights and Is_Base_Trainable
+        """
+        
+        try:
+            
+            # Path to artifact directory
+            artifact_dir = self.training_pipeline_config.artifact_dir
+            
+            # Path to model trainer in artifact directory
+            model_trainer_artifact_dir = os.path.join(
+                artifact_dir,
+                MODEL_TRAINER_ARTIFACT_DIR,
+                self.time_stamp
+            )
+            
+            model_trainer_config_file_info = self.config_file_info[MODEL_TRAINER_CONFIG_KEY]
+            
+            # Path to model.keras in trained_model//model_trainer//artifact
+            trained_model_dir = os.path.join(
+                model_trainer_artifact_dir,
+                model_trainer_config_file_info[MODEL_TRAINER_TRAINED_MODEL_DIR]
+            )
+            
+            trained_model_file_path = os.path.join(
+                trained_model_dir,
+                model_trainer_config_file_info[MODEL_TRAINER_MODEL_FILE_NAME]
+            )
+            
+            # Path to training_report.json in trained_model//model_trainer//artifact
+            training_report_file_path = os.path.join(
+                trained_model_dir,
+                MODEL_TRAINER_REPORT_FILE_NAME
+            )
+            
+            # Path to checkpoints in model_trainer//artifact, shared by all time stamps so an interrupted training resumes,
+            # every training keeps its checkpoints in the subdirectory of its stage fingerprint
+            checkpoint_dir = os.path.join(
+                artifact_dir,
+                MODEL_TRAINER_ARTIFACT_DIR,
+                model_trainer_config_file_info[MODEL_TRAINER_CHECKPOINT_DIR]
+            )
+            
+            model_trainer_config = ModelTrainerConfig(
+                trained_model_file_path = trained_model_file_path,
+                checkpoint_dir = checkpoint_dir,
+                training_report_file_path = training_report_file_path,
+                epochs = int(model_trainer_config_file_info[MODEL_TRAINER_EPOCHS]),
+                learning_rate = float(model_trainer_config_file_info[MODEL_TRAINER_LEARNING_RATE]),
+                pretrained_weights = model_trainer_config_file_info.get(MODEL_TRAINER_PRETRAINED_WEIGHTS),
+                is_base_trainable = bool(model_trainer_config_file_info.get(MODEL_TRAINER_IS_BASE_TRAINABLE, False))
+            )
+            
+            logging.info(f" Model Trainer Config : [{model_trainer_config}]")
+            
+            return model_trainer_config
+            
+        except Exception as e:
+            raise CustomException(e,sys) from e
+    
+    def get_model_exporter_config(self) -> ModelExporterConfig:
+        
+        """
+        Returns a named tuple containg file paths and settings required to export the trained model.
+        
+        Parameters: None
+
+        Returns: 
+            model_exporter_config (named tuple) -> It contains
+                
+                1. Exported_Model_File_Path (Path to the exported tflite model of this run)
+                2. Export_Report_File_Path (Path to the accuracy, size and latency comparison with the trained model)
+                3. Is_Quantized (Whether weights and activations are quantized to int8)
+                4. Calibration_Sample_Count (Validation images used to calibrate the quantization)
+                5. Evaluation_Sample_Count (Test images used to compare the exported and trained models)
+        """
+        
+        try:
+            
+            # Path to model exporter in artifact directory
+            model_exporter_artifact_dir = os.path.join(
+                self.training_pipeline_config.artifact_dir,
+                MODEL_EXPORTER_ARTIFACT_DIR,
+                self.time_stamp
+            )
+            
+            model_exporter_config_file_info = self.config_file_info[MODEL_EXPORTER_CONFIG_KEY]
+            
+            # Path to model.tflite in exported_model//model_exporter//artifact
+            exported_model_dir = os.path.join(
+                model_exporter_artifact_dir,
+                model_exporter_config_file_info[MODEL_EXPORTER_EXPORTED_MODEL_DIR]
+            )
+            
+            exported_model_file_path = os.path.join(
+                exported_model_dir,
+                model_exporter_config_file_info[MODEL_EXPORTER_EXPORTED_MODEL_FILE_NAME]
+            )
+            
+            # Path to export_report.json in exported_model//model_exporter//artifact
+            export_report_file_path = os.path.join(
+                exported_model_dir,
+                MODEL_EXPORTER_REPORT_FILE_NAME
+            )
+            
+            model_exporter_config = ModelExporterConfig(
+                exported_model_file_path = exported_model_file_path,
+                export_report_file_path = export_report_file_path,
+                is_quantized = bool(model_exporter_config_file_info.get(MODEL_EXPORTER_IS_QUANTIZED, False)),
+                calibration_sample_count = int(model_exporter_config_file_info[MODEL_EXPORTER_CALIBRATION_SAMPLE_COUNT]),
+                evaluation_sample_count = int(model_exporter_config_file_info[MODEL_EXPORTER_EVALUATION_SAMPLE_COUNT])
+            )
+            
+            logging.info(f" Model Exporter Config : [{model_exporter_config}]")
+            
+            return model_exporter_config
+            
+        except Exception as e:
+            raise CustomException(e,sys) from e
+    
+    def get_model_serving_config(self) -> ModelServingConfig:
+        
+        """
+        Returns a named tuple containg the model file path and batching limits of the prediction service.
+        
+        Parameters: None
+
+        Returns: 
+            model_serving_config (named tuple) -> It contains
+                
+                1. Model_File_Path (Path to the served model, the latest trained or exported model of model_format when not configured)
+                2. Max_Batch_Size (Largest number of images of one forward pass)
+                3. Max_Wait_Ms (Longest time a request waits for others to join its batch)
+                4. Max_Queue_Size (Requests queued for inference before new ones are rejected, async server)
+                5. Request_Timeout_Ms (Longest time a request waits for its predictions, async server)
+                6. Decode_Max_Workers and Is_Decoded_In_Processes (Image decoding pool of the async server)
+                7. Prediction_Cache_Max_Entries and Prediction_Cache_Ttl_Seconds (In-process prediction cache)
+                8. Prediction_Cache_Sqlite_File_Path (Prediction cache shared by the workers, None to disable)
+        """
+        
+        try:
+            
+            model_serving_config_file_info = self.config_file_info[MODEL_SERVING_CONFIG_KEY]
+            model_file_path = model_serving_config_file_info.get(MODEL_SERVING_MODEL_FILE_PATH)
+            
+            model_format = model_serving_config_file_info.get(MODEL_SERVING_MODEL_FORMAT, KERAS_MODEL_FORMAT)
+            
+            if model_file_path is None:
+                
+                # Latest model.keras in trained_model//<time stamp>//model_trainer//artifact,
+                # or latest model.tflite in exported_model//<time stamp>//model_exporter//artifact
+                if model_format == TFLITE_MODEL_FORMAT:
+                    stage_config_file_info = self.config_file_info[MODEL_EXPORTER_CONFIG_KEY]
+                    stage_artifact_dir = MODEL_EXPORTER_ARTIFACT_DIR
+                    model_dir = stage_config_file_info[MODEL_EXPORTER_EXPORTED_MODEL_DIR]
+                    model_file_name = stage_config_file_info[MODEL_EXPORTER_EXPORTED_MODEL_FILE_NAME]
+                else:
+                    stage_config_file_info = self.config_file_info[MODEL_TRAINER_CONFIG_KEY]
+                    stage_artifact_dir = MODEL_TRAINER_ARTIFACT_DIR
+                    model_dir = stage_config_file_info[MODEL_TRAINER_TRAINED_MODEL_DIR]
+                    model_file_name = stage_config_file_info[MODEL_TRAINER_MODEL_FILE_NAME]
+                
+                model_file_paths = sorted(glob.glob(os.path.join(
+                    self.training_pipeline_config.artifact_dir,
+                    stage_artifact_dir,
+                    '*',
+                    model_dir,
+                    model_file_name
+                )))
+                model_file_path = model_file_paths[-1] if model_file_paths else None
+            
+            # A relative SQLite path is shared by every worker started from the project root
+            prediction_cache_sqlite_file_path = model_serving_config_file_info.get(MODEL_SERVING_PREDICTION_CACHE_SQLITE_FILE_PATH)
+            if prediction_cache_sqlite_file_path is not None:
+                prediction_cache_sqlite_file_path = os.path.join(ROOT_DIR, prediction_cache_sqlite_file_path)
+            
+            model_serving_config = ModelServingConfig(
+                model_file_path = model_file_path,
+                max_batch_size = int(model_serving_config_file_info.get(MODEL_SERVING_MAX_BATCH_SIZE, SERVING_MAX_BATCH_SIZE)),
+                max_wait_ms = float(model_serving_config_file_info.get(MODEL_SERVING_MAX_WAIT_MS, SERVING_MAX_WAIT_MS)),
+                max_queue_size = int(model_serving_config_file_info.get(MODEL_SERVING_MAX_QUEUE_SIZE, SERVING_MAX_QUEUE_SIZE)),
+                request_timeout_ms = float(model_serving_config_file_info.get(MODEL_SERVING_REQUEST_TIMEOUT_MS, SERVING_REQUEST_TIMEOUT_MS)),
+                decode_max_workers = model_serving_config_file_info.get(MODEL_SERVING_DECODE_MAX_WORKERS),
+                is_decoded_in_processes = bool(model_serving_config_file_info.get(MODEL_SERVING_IS_DECODED_IN_PROCESSES, False)),
+                prediction_cache_max_entries = int(model_serving_config_file_info.get(MODEL_SERVING_PREDICTION_CACHE_MAX_ENTRIES, PREDICTION_CACHE_MAX_ENTRIES)),
+                prediction_cache_ttl_seconds = float(model_serving_config_file_info.get(MODEL_SERVING_PREDICTION_CACHE_TTL_SECONDS, PREDICTION_CACHE_TTL_SECONDS)),
+                prediction_cache_sqlite_file_path = prediction_cache_sqlite_file_path
+            )
+            
+            logging.info(f" Model Serving Config : [{model_serving_config}]")
+            
+            return model_serving_config
+            
+        except Exception as e:
+            raise CustomException(e,sys) from e
+    
     def get_training_pipeline_config(self) -> TrainingPipelineConfig:
         
         """
@@ -239,7 +559,10 @@ class Configuration:
             Parameters: None
 
             Returns:
-                training_pipeline_config (named tuple): Contains complete path of artifact directory.
+                training_pipeline_config (named tuple): Contains complete path of artifact directory, path of the
+                                                        stage cache, the stages that always rerun, the number of
+                                                        stages run at once, whether training waits for validation
+                                                        and the profiling of the run.
         """
         
         
@@ -248,7 +571,30 @@ class Configuration:
             artifact_dir = os.path.join(ROOT_DIR, training_pipeline_config[TRAINING_PIPELINE_NAME],
             training_pipeline_config[TRAINING_PIPELINE_ARTIFACT_DIR]) 
             
-            training_pipeline_config = TrainingPipelineConfig(artifact_dir=artifact_dir)
+            # Artifacts of completed stages, shared by all time stamps so unchanged stages are skipped
+            stage_cache_dir = os.path.join(artifact_dir, training_pipeline_config[TRAINING_PIPELINE_STAGE_CACHE_DIR])
+            
+            # Run profile, stage records and deep profiles of this run
+            profile_dir = os.path.join(artifact_dir, training_pipeline_config.get(TRAINING_PIPELINE_PROFILE_DIR, TRAINING_PIPELINE_PROFILE_DIR),
+                                       self.time_stamp)
+            
+            deep_profiler = training_pipeline_config.get(TRAINING_PIPELINE_DEEP_PROFILER, DEEP_PROFILER_CPROFILE)
+            if deep_profiler not in (DEEP_PROFILER_CPROFILE, DEEP_PROFILER_PYINSTRUMENT):
+                raise Exception(f"Invalid deep profiler : [{deep_profiler}]")
+            
+            training_pipeline_config = TrainingPipelineConfig(
+                artifact_dir=artifact_dir,
+                stage_cache_dir=stage_cache_dir,
+                is_stage_cache_enabled=bool(training_pipeline_config.get(TRAINING_PIPELINE_IS_STAGE_CACHE_ENABLED, True)),
+                force_rerun_stages=list(training_pipeline_config.get(TRAINING_PIPELINE_FORCE_RERUN_STAGES) or []),
+                max_parallel_stages=int(training_pipeline_config.get(TRAINING_PIPELINE_MAX_PARALLEL_STAGES, 1)),
+                is_validation_required=bool(training_pipeline_config.get(TRAINING_PIPELINE_IS_VALIDATION_REQUIRED, True)),
+                profile_dir=profile_dir,
+                is_profiled=bool(training_pipeline_config.get(TRAINING_PIPELINE_IS_PROFILED, False)),
+                is_chrome_trace_exported=bool(training_pipeline_config.get(TRAINING_PIPELINE_IS_CHROME_TRACE_EXPORTED, False)),
+                deep_profiled_stages=list(training_pipeline_config.get(TRAINING_PIPELINE_DEEP_PROFILED_STAGES) or []),
+                deep_profiler=deep_profiler
+            )
             
             logging.info(f" Training Pipeline Config : [{training_pipeline_config}]")
             
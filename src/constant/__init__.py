@@ -23,41 +23,189 @@ LOG_DIR_NAME = "logs"
 TRAINING_PIPELINE_CONFIG_KEY = "training_pipeline_config"
 TRAINING_PIPELINE_NAME = "pipeline_name"
 TRAINING_PIPELINE_ARTIFACT_DIR = "artifact_dir"
+TRAINING_PIPELINE_STAGE_CACHE_DIR = "stage_cache_dir"
+TRAINING_PIPELINE_IS_STAGE_CACHE_ENABLED = "is_stage_cache_enabled"
+TRAINING_PIPELINE_FORCE_RERUN_STAGES = "force_rerun_stages"
+TRAINING_PIPELINE_MAX_PARALLEL_STAGES = "max_parallel_stages"
+TRAINING_PIPELINE_IS_VALIDATION_REQUIRED = "is_validation_required"
+TRAINING_PIPELINE_PROFILE_DIR = "profile_dir"
+TRAINING_PIPELINE_IS_PROFILED = "is_profiled"
+TRAINING_PIPELINE_IS_CHROME_TRACE_EXPORTED = "is_chrome_trace_exported"
+TRAINING_PIPELINE_DEEP_PROFILED_STAGES = "deep_profiled_stages"
+TRAINING_PIPELINE_DEEP_PROFILER = "deep_profiler"
+
+# Stage Cache Constants
+STAGE_CACHE_CODE_PACKAGE = "src"
+STAGE_CACHE_TIME_STAMP_PLACEHOLDER = "<time_stamp>"
+STAGE_CACHE_FINGERPRINT_LENGTH = 16
+STAGE_CACHE_FILE_EXTENSION = ".json"
+STAGE_CACHE_ARTIFACT_KEY = "artifact"
+STAGE_CACHE_FILE_FIELD_SUFFIX = "_file_path"
+STAGE_CACHE_FILES_FIELD_SUFFIX = "_file_paths"
+STAGE_CACHE_READ_CHUNK_SIZE = 1024 * 1024
+STAGE_CACHE_SCHEMA_FILE_INPUT = "schema_file"
+STAGE_CACHE_DATA_SOURCE_INPUT = "data_source"
+
+# Profiler Constants : spans of every process are merged into run_profile.json and, optionally, a chrome trace
+PROFILE_RUN_FILE_NAME = "run_profile.json"
+PROFILE_CHROME_TRACE_FILE_NAME = "chrome_trace.json"
+PROFILE_STAGE_FILE_PREFIX = "stage_"
+PROFILE_SPANS_FILE_PREFIX = "spans_"
+PROFILE_STAGE_SPAN_PREFIX = "stage:"
+PROFILE_RSS_SAMPLE_INTERVAL = 0.05
+PROFILE_MAX_SPANS = 100000
+DEEP_PROFILER_CPROFILE = "cprofile"
+DEEP_PROFILER_PYINSTRUMENT = "pyinstrument"
+CPROFILE_FILE_EXTENSION = ".prof"
+PYINSTRUMENT_FILE_EXTENSION = ".html"
 
 # Data Ingestion Config Contants
 
 DATA_INGESTION_CONFIG_KEY = "data_ingestion_config"
 DATA_INGESTION_ARTIFACT_DIR = "data_ingestion"
 DATA_INGESTION_DOWNLOAD_URL = "data_source_url"
+DATA_INGESTION_DOWNLOAD_SHA256 = "data_source_sha256"
+DATA_INGESTION_CACHE_DIR = "data_cache_dir"
 DATA_INGESTION_LOCAL_ZIP_DATA_DIR = "local_zip_data_dir"
 DATA_INGESTION_LOCAL_RAW_DATA_DIR = "local_raw_data_dir"
 DATA_INGESTION_LOCAL_INGESTED_CSV_DATA_DIR = "local_ingested_csv_data_dir"
-DATA_INGESTION_LOCAL_TRAIN_CSV_DATA_DIR = "local_train_csv_data_dir"
-DATA_INGESTION_LOCAL_TEST_CSV_DATA_DIR = "local_test_csv_data_dir"
-DATA_INGESTION_LOCAL_VAL_CSV_DATA_DIR = "local_val_csv_data_dir"
+DATA_INGESTION_SPLITS = "splits"
+DATA_INGESTION_MODE = "ingestion_mode"
+DATA_INGESTION_MANIFEST_STATE_DIR = "manifest_state_dir"
+DATA_INGESTION_MANIFEST_FORMAT = "manifest_format"
+DATA_INGESTION_EXPORT_CSV_MANIFEST = "export_csv_manifest"
+DATA_INGESTION_EXPORT_RECORD_SHARDS = "export_record_shards"
+DATA_INGESTION_RECORD_SHARDS_DIR = "record_shards_dir"
+DATA_INGESTION_RECORD_SHARD_SIZE_MB = "record_shard_size_mb"
 
 # Data Ingestion Component Constants
 UNZIPED_DATA_FILE_NAME = "chest_xray"
 LABEL_IMAGE_PATH = 'Label_Image_Path'
 IMAGE_LABEL = 'Image_Label'
+SPLIT_NAME = 'Split'
+FILE_SIZE = 'File_Size'
+FILE_MTIME = 'File_Mtime'
+RELATIVE_IMAGE_PATH = 'Relative_Image_Path'
+CONTENT_HASH = 'Content_Hash'
+CHANGE_TYPE = 'Change_Type'
+CHANGE_TYPE_ADDED = 'added'
+CHANGE_TYPE_CHANGED = 'changed'
+CHANGE_TYPE_REMOVED = 'removed'
+MANIFEST_STATE_FILE_NAME = 'manifest_state.csv'
+MANIFEST_DIFF_FILE_NAME = 'manifest_diff.csv'
+PATH_PREFIX = 'Path_Prefix'
+FILE_NAME = 'File_Name'
+MANIFEST_FORMAT_ARROW = 'arrow'
+MANIFEST_FORMAT_CSV = 'csv'
+MANIFEST_FILE_NAME = 'manifest.arrow'
+MANIFEST_STATE_COLUMNS = [RELATIVE_IMAGE_PATH, SPLIT_NAME, IMAGE_LABEL, LABEL_IMAGE_PATH, FILE_SIZE, FILE_MTIME, CONTENT_HASH]
 TRAIN_DATA = "train"
 TEST_DATA = "test"
 VAL_DATA = "val"
 CSV_EXTENSION = '.csv'
 
+# Splits are independent work items, train is fitted, val validates the fit and test evaluates it,
+# any further split (e.g. an extra holdout or a fold) is evaluated like test
+DEFAULT_SPLITS = [TRAIN_DATA, TEST_DATA, VAL_DATA]
+REQUIRED_SPLITS = [TRAIN_DATA, TEST_DATA, VAL_DATA]
+SPLIT_CSV_DATA_DIR_SUFFIX = "_csv_data"
+
+# Ingestion modes : "extract" unzips into raw_data, "stream" reads images straight out of the zip
+INGESTION_MODE_EXTRACT = "extract"
+INGESTION_MODE_STREAM = "stream"
+
+# Separates the zip archive path from the member name in streamed image paths (archive.zip!chest_xray/train/..)
+ZIP_MEMBER_SEPARATOR = "!"
+ZIP_METADATA_DIR_NAME = "__MACOSX"
+ZIP_EXTENSION = '.zip'
+
+# Record shards : images of a split packed into .bin shards, a record is addressed as shard.bin@offset:length
+RECORD_SEPARATOR = "@"
+RECORD_LENGTH_SEPARATOR = ":"
+RECORD_SHARD_EXTENSION = '.bin'
+RECORD_SHARD_FILE_NAME = "{}-{:05d}.bin"
+RECORD_SHARD_INDEX_SUFFIX = '.index'
+RECORD_SHARD_STAGING_SUFFIX = '.staging'
+RECORD_SHARD_SIZE_MB = 256
+RECORD_SHARD_READ_BATCH_SIZE = 256
+RECORD_ID = 'Record_Id'
+RECORD_OFFSET = 'Record_Offset'
+RECORD_LENGTH = 'Record_Length'
+RECORD_SHARD_INDEX_COLUMNS = [RECORD_ID, RELATIVE_IMAGE_PATH, IMAGE_LABEL, CONTENT_HASH, RECORD_OFFSET, RECORD_LENGTH]
+# Open shard descriptors kept per process, least recently used ones are closed
+RECORD_SHARD_MAX_OPEN_FILES = 256
+
+# Download Manager Constants
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+DOWNLOAD_MAX_RETRIES = 5
+DOWNLOAD_TIMEOUT = 60
+DOWNLOAD_URL_KEY_LENGTH = 16
+DOWNLOAD_PART_FILE_NAME = "download.part"
+DOWNLOAD_LOCK_FILE_NAME = ".lock"
+DOWNLOAD_CACHE_INDEX_FILE_NAME = "cache_index.json"
+DOWNLOAD_URL_KEY = "url"
+DOWNLOAD_SHA256_KEY = "sha256"
+DOWNLOAD_SIZE_KEY = "size"
+DOWNLOAD_ETAG_KEY = "etag"
+DOWNLOAD_LAST_MODIFIED_KEY = "last_modified"
+# Validators of the response a partial download started from, sent back as If-Range on resume
+DOWNLOAD_PART_INFO_FILE_NAME = "download.part.json"
+
 # Data Validation Config Constants
 DATA_VALIDATION_CONFIG_KEY = "data_validation_config"
 DATA_VALIDATION_ARTIFACT_DIR = "data_validation"
 DATA_VALIDATION_SCHEMA_DIR_NAME = "schema_file_dir"
 DATA_VALIDATION_SCHEMA_FILE_NAME = "schema_file_name"
 DATA_VALIDATION_REPORTS = 'local_validation_reports_dir'
+DATA_VALIDATION_IMAGE_STATS_CACHE_DIR = 'image_stats_cache_dir'
+DATA_VALIDATION_IMAGE_VALIDATION_MAX_WORKERS = 'image_validation_max_workers'
 
 # Data Validation Component Constants
 DATA_VALIDATION_JSON_REPORT_FILE_NAME = "data_drift_report"
+DATA_VALIDATION_TIMINGS_FILE_NAME = "validation_timings"
+DATA_VALIDATION_SCHEMA_REPORT_FILE_NAME = "schema_validation_report"
+DATA_VALIDATION_IMAGE_STATS_FILE_NAME = "image_stats"
+DATA_VALIDATION_IMAGE_STATS_CACHE_FILE_NAME = "image_stats_cache"
+
+# Image Validation Constants
+ARROW_EXTENSION = '.arrow'
+IMAGE_VALIDATION_CHUNKS_PER_WORKER = 4
+IMAGE_VALIDATION_MAX_REPORTED_ERRORS = 20
+IMAGE_FORMAT = 'Image_Format'
+IMAGE_WIDTH = 'Image_Width'
+IMAGE_HEIGHT = 'Image_Height'
+IMAGE_CHANNELS = 'Image_Channels'
+IMAGE_BIT_DEPTH = 'Image_Bit_Depth'
+IS_CORRUPT = 'Is_Corrupt'
+IMAGE_ERROR = 'Image_Error'
+IS_DUPLICATE = 'Is_Duplicate'
+IMAGE_MEAN_INTENSITY = 'Image_Mean_Intensity'
+IMAGE_STD_INTENSITY = 'Image_Std_Intensity'
+IMAGE_ASPECT_RATIO = 'Image_Aspect_Ratio'
+INTENSITY_HISTOGRAM_BINS = 32
+INTENSITY_HISTOGRAM_COLUMNS = [f"Intensity_Bin_{bin_index:02d}" for bin_index in range(INTENSITY_HISTOGRAM_BINS)]
+IMAGE_STATS_COLUMNS = [LABEL_IMAGE_PATH, CONTENT_HASH, IMAGE_FORMAT, IMAGE_WIDTH, IMAGE_HEIGHT,
+                       IMAGE_CHANNELS, IMAGE_BIT_DEPTH, IMAGE_MEAN_INTENSITY, IMAGE_STD_INTENSITY,
+                       IS_CORRUPT, IMAGE_ERROR] + INTENSITY_HISTOGRAM_COLUMNS
 
-TRAIN_REPORT = "train_report"
-TEST_REPORT = "test_report"
-VAL_REPORT = "val_report"
+# Data Drift Constants
+DRIFT_FEATURE_COLUMNS = [IMAGE_MEAN_INTENSITY, IMAGE_STD_INTENSITY, IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_ASPECT_RATIO]
+DRIFT_P_VALUE_THRESHOLD = 0.05
+DRIFT_PSI_THRESHOLD = 0.2
+DRIFT_KS_SERIES_TERMS = 100
+DRIFT_HISTOGRAM_EPSILON = 1e-6
+DRIFT_REFERENCE_KEY = "reference"
+DRIFT_SPLIT_SUMMARIES_KEY = "split_summaries"
+DRIFT_COMPARISONS_KEY = "comparisons"
+DRIFT_FEATURES_KEY = "features"
+DRIFT_HISTOGRAM_KEY = "intensity_histogram"
+DRIFT_DETECTED_KEY = "drift_detected"
+VALIDATION_CHECK_TIMINGS_KEY = "check_timings"
+VALIDATION_DATASET_LOADS_KEY = "dataset_loads"
+DATASET_LOAD_COUNT_KEY = "load_count"
+DATASET_LOAD_TIME_KEY = "load_time"
+
+SPLIT_REPORT_SUFFIX = "_report"
 
 TEXT_EXTENTION = '.txt'
 JSON_EXTENTION = '.json'
@@ -68,15 +216,74 @@ SCHEMA_DATA_COLUMN_DATATYPES = 'column_datatypes'
 SCHEMA_DATA_LABEL_IMAGE_PATH = 'Label_Image_Path'
 SCHEMA_DATA_IMAGE_LABEL = 'Image_Label'
 SCHEMA_DATA_DOMIAN_VALUES = 'domain_value'
+SCHEMA_DATA_TARGET_COLUMN = 'target_column'
+
+SCHEMA_RESULT_IS_VALID = 'is_valid'
+SCHEMA_RESULT_COLUMN_ERRORS = 'column_errors'
+SCHEMA_RESULT_COLUMN_VIOLATION_COUNTS = 'column_violation_counts'
+SCHEMA_RESULT_ROW_VIOLATION_COUNTS = 'row_violation_counts'
+SCHEMA_RESULT_LABEL_COUNTS = 'label_counts'
+SCHEMA_RESULT_MISSING_DOMAIN_VALUES = 'missing_domain_values'
+SCHEMA_RESULT_VIOLATING_ROWS = 'violating_rows'
 
 # Data Transformation Config Constant
 
 DATA_TRANSFORMATION_CONFIG_KEY = "data_transformation_config"
 DATA_TRANSFORMATION_ARTIFACT_DIR = "data_transformation"
 DATA_TRANSFORMATION_DIR_NAME = "transformed_data_dir"
-DATA_TRANSFORMATION_TRAIN_DIR_NAME = "transformed_train_data_dir"
-DATA_TRANSFORMATION_TEST_DIR_NAME = "transformed_test_data_dir"
-DATA_TRANSFORMATION_VAL_DIR_NAME = "transformed_val_data_dir"
+DATA_TRANSFORMATION_TENSOR_STORE_DIR = "tensor_store_dir"
+DATA_TRANSFORMATION_PREPROCESSING_MAX_WORKERS = "preprocessing_max_workers"
+DATA_TRANSFORMATION_AUGMENTATION_SEED = "augmentation_seed"
+DATA_TRANSFORMATION_AUDIT_SAMPLE_COUNT = "audit_sample_count"
+
+# Model Trainer Config Constant
+
+MODEL_TRAINER_CONFIG_KEY = "model_trainer_config"
+MODEL_TRAINER_ARTIFACT_DIR = "model_trainer"
+MODEL_TRAINER_TRAINED_MODEL_DIR = "trained_model_dir"
+MODEL_TRAINER_MODEL_FILE_NAME = "model_file_name"
+MODEL_TRAINER_CHECKPOINT_DIR = "checkpoint_dir"
+MODEL_TRAINER_EPOCHS = "epochs"
+MODEL_TRAINER_LEARNING_RATE = "learning_rate"
+MODEL_TRAINER_PRETRAINED_WEIGHTS = "pretrained_weights"
+MODEL_TRAINER_IS_BASE_TRAINABLE = "is_base_trainable"
+MODEL_TRAINER_REPORT_FILE_NAME = "training_report.json"
+
+# Model Exporter Config Constant
+
+MODEL_EXPORTER_CONFIG_KEY = "model_exporter_config"
+MODEL_EXPORTER_ARTIFACT_DIR = "model_exporter"
+MODEL_EXPORTER_EXPORTED_MODEL_DIR = "exported_model_dir"
+MODEL_EXPORTER_EXPORTED_MODEL_FILE_NAME = "exported_model_file_name"
+MODEL_EXPORTER_IS_QUANTIZED = "is_quantized"
+MODEL_EXPORTER_CALIBRATION_SAMPLE_COUNT = "calibration_sample_count"
+MODEL_EXPORTER_EVALUATION_SAMPLE_COUNT = "evaluation_sample_count"
+MODEL_EXPORTER_REPORT_FILE_NAME = "export_report.json"
+
+# Model Serving Config Constant
+
+MODEL_SERVING_CONFIG_KEY = "model_serving_config"
+MODEL_SERVING_MODEL_FILE_PATH = "model_file_path"
+MODEL_SERVING_MODEL_FORMAT = "model_format"
+MODEL_SERVING_MAX_BATCH_SIZE = "max_batch_size"
+MODEL_SERVING_MAX_WAIT_MS = "max_wait_ms"
+MODEL_SERVING_MAX_QUEUE_SIZE = "max_queue_size"
+MODEL_SERVING_REQUEST_TIMEOUT_MS = "request_timeout_ms"
+MODEL_SERVING_DECODE_MAX_WORKERS = "decode_max_workers"
+MODEL_SERVING_IS_DECODED_IN_PROCESSES = "is_decoded_in_processes"
+MODEL_SERVING_PREDICTION_CACHE_MAX_ENTRIES = "prediction_cache_max_entries"
+MODEL_SERVING_PREDICTION_CACHE_TTL_SECONDS = "prediction_cache_ttl_seconds"
+MODEL_SERVING_PREDICTION_CACHE_SQLITE_FILE_PATH = "prediction_cache_sqlite_file_path"
+
+# Tensor Store Constants
+TENSOR_STORE_SHARD_SIZE = 1024
+TENSOR_STORE_PARAMS_KEY_LENGTH = 16
+TENSOR_STORE_INDEX_FILE_NAME = "index"
+TENSOR_STORE_PARAMS_FILE_NAME = "params.json"
+TENSOR_STORE_LOCK_FILE_NAME = ".lock"
+TENSOR_STORE_SHARD_FILE_NAME = "shard_{:05d}.npy"
+SHARD_ID = 'Shard_Id'
+SHARD_OFFSET = 'Shard_Offset'
 
 # Data Transformation Component Constants
 
@@ -85,12 +292,54 @@ BATCH_SIZE = 64
 IMAGE_RESCALE = 1./255
 INTERPOLATION = 'bilinear'
 CLASS_MODE = "binary"
+IMAGE_COLOR_CHANNELS = 3
+SHUFFLE_BUFFER_SIZE = 1024
+EVAL_BATCH_SIZE = 256
 
-LABELS = ['NORMAL','PNEUMONIA']
+# Augmentation Constants
+ROTATION_RANGE = 5
+HORIZONTAL_FLIP = True
+WIDTH_SHIFT_RANGE = 0.1
+HEIGHT_SHIFT_RANGE = 0.1
+SHEAR_RANGE = 0.1
+ZOOM_RANGE = 0.1
+AUGMENTATION_INTERPOLATION = "BILINEAR"
+AUGMENTATION_FILL_MODE = "NEAREST"
+AUGMENTATION_AUDIT_FILE_PREFIX = "aug"
 
+LABELS = ['NORMAL','PNEUMONIA']
 
+# Model Trainer Component Constants
 
+CHECKPOINT_FILE_NAME = "checkpoint_{epoch:03d}.keras"
+CHECKPOINT_FILE_PATTERN = "checkpoint_*.keras"
+CHECKPOINTS_TO_KEEP = 3
+REDUCE_LR_FACTOR = 0.2
+REDUCE_LR_PATIENCE = 2
+REDUCE_LR_MIN_LR = 1e-6
+REDUCE_LR_STATE_FILE_NAME = "reduce_lr_state.json"
+STEP_TIME_PERCENTILES = [50, 90, 99]
 
+# Model Serving Constants
 
+SERVING_MAX_BATCH_SIZE = 32
+SERVING_MAX_WAIT_MS = 5
+PREDICTION_THRESHOLD = 0.5
+SERVING_MAX_QUEUE_SIZE = 256
+SERVING_REQUEST_TIMEOUT_MS = 10000
+SERVING_PORT = 8080
+MODEL_VERSION_LENGTH = 16
+KERAS_MODEL_FORMAT = "keras"
+TFLITE_MODEL_FORMAT = "tflite"
+TFLITE_MODEL_EXTENSION = ".tflite"
 
+# Model Exporter Component Constants
+EXPORT_SAMPLE_SEED = 42
+EXPORT_LATENCY_PERCENTILES = [50, 90, 99]
 
+# Prediction Cache Constants
+PREDICTION_CACHE_MAX_ENTRIES = 10000
+PREDICTION_CACHE_TTL_SECONDS = 3600
+PREDICTION_CACHE_SQLITE_TIMEOUT = 30
+PREDICTION_CACHE_PRUNE_INTERVAL = 1000
+PREDICTION_CACHE_MAX_WORKERS = 2
@@ -2,12 +2,13 @@ from collections import namedtuple
 
 DataIngestionArtifact = namedtuple("DataIngestionArtifact",[
     
-    "raw_data_train_file_path",
-    "raw_data_test_file_path",
-    "raw_data_val_file_path",
-    "ingested_data_csv_train_file_path",
-    "ingested_data_csv_test_file_path",
-    "ingested_data_csv_val_file_path",
+    "splits",
+    "raw_data_file_paths",
+    "ingested_data_csv_file_paths",
+    "manifest_state_file_path",
+    "manifest_diff_file_path",
+    "ingested_data_manifest_file_path",
+    "ingested_data_record_shards_dir",
     "is_ingested",
     "message"
 ])
@@ -17,19 +18,39 @@ DataValidationArtifact = namedtuple("DataValidationArtifact",[
     
     "schema_file_path",
     "data_validation_reports_file_path",
+    "image_stats_file_path",
+    "is_data_drift_found",
     "is_validated",
     "message"
 ])
 
 DataTransformationArtifact = namedtuple('DataTransformationArtifact',[
     
-    "transformed_train_data",
-    "transformed_test_data",
-    "transformed_val_data",
-    "transformed_train_data_dir",
-    "transformed_test_data_dir",
-    "transformed_val_data_dir",
+    "transformed_datasets",
+    "transformed_data_dirs",
+    "image_counts",
     "is_transformed",
     "message"
     
-])
\ No newline at end of file
+])
+
+
+ModelTrainerArtifact = namedtuple("ModelTrainerArtifact",[
+    
+    "trained_model_file_path",
+    "training_report_file_path",
+    "val_metrics",
+    "test_metrics",
+    "is_trained",
+    "message"
+])
+
+
+ModelExporterArtifact = namedtuple("ModelExporterArtifact",[
+    
+    "exported_model_file_path",
+    "export_report_file_path",
+    "accuracy_delta",
+    "is_exported",
+    "message"
+])
@@ -3,28 +3,82 @@ from collections import namedtuple
 DataIngestionConfig = namedtuple( "DataIngestionConfig",[
     
     "data_source_url",
+    "data_source_sha256",
+    "data_cache_dir",
     "local_zip_data_dir",
     "local_raw_data_dir",
     "local_ingested_csv_data_dir",
-    "local_train_csv_data_dir",
-    "local_test_csv_data_dir",
-    "local_val_csv_data_dir"
+    "splits",
+    "local_csv_data_dirs",
+    "ingestion_mode",
+    "manifest_state_file_path",
+    "manifest_diff_file_path",
+    "manifest_file_path",
+    "is_export_csv_manifest",
+    "record_shards_dir",
+    "record_shard_size"
 ])
 
 DataValidationConfig = namedtuple("DataValidationConfig",[
     
     "schema_file_path",
     "data_validation_reports_file_path",
+    "image_stats_file_path",
+    "image_stats_cache_file_path",
+    "image_validation_max_workers"
 ])
 
 DataTransformationConfig = namedtuple("DataTransformationConfig",[
     
-    "transformed_train_data_dir",
-    "transformed_test_data_dir",
-    "transformed_val_data_dir",
+    "transformed_data_dirs",
+    "tensor_store_dir",
+    "preprocessing_max_workers",
+    "augmentation_seed",
+    "audit_sample_count"
+])
+
+
+ModelTrainerConfig = namedtuple("ModelTrainerConfig",[
+    
+    "trained_model_file_path",
+    "checkpoint_dir",
+    "training_report_file_path",
+    "epochs",
+    "learning_rate",
+    "pretrained_weights",
+    "is_base_trainable"
+])
+
+
+ModelExporterConfig = namedtuple("ModelExporterConfig",[
+    
+    "exported_model_file_path",
+    "export_report_file_path",
+    "is_quantized",
+    "calibration_sample_count",
+    "evaluation_sample_count"
+])
+
+
+ModelServingConfig = namedtuple("ModelServingConfig",[
+    
+    "model_file_path",
+    "max_batch_size",
+    "max_wait_ms",
+    "max_queue_size",
+    "request_timeout_ms",
+    "decode_max_workers",
+    "is_decoded_in_processes",
+    "prediction_cache_max_entries",
+    "prediction_cache_ttl_seconds",
+    "prediction_cache_sqlite_file_path"
 ])
 
 
 
-TrainingPipelineConfig = namedtuple( "TrainingPipelineConfig",["artifact_dir"])
+TrainingPipelineConfig = namedtuple( "TrainingPipelineConfig",["artifact_dir", "stage_cache_dir", "is_stage_cache_enabled",
+                                                                "force_rerun_stages", "max_parallel_stages",
+                                                                "is_validation_required", "profile_dir", "is_profiled",
+                                                                "is_chrome_trace_exported", "deep_profiled_stages",
+                                                                "deep_profiler"])
 
@@ -19,6 +19,10 @@ class CustomException(Exception):
         error_message = f"Error occured in file [{file_name}] at line number [{line_number}] error message [{error_message}]"
         return error_message
 
+    def __reduce__(self):
+        # Rebuilt from the detailed message, so exceptions of worker processes reach the parent
+        return (CustomException.__new__, (CustomException,), {'error_message': self.error_message})
+
     def __str__(self):
         return self.error_message
 
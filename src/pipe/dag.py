@@ -0,0 +1,242 @@
+import sys
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from src.exception import CustomException
+from src.logger import logging
+
+
+DagStage = namedtuple("DagStage",[
+
+    "name",
+    "function",
+    "dependencies",
+    "is_in_process",
+    "cancelled_by",
+    "on_discarded"
+])
+
+
+class DagExecutor:
+
+    """
+    Runs pipeline stages as a small dependency graph. A stage starts as soon as all of its
+    dependencies succeeded, so independent stages run concurrently, at most max_parallel_stages
+    at a time. Each stage function gets the artifacts of its dependencies, in order.
+
+    Stages with is_in_process run on a spawned process pool and must be picklable, the others
+    run on threads of this process, e.g. stages whose artifacts hold tf.data datasets. A spawned
+    process imports the __main__ module again, so the caller has to guard its entry point.
+
+    When a stage fails, every stage depending on it, and every stage listing it in cancelled_by,
+    is cancelled: pending stages never start, and the artifacts of running and already completed
+    ones are discarded. Failures are handled before the successes completing with them, so the
+    outcome does not depend on which stage finished first.
+    """
+
+    def __init__(self, max_parallel_stages:int = 1):
+        try:
+            self.max_parallel_stages = max(1, max_parallel_stages)
+            self.stages: dict = {}
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def add_stage(self, name:str, function, dependencies:list = None, is_in_process:bool = False,
+                  cancelled_by:list = None, on_discarded = None) -> None:
+
+        """
+        Adds a stage to the graph, dependencies must be added first.
+
+            Parameters:
+                name (str), function (function): Called with the artifacts of the dependencies
+                dependencies (list): Stages whose artifacts the stage needs
+                is_in_process (bool): Run the stage on the process pool
+                cancelled_by (list): Stages whose failure cancels the stage without being dependencies
+                on_discarded (function): Called with the artifact of the stage when a cancellation discards it
+
+            Returns: None
+        """
+
+        try:
+            dependencies, cancelled_by = list(dependencies or []), list(cancelled_by or [])
+
+            for upstream in dependencies + cancelled_by:
+                if upstream not in self.stages:
+                    raise Exception(f"Stage [{name}] depends on [{upstream}], which is not added yet")
+
+            self.stages[name] = DagStage(name=name, function=function, dependencies=dependencies,
+                                         is_in_process=is_in_process, cancelled_by=cancelled_by,
+                                         on_discarded=on_discarded)
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_stages_to_cancel(self, failed_stage:str) -> set:
+
+        """
+        Returns every stage that must not complete once a stage failed, transitively.
+
+            Parameters: failed_stage (str)
+
+            Returns:
+                stages_to_cancel (set)
+        """
+
+        stages_to_cancel: set = set()
+        failed_stages = [failed_stage]
+
+        while failed_stages:
+            upstream = failed_stages.pop()
+            for stage in self.stages.values():
+                if stage.name not in stages_to_cancel and upstream in stage.dependencies + stage.cancelled_by:
+                    stages_to_cancel.add(stage.name)
+                    failed_stages.append(stage.name)
+
+        return stages_to_cancel
+
+    @staticmethod
+    def get_stage_error(name:str, error:Exception) -> Exception:
+
+        """
+        Returns the error of a failed stage. A broken process pool is not a failure of the stage
+        itself, it is reported with its usual causes instead.
+
+            Parameters: name (str), error (Exception)
+
+            Returns:
+                stage_error (Exception)
+        """
+
+        if not isinstance(error, BrokenProcessPool):
+            return error
+
+        stage_error = BrokenProcessPool(f"The process running stage [{name}] was terminated abruptly. Stages with is_in_process "
+                                        f"run in a spawned process that imports the __main__ module of the caller again, so a "
+                                        f"script running the pipeline must do so under if __name__ == '__main__'. The process "
+                                        f"may also have been killed, e.g. when the machine ran out of memory.")
+        stage_error.__cause__ = error
+        return stage_error
+
+    def discard_artifact(self, name:str, artifact) -> None:
+
+        """
+        Discards the artifact of a cancelled stage that completed anyway.
+
+            Parameters: name (str), artifact (namedtuple)
+
+            Returns: None
+        """
+
+        logging.info(f"Discarding the artifact of cancelled stage [{name}]")
+
+        on_discarded = self.stages[name].on_discarded
+        if on_discarded is not None:
+            try:
+                on_discarded(artifact)
+            except Exception as e:
+                # Never hides the failure that cancelled the stage
+                logging.info(f"Can not discard the artifact of [{name}] : [{e}]")
+
+    def run(self) -> dict:
+
+        """
+        Runs every stage of the graph and returns their artifacts.
+
+            Parameters: None
+
+            Returns:
+                artifacts (dict): stage name -> artifact
+
+            Raises:
+                CustomException: Of the first failed stage, once every other running stage finished
+        """
+
+        thread_executor = ThreadPoolExecutor(max_workers=self.max_parallel_stages, thread_name_prefix='stage')
+        process_executor = None
+
+        artifacts: dict = {}
+        failures: dict = {}
+        cancelled_stages: set = set()
+        pending_stages = list(self.stages)
+        running_stages: dict = {}
+
+        try:
+            while pending_stages or running_stages:
+
+                # Start every stage whose dependencies succeeded, within the parallel limit
+                for name in list(pending_stages):
+                    if len(running_stages) >= self.max_parallel_stages:
+                        break
+
+                    stage = self.stages[name]
+                    if not all(dependency in artifacts for dependency in stage.dependencies):
+                        continue
+
+                    pending_stages.remove(name)
+                    arguments = [artifacts[dependency] for dependency in stage.dependencies]
+
+                    if stage.is_in_process:
+                        if process_executor is None:
+                            # Spawned, so no lock held by a thread of this process is inherited
+                            process_executor = ProcessPoolExecutor(max_workers=self.max_parallel_stages,
+                                                                   mp_context=multiprocessing.get_context('spawn'))
+                        future = process_executor.submit(stage.function, *arguments)
+                    else:
+                        future = thread_executor.submit(stage.function, *arguments)
+
+                    logging.info(f"Started stage [{name}] {'in a process' if stage.is_in_process else 'in a thread'}")
+                    running_stages[future] = name
+
+                if not running_stages:
+                    raise Exception(f"Stages {pending_stages} can not start, their dependencies never complete")
+
+                completed_futures, _ = wait(list(running_stages), return_when=FIRST_COMPLETED)
+
+                # Failures first, so a stage they cancel is not collected just because it completed with them
+                for future in sorted(completed_futures, key=lambda future: future.cancelled() or future.exception() is None):
+                    name = running_stages.pop(future)
+                    if name in cancelled_stages:
+                        if not future.cancelled() and future.exception() is None:
+                            self.discard_artifact(name, future.result())
+                        continue
+
+                    try:
+                        artifacts[name] = future.result()
+                        logging.info(f"Completed stage [{name}]")
+
+                    except Exception as e:
+                        failures[name] = self.get_stage_error(name, e)
+                        stages_to_cancel = self.get_stages_to_cancel(name)
+
+                        # Stages listing the failed one in cancelled_by may have completed before it failed
+                        for completed_name in sorted(stages_to_cancel & set(artifacts)):
+                            self.discard_artifact(completed_name, artifacts.pop(completed_name))
+
+                        logging.info(f"Stage [{name}] failed, cancelling {sorted(stages_to_cancel)} : [{failures[name]}]")
+
+                        cancelled_stages |= stages_to_cancel
+                        pending_stages = [stage for stage in pending_stages if stage not in stages_to_cancel]
+                        for running_future, running_name in running_stages.items():
+                            if running_name in stages_to_cancel:
+                                running_future.cancel()
+
+            if failures:
+                failed_stage = next(name for name in self.stages if name in failures)
+
+                if isinstance(failures[failed_stage], BrokenProcessPool):
+                    raise Exception(f"Process pool broke while running stage [{failed_stage}], cancelled stages "
+                                    f"{sorted(cancelled_stages)} : [{failures[failed_stage]}]") from failures[failed_stage]
+
+                raise Exception(f"Stage [{failed_stage}] failed, cancelled stages {sorted(cancelled_stages)} : "
+                                f"[{failures[failed_stage]}]") from failures[failed_stage]
+
+            return artifacts
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+        finally:
+            thread_executor.shutdown(wait=True, cancel_futures=True)
+            if process_executor is not None:
+                process_executor.shutdown(wait=True, cancel_futures=True)
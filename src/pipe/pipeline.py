@@ -3,54 +3,247 @@ from src.logger import logging
 from src.exception import CustomException
 from src.entity.artifact_entity import *
 from src.entity.config_entity import *
+from src.constant import *
+from src.components import data_ingestion, data_validation, data_transformation, model_trainer, model_exporter
 from src.components.data_ingestion import DataIngestion
 from src.components.data_validation import  DataValidation
 from src.components.data_transformation import DataTransformation
+from src.components.model_trainer import ModelTrainer
+from src.components.model_exporter import ModelExporter
+from src.pipe.stage_cache import StageCache, get_code_version, get_file_version
+from src.utils.download_manager import DownloadManager
+from src.pipe.dag import DagExecutor
+from src.utils.profiler import profiler, save_run_profile
+import contextlib
 import os, sys
+import time
 
 
 class Pipeline:
-    
-    def __init__(self, config: Configuration = Configuration()) -> None:
+
+    def __init__(self, config: Configuration = Configuration(), force_rerun_stages: list = None) -> None:
         try:
             self.config = config
+            self.training_pipeline_config = config.training_pipeline_config
+            self.stage_cache = StageCache(cache_dir=self.training_pipeline_config.stage_cache_dir, time_stamp=config.time_stamp)
+
+            # Fingerprint of the current run of every stage, training namespaces its checkpoints with it
+            self.stage_fingerprints: dict = {}
+
+            # Stages given here rerun on top of the force_rerun_stages of config.yml
+            self.force_rerun_stages = set(self.training_pipeline_config.force_rerun_stages) | set(force_rerun_stages or [])
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def run_stage(self, stage: str, stage_module, stage_config, upstream_artifacts: list, artifact_class,
+                  initiate_stage, load_cached_artifact = None, input_versions: dict = None):
+
+        """
+        Runs a stage, or skips it and loads its artifact from the stage cache when its config,
+        inputs, upstream artifacts and code are unchanged since a completed run.
+
+            Parameters:
+                stage (str), stage_module (module): Module of the component, hashed as its code version
+                stage_config (namedtuple), upstream_artifacts (list), artifact_class (namedtuple class)
+                initiate_stage (function): Runs the stage and returns its artifact
+                load_cached_artifact (function): Completes a cached artifact, e.g. rebuilds in memory fields
+                input_versions (dict): Versions of the files and sources the config only refers to by path or url
+
+            Returns:
+                artifact (namedtuple)
+        """
+
+        try:
+            with self.profile_stage(stage) as stage_record:
+                fingerprint = self.stage_cache.get_fingerprint(stage_config, upstream_artifacts, get_code_version(stage_module), input_versions)
+                self.stage_fingerprints[stage] = fingerprint
+                stage_record['is_cached'] = False
+
+                if self.training_pipeline_config.is_stage_cache_enabled and stage not in self.force_rerun_stages:
+                    artifact = self.stage_cache.load_artifact(stage, fingerprint, artifact_class)
+
+                    if artifact is not None:
+                        logging.info(f"Skipping [{stage}], loaded the artifact of fingerprint [{fingerprint}] from the stage cache")
+                        stage_record['is_cached'] = True
+                        return load_cached_artifact(artifact) if load_cached_artifact is not None else artifact
+
+                start_time = time.perf_counter()
+                artifact = initiate_stage()
+
+                if self.training_pipeline_config.is_stage_cache_enabled:
+                    self.stage_cache.save_artifact(stage, fingerprint, artifact, duration = time.perf_counter() - start_time)
+
+                return artifact
+
         except Exception as e:
             raise CustomException(e,sys) from e
-        
+
+    def profile_stage(self, stage: str):
+
+        """
+        Returns the profiling context of a stage, a stage record is written into the profile
+        directory of the run, with a cProfile or pyinstrument capture for deep_profiled_stages.
+
+            Parameters: stage (str)
+
+            Returns:
+                context manager yielding the stage record (dict)
+        """
+
+        if not self.training_pipeline_config.is_profiled:
+            return contextlib.nullcontext({})
+
+        deep_profiler = self.training_pipeline_config.deep_profiler if stage in self.training_pipeline_config.deep_profiled_stages else None
+
+        return profiler.stage(stage, profile_dir = self.training_pipeline_config.profile_dir, deep_profiler = deep_profiler)
+
+    def get_data_source_version(self, data_ingestion_config: DataIngestionConfig):
+
+        """
+        Returns the version of the data source for the ingestion fingerprint. A configured sha256 pins
+        the content, otherwise the ETag, Last-Modified and size of the source are used. A source that
+        sends no validators gets the time stamp of the run, so ingestion is never cached for it.
+
+            Parameters: data_ingestion_config (DataIngestionConfig)
+
+            Returns:
+                data_source_version (str or dict)
+        """
+
+        if data_ingestion_config.data_source_sha256 is not None:
+            return data_ingestion_config.data_source_sha256
+
+        data_source_version = DownloadManager(cache_dir=data_ingestion_config.data_cache_dir).get_source_version(data_ingestion_config.data_source_url)
+
+        if data_source_version is None or (data_source_version[DOWNLOAD_ETAG_KEY] is None and data_source_version[DOWNLOAD_LAST_MODIFIED_KEY] is None):
+            logging.info(f"Version of [{data_ingestion_config.data_source_url}] is unknown, data ingestion is not loaded from the stage cache")
+            return self.config.time_stamp
+
+        return data_source_version
+
     def start_data_ingestion(self) -> DataIngestionArtifact:
         try:
-            data_ingestion = DataIngestion(self.config.get_data_ingestion_config())
-            return data_ingestion.initiate_data_ingestion()
+            data_ingestion_config = self.config.get_data_ingestion_config()
+
+            return self.run_stage(DATA_INGESTION_ARTIFACT_DIR, data_ingestion, data_ingestion_config, [], DataIngestionArtifact,
+                                  initiate_stage = lambda: DataIngestion(data_ingestion_config).initiate_data_ingestion(),
+                                  input_versions = {STAGE_CACHE_DATA_SOURCE_INPUT: self.get_data_source_version(data_ingestion_config)})
         except Exception as e:
             raise CustomException(e,sys) from e
-        
+
     def start_data_validation(self, data_ingestion_artifact:DataIngestionArtifact) -> DataValidationArtifact:
         try:
-            data_validation = DataValidation(self.config.get_data_validation_config(), 
-                                             data_ingestion_artifact = data_ingestion_artifact)
-            
-            return data_validation.initiate_data_validation()
+            data_validation_config = self.config.get_data_validation_config()
+
+            return self.run_stage(DATA_VALIDATION_ARTIFACT_DIR, data_validation, data_validation_config, [data_ingestion_artifact],
+                                  DataValidationArtifact,
+                                  initiate_stage = lambda: DataValidation(data_validation_config,
+                                                                          data_ingestion_artifact = data_ingestion_artifact).initiate_data_validation(),
+                                  input_versions = {STAGE_CACHE_SCHEMA_FILE_INPUT: get_file_version(data_validation_config.schema_file_path)})
         except Exception as e:
             raise CustomException(e,sys) from e
-        
-        
+
+
     def start_data_transformation(self, data_ingestion_artifact:DataIngestionArtifact) -> DataTransformationArtifact:
         try:
-            data_transformation = DataTransformation(
-                self.config.get_data_transformation_config(),
+            data_transformation_config = self.config.get_data_transformation_config()
+
+            get_data_transformation = lambda: DataTransformation(
+                data_transformation_config,
                 data_ingestion_artifcat = data_ingestion_artifact
             )
-            
-            return data_transformation.initiate_data_transformation()
-        
+
+            # Datasets live in memory, a cached artifact gets them rebuilt over the tensor store
+            return self.run_stage(DATA_TRANSFORMATION_ARTIFACT_DIR, data_transformation, data_transformation_config,
+                                  [data_ingestion_artifact], DataTransformationArtifact,
+                                  initiate_stage = lambda: get_data_transformation().initiate_data_transformation(),
+                                  load_cached_artifact = lambda artifact: get_data_transformation().load_data_transformation_artifact(artifact))
+
         except Exception as e:
             raise CustomException(e, sys) from e
-        
-    def run_pipeline(self):
+
+    def start_model_trainer(self, data_transformation_artifact:DataTransformationArtifact) -> ModelTrainerArtifact:
         try:
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact)
-            data_transformation_artifact = self.start_data_transformation(data_ingestion_artifact)
-            
+            model_trainer_config = self.config.get_model_trainer_config()
+
+            return self.run_stage(MODEL_TRAINER_ARTIFACT_DIR, model_trainer, model_trainer_config, [data_transformation_artifact],
+                                  ModelTrainerArtifact,
+                                  initiate_stage = lambda: ModelTrainer(model_trainer_config,
+                                                                        data_transformation_artifact = data_transformation_artifact,
+                                                                        training_fingerprint = self.stage_fingerprints[MODEL_TRAINER_ARTIFACT_DIR]).initiate_model_trainer())
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def start_model_exporter(self, data_ingestion_artifact:DataIngestionArtifact,
+                             model_trainer_artifact:ModelTrainerArtifact) -> ModelExporterArtifact:
+        try:
+            model_exporter_config = self.config.get_model_exporter_config()
+
+            return self.run_stage(MODEL_EXPORTER_ARTIFACT_DIR, model_exporter, model_exporter_config,
+                                  [data_ingestion_artifact, model_trainer_artifact], ModelExporterArtifact,
+                                  initiate_stage = lambda: ModelExporter(model_exporter_config,
+                                                                         data_ingestion_artifact = data_ingestion_artifact,
+                                                                         model_trainer_artifact = model_trainer_artifact).initiate_model_exporter())
+
         except Exception as e:
-            raise CustomException(e,sys) from e
\ No newline at end of file
+            raise CustomException(e, sys) from e
+
+    def run_pipeline(self) -> dict:
+
+        """
+        Runs the stages as a dependency graph. Validation and transformation only need the ingested
+        data, so they run concurrently; validation runs in its own process, transformation in a thread
+        because its tf.data datasets can not leave this process. With is_validation_required, a
+        validation failure cancels transformation, also when it already completed, in which case its
+        artifact is removed from the stage cache, and training waits for validation to pass.
+        With is_profiled, the records and spans of every stage are merged into a run profile.
+
+        Validation runs in a spawned process, which imports the __main__ module of the caller again.
+        A script calling run_pipeline must do so under if __name__ == '__main__', otherwise the
+        process dies while importing it and the run fails with a broken process pool.
+
+            Parameters: None
+
+            Returns:
+                artifacts (dict): stage name -> artifact
+        """
+
+        start_time = time.perf_counter()
+        if self.training_pipeline_config.is_profiled:
+            profiler.clear()
+
+        try:
+            is_validation_required = self.training_pipeline_config.is_validation_required
+
+            dag_executor = DagExecutor(max_parallel_stages = self.training_pipeline_config.max_parallel_stages)
+
+            dag_executor.add_stage(DATA_INGESTION_ARTIFACT_DIR, self.start_data_ingestion)
+            dag_executor.add_stage(DATA_VALIDATION_ARTIFACT_DIR, self.start_data_validation,
+                                   dependencies = [DATA_INGESTION_ARTIFACT_DIR], is_in_process = True)
+            dag_executor.add_stage(DATA_TRANSFORMATION_ARTIFACT_DIR, self.start_data_transformation,
+                                   dependencies = [DATA_INGESTION_ARTIFACT_DIR],
+                                   cancelled_by = [DATA_VALIDATION_ARTIFACT_DIR] if is_validation_required else [],
+                                   on_discarded = lambda _: self.stage_cache.remove_artifact(DATA_TRANSFORMATION_ARTIFACT_DIR,
+                                                                                             self.stage_fingerprints[DATA_TRANSFORMATION_ARTIFACT_DIR]))
+            dag_executor.add_stage(MODEL_TRAINER_ARTIFACT_DIR,
+                                   lambda data_transformation_artifact, *_: self.start_model_trainer(data_transformation_artifact),
+                                   dependencies = [DATA_TRANSFORMATION_ARTIFACT_DIR] + ([DATA_VALIDATION_ARTIFACT_DIR] if is_validation_required else []))
+            dag_executor.add_stage(MODEL_EXPORTER_ARTIFACT_DIR, self.start_model_exporter,
+                                   dependencies = [DATA_INGESTION_ARTIFACT_DIR, MODEL_TRAINER_ARTIFACT_DIR])
+
+            return dag_executor.run()
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+        finally:
+            # Failed runs are profiled too, up to the failing stage
+            if self.training_pipeline_config.is_profiled:
+                try:
+                    save_run_profile(profile_dir = self.training_pipeline_config.profile_dir, time_stamp = self.config.time_stamp,
+                                     duration = time.perf_counter() - start_time,
+                                     is_chrome_trace_exported = self.training_pipeline_config.is_chrome_trace_exported)
+                except Exception as e:
+                    # Never hides the outcome of the run
+                    logging.info(f"Can not save the run profile : [{e}]")
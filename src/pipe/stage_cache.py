@@ -0,0 +1,279 @@
+import os
+import sys
+import json
+import time
+import types
+import hashlib
+import inspect
+from src.constant import *
+from src.exception import CustomException
+from src.logger import logging
+
+
+def get_code_version(module:types.ModuleType) -> str:
+
+    """
+    Hashes the source of a module and of every src module it uses, directly or through other src modules -> str
+    A change to a component, or to a utility it calls, changes its code version; a change to
+    an unrelated component does not.
+
+    Args:
+    module (types.ModuleType): Module of the stage, e.g. src.components.data_ingestion
+
+    Returns:
+    1. Hex digest of the sources (str)
+
+    """
+
+    try:
+        seen_modules: dict = {}
+        modules_to_visit = [module]
+
+        while modules_to_visit:
+            current_module = modules_to_visit.pop()
+            if current_module.__name__ in seen_modules:
+                continue
+            seen_modules[current_module.__name__] = current_module
+
+            for value in vars(current_module).values():
+                if isinstance(value, types.ModuleType):
+                    used_module = value
+                else:
+                    used_module = sys.modules.get(getattr(value, '__module__', None) or '')
+
+                if used_module is not None and used_module.__name__.split('.')[0] == STAGE_CACHE_CODE_PACKAGE:
+                    modules_to_visit.append(used_module)
+
+        sha256 = hashlib.sha256()
+        for module_name in sorted(seen_modules):
+            sha256.update(module_name.encode())
+            sha256.update(inspect.getsource(seen_modules[module_name]).encode())
+
+        return sha256.hexdigest()
+
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def get_file_version(file_path:str) -> str:
+
+    """
+    Hashes the content of an input file of a stage, such as the schema file -> str
+    Config fields only hold the path, so edits to the file are seen through its content.
+
+    Args:
+    file_path (str): Path of the input file
+
+    Returns:
+    1. Hex digest of the content, None when the file does not exist (str)
+
+    """
+
+    try:
+        if not os.path.exists(file_path):
+            return None
+
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as input_file:
+            for chunk in iter(lambda: input_file.read(STAGE_CACHE_READ_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+
+        return sha256.hexdigest()
+
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def get_serializable_artifact(artifact:tuple) -> dict:
+
+    """
+    Returns the fields of an artifact that can be stored as json -> dict
+    In memory fields such as tf.data datasets are stored as None and rebuilt on load.
+
+    Args:
+    artifact (namedtuple): Artifact of a stage
+
+    Returns:
+    1. Json serializable fields of the artifact (dict)
+
+    """
+
+    serializable_artifact = {}
+    for field, value in artifact._asdict().items():
+        try:
+            json.dumps(value)
+            serializable_artifact[field] = value
+        except TypeError:
+            serializable_artifact[field] = None
+
+    return serializable_artifact
+
+
+class StageCache:
+
+    """
+    Stores the artifact of every completed stage under the fingerprint of its inputs, so an
+    unchanged stage is skipped on the next run and its artifact is loaded instead.
+
+    A fingerprint covers the stage config without the time stamp of the run, the versions of
+    input files and sources the config only refers to, the upstream artifacts and the code
+    version of the stage. Layout: cache_dir/<stage>/<fingerprint>.json
+    """
+
+    def __init__(self, cache_dir:str, time_stamp:str = CURRENT_TIME_STAMP):
+        try:
+            self.cache_dir = cache_dir
+            self.time_stamp = time_stamp
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_fingerprint(self, stage_config:tuple, upstream_artifacts:list, code_version:str, input_versions:dict = None) -> str:
+
+        """
+        Returns the fingerprint of a stage run.
+
+            Parameters:
+                stage_config (namedtuple), upstream_artifacts (list): Artifacts the stage reads
+                code_version (str): get_code_version of the stage module
+                input_versions (dict): Input name -> version of the content behind a config path or url
+
+            Returns:
+                fingerprint (str)
+        """
+
+        # Paths of every run hold its time stamp, which must not change the fingerprint, nested ones included
+        stage_config = json.dumps(stage_config._asdict(), sort_keys=True, default=str).replace(self.time_stamp, STAGE_CACHE_TIME_STAMP_PLACEHOLDER)
+
+        fingerprint_inputs = {
+            'stage_config': stage_config,
+            'input_versions': input_versions or {},
+            'upstream_artifacts': [get_serializable_artifact(artifact) for artifact in upstream_artifacts],
+            'code_version': code_version
+        }
+
+        return hashlib.sha256(json.dumps(fingerprint_inputs, sort_keys=True, default=str).encode()).hexdigest()[:STAGE_CACHE_FINGERPRINT_LENGTH]
+
+    def get_cache_file_path(self, stage:str, fingerprint:str) -> str:
+
+        """
+        Returns the path of the cached artifact of a stage run.
+
+            Parameters: stage (str), fingerprint (str)
+
+            Returns:
+                cache_file_path (str)
+        """
+
+        return os.path.join(self.cache_dir, stage, fingerprint + STAGE_CACHE_FILE_EXTENSION)
+
+    @staticmethod
+    def is_artifact_complete(serializable_artifact:dict) -> bool:
+
+        """
+        Checks that every file of a cached artifact still exists. Directories are not checked,
+        stages only create some of them on demand.
+
+            Parameters: serializable_artifact (dict)
+
+            Returns:
+                is_complete (bool)
+        """
+
+        for field, value in serializable_artifact.items():
+            if field.endswith(STAGE_CACHE_FILE_FIELD_SUFFIX):
+                file_paths = [value]
+            elif field.endswith(STAGE_CACHE_FILES_FIELD_SUFFIX) and isinstance(value, dict):
+                # Per split files, split -> path
+                file_paths = list(value.values())
+            else:
+                continue
+
+            for file_path in file_paths:
+                # Streamed paths point into an archive, the archive has to exist
+                if isinstance(file_path, str) and os.path.isabs(file_path) and not os.path.exists(file_path.split(ZIP_MEMBER_SEPARATOR)[0]):
+                    return False
+
+        return True
+
+    def load_artifact(self, stage:str, fingerprint:str, artifact_class):
+
+        """
+        Returns the cached artifact of a stage run when one completed and its files still exist.
+
+            Parameters:
+                stage (str), fingerprint (str), artifact_class (namedtuple class)
+
+            Returns:
+                artifact (namedtuple): None when there is no usable cached artifact
+        """
+
+        try:
+            cache_file_path = self.get_cache_file_path(stage, fingerprint)
+            if not os.path.exists(cache_file_path):
+                return None
+
+            with open(cache_file_path) as cache_file:
+                cache_entry = json.load(cache_file)
+
+            serializable_artifact = cache_entry[STAGE_CACHE_ARTIFACT_KEY]
+            if set(serializable_artifact) != set(artifact_class._fields) or not self.is_artifact_complete(serializable_artifact):
+                logging.info(f"Cached artifact of [{stage}] is outdated or its files are missing : [{cache_file_path}]")
+                return None
+
+            return artifact_class(**serializable_artifact)
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def save_artifact(self, stage:str, fingerprint:str, artifact:tuple, duration:float) -> str:
+
+        """
+        Stores the artifact of a completed stage run, atomically.
+
+            Parameters:
+                stage (str), fingerprint (str), artifact (namedtuple), duration (float): Seconds the stage took
+
+            Returns:
+                cache_file_path (str)
+        """
+
+        try:
+            cache_file_path = self.get_cache_file_path(stage, fingerprint)
+            os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+
+            temp_file_path = cache_file_path + '.tmp'
+            with open(temp_file_path, 'w') as cache_file:
+                json.dump({
+                    'stage': stage,
+                    'fingerprint': fingerprint,
+                    'time_stamp': self.time_stamp,
+                    'completed_at': time.time(),
+                    'duration_seconds': duration,
+                    STAGE_CACHE_ARTIFACT_KEY: get_serializable_artifact(artifact)
+                }, cache_file, indent=4)
+
+            os.replace(temp_file_path, cache_file_path)
+
+            return cache_file_path
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def remove_artifact(self, stage:str, fingerprint:str) -> None:
+
+        """
+        Removes the cached artifact of a stage run, e.g. when a failed upstream check discarded it.
+
+            Parameters: stage (str), fingerprint (str)
+
+            Returns: None
+        """
+
+        try:
+            cache_file_path = self.get_cache_file_path(stage, fingerprint)
+            if os.path.exists(cache_file_path):
+                os.remove(cache_file_path)
+                logging.info(f"Removed the cached artifact of [{stage}] : [{cache_file_path}]")
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
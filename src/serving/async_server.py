@@ -0,0 +1,273 @@
+"""
+Asyncio prediction server. Images are decoded on a thread or process pool, forward passes
+run on a dedicated inference thread, and requests beyond max_queue_size are rejected with
+429 instead of waiting. Requests that can not be answered within request_timeout_ms get 503.
+
+Run it with: python -m src.serving.async_server [port]
+or behind gunicorn: gunicorn src.serving.async_server:create_app --worker-class aiohttp.GunicornWebWorker
+"""
+
+import os
+import sys
+import asyncio
+import hashlib
+import numpy as np
+import multiprocessing
+from aiohttp import web
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from src.constant import *
+from src.entity.config_entity import ModelServingConfig
+from src.config.configuration import Configuration
+from src.exception import CustomException
+from src.logger import logging
+from src.serving.predictor import Predictor, get_predictor
+from src.serving.micro_batcher import AsyncMicroBatcher
+from src.serving.prediction_cache import PredictionCache
+
+
+class AsyncPredictionServer:
+
+    """
+    Holds the model, the decoding pool and the batcher of one server process.
+    """
+
+    def __init__(self, model_serving_config: ModelServingConfig):
+        try:
+            self.model_serving_config = model_serving_config
+            self.predictor = get_predictor(model_file_path=model_serving_config.model_file_path)
+            self.prediction_cache = PredictionCache(max_entries=model_serving_config.prediction_cache_max_entries,
+                                                    ttl_seconds=model_serving_config.prediction_cache_ttl_seconds,
+                                                    sqlite_file_path=model_serving_config.prediction_cache_sqlite_file_path)
+            self.micro_batcher = None
+            self.decode_executor = None
+            self.cache_executor = None
+            self.pending_requests = 0
+            self.rejected_requests = 0
+            self.timed_out_requests = 0
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    async def on_startup(self, app: web.Application) -> None:
+
+        """
+        Creates the decoding and cache pools and starts the batcher on the event loop of the server.
+
+            Parameters: app (web.Application)
+
+            Returns: None
+        """
+
+        if self.model_serving_config.is_decoded_in_processes:
+            # Spawned workers only import the preprocessing, never tensorflow
+            self.decode_executor = ProcessPoolExecutor(max_workers=self.model_serving_config.decode_max_workers,
+                                                       mp_context=multiprocessing.get_context('spawn'))
+        else:
+            self.decode_executor = ThreadPoolExecutor(max_workers=self.model_serving_config.decode_max_workers,
+                                                      thread_name_prefix='decode')
+
+        # Hashing and SQLite lookups block, so they run here instead of on the event loop
+        self.cache_executor = ThreadPoolExecutor(max_workers=PREDICTION_CACHE_MAX_WORKERS,
+                                                 thread_name_prefix='prediction_cache')
+
+        self.micro_batcher = AsyncMicroBatcher(predict_function=self.predictor.predict,
+                                               max_batch_size=self.model_serving_config.max_batch_size,
+                                               max_wait_ms=self.model_serving_config.max_wait_ms,
+                                               max_queue_size=self.model_serving_config.max_queue_size)
+        self.micro_batcher.start()
+
+        # The model is loaded before the first request instead of during it
+        await asyncio.get_running_loop().run_in_executor(self.micro_batcher.inference_executor, self.load_model)
+
+    async def on_cleanup(self, app: web.Application) -> None:
+
+        """
+        Stops the batcher, the decoding pool and the cache pool.
+
+            Parameters: app (web.Application)
+
+            Returns: None
+        """
+
+        await self.micro_batcher.stop()
+        self.decode_executor.shutdown(wait=False, cancel_futures=True)
+        self.cache_executor.shutdown(wait=True)
+
+    def load_model(self) -> None:
+
+        """
+        Loads the model, a missing model is reported by the requests instead of stopping the server.
+
+            Parameters: None
+
+            Returns: None
+        """
+
+        try:
+            self.predictor.load_model()
+        except Exception as e:
+            logging.info(f"Model is not loaded : [{e}]")
+
+    def get_cached_predictions(self, model_version:str, uploads:list) -> tuple:
+
+        """
+        Hashes the uploaded images and looks them up in the prediction cache. Runs on the cache pool.
+
+            Parameters: model_version (str), uploads (list): Bytes of the uploaded images
+
+            Returns:
+                image_hashes (list), probabilities (list): None for the images that are not cached
+        """
+
+        image_hashes = [hashlib.sha256(image_bytes).hexdigest() for image_bytes in uploads]
+        return image_hashes, [self.prediction_cache.get(model_version, image_hash) for image_hash in image_hashes]
+
+    def put_predictions(self, model_version:str, image_hashes:list, probabilities:list) -> None:
+
+        """
+        Caches the predictions of the images. Runs on the cache pool.
+
+            Parameters: model_version (str), image_hashes (list), probabilities (list)
+
+            Returns: None
+        """
+
+        for image_hash, probability in zip(image_hashes, probabilities):
+            self.prediction_cache.put(model_version, image_hash, probability)
+
+    async def index(self, request: web.Request) -> web.Response:
+        return web.Response(text="Machine Learning Project")
+
+    async def cache_stats(self, request: web.Request) -> web.Response:
+        # The cache lock is held during SQLite writes, so the stats are read on the cache pool
+        stats = await asyncio.get_running_loop().run_in_executor(self.cache_executor, self.prediction_cache.get_stats)
+        return web.json_response(stats)
+
+    async def predict(self, request: web.Request) -> web.Response:
+
+        """
+        Predicts the label of every uploaded x-ray image.
+
+            Parameters: request (web.Request): Multipart request with one or more images
+
+            Returns:
+                response (web.Response): Label and probability of every image, 400 for a bad upload,
+                                         429 when the server is overloaded, 503 when it can not answer in time
+        """
+
+        if self.pending_requests >= self.model_serving_config.max_queue_size:
+            self.rejected_requests += 1
+            return web.json_response({'error': "Server is overloaded, retry later"}, status=429)
+
+        self.pending_requests += 1
+        try:
+            return await asyncio.wait_for(self.get_predictions(request),
+                                          timeout=self.model_serving_config.request_timeout_ms / 1000)
+
+        except asyncio.TimeoutError:
+            self.timed_out_requests += 1
+            return web.json_response({'error': "Prediction timed out"}, status=503)
+
+        finally:
+            self.pending_requests -= 1
+
+    async def get_predictions(self, request: web.Request) -> web.Response:
+
+        """
+        Reads the uploaded images, answers cached ones at once, and decodes the others on the
+        decoding pool before waiting for their predictions. Hashing and cache lookups and writes
+        run on the cache pool, so a slow SQLite file never stalls the event loop.
+
+            Parameters: request (web.Request)
+
+            Returns:
+                response (web.Response)
+        """
+
+        file_names, uploads = [], []
+        if request.content_type.startswith('multipart/'):
+            reader = await request.multipart()
+            async for part in reader:
+                if part.filename is not None:
+                    file_names.append(part.filename)
+                    uploads.append(await part.read())
+
+        if not uploads:
+            return web.json_response({'error': "No image uploaded"}, status=400)
+
+        loop = asyncio.get_running_loop()
+        try:
+            # Only loads the model when it failed to load at startup, cache hits never wait for a forward pass
+            model_version = self.predictor.model_version or \
+                            await loop.run_in_executor(self.micro_batcher.inference_executor, self.predictor.get_model_version)
+        except Exception as e:
+            return web.json_response({'error': str(e)}, status=503)
+
+        # Resubmitted images are answered from the cache, only the others are decoded and predicted
+        image_hashes, probabilities = await loop.run_in_executor(self.cache_executor, self.get_cached_predictions,
+                                                                 model_version, uploads)
+        missing_indices = [index for index, probability in enumerate(probabilities) if probability is None]
+
+        if missing_indices:
+            images = await asyncio.gather(*[loop.run_in_executor(self.decode_executor, Predictor.preprocess, uploads[index])
+                                            for index in missing_indices], return_exceptions=True)
+
+            for index, image in zip(missing_indices, images):
+                if isinstance(image, Exception):
+                    return web.json_response({'error': f"Can not decode image [{file_names[index]}]"}, status=400)
+
+            try:
+                future = self.micro_batcher.submit(np.stack(images))
+            except asyncio.QueueFull:
+                self.rejected_requests += 1
+                return web.json_response({'error': "Server is overloaded, retry later"}, status=429)
+
+            try:
+                predicted_probabilities = await future
+            except Exception as e:
+                return web.json_response({'error': str(e)}, status=503)
+
+            for index, probability in zip(missing_indices, predicted_probabilities):
+                probabilities[index] = probability
+
+            await loop.run_in_executor(self.cache_executor, self.put_predictions, model_version,
+                                       [image_hashes[index] for index in missing_indices], list(predicted_probabilities))
+
+        return web.json_response([dict(file_name=file_name, **self.predictor.get_prediction(probability))
+                                  for file_name, probability in zip(file_names, probabilities)])
+
+
+def create_app(model_serving_config: ModelServingConfig = None) -> web.Application:
+
+    """
+    Creates the asyncio prediction app -> web.Application
+
+    Args:
+    model_serving_config (ModelServingConfig): Serving config, read from config.yml when not given
+
+    Returns:
+    1. App serving / and /predict (web.Application)
+
+    """
+
+    try:
+        if model_serving_config is None:
+            model_serving_config = Configuration().get_model_serving_config()
+
+        server = AsyncPredictionServer(model_serving_config)
+
+        app = web.Application()
+        app.router.add_get('/', server.index)
+        app.router.add_post('/', server.index)
+        app.router.add_post('/predict', server.predict)
+        app.router.add_get('/cache/stats', server.cache_stats)
+        app.on_startup.append(server.on_startup)
+        app.on_cleanup.append(server.on_cleanup)
+
+        return app
+
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), port=int(sys.argv[1]) if len(sys.argv) > 1 else int(os.environ.get('PORT', SERVING_PORT)))
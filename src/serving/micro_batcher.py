@@ -0,0 +1,267 @@
+import sys
+import time
+import queue
+import asyncio
+import threading
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from src.constant import *
+from src.exception import CustomException
+from src.logger import logging
+
+
+class MicroBatcher:
+
+    """
+    Groups concurrent prediction requests into one forward pass. Requests are queued and a
+    single worker thread collects them until max_batch_size images are waiting or the oldest
+    request waited max_wait_ms, then runs predict_function on the concatenated batch and hands
+    every request its own slice of the predictions.
+    """
+
+    def __init__(self, predict_function, max_batch_size:int = SERVING_MAX_BATCH_SIZE,
+                 max_wait_ms:float = SERVING_MAX_WAIT_MS):
+        try:
+            self.predict_function = predict_function
+            self.max_batch_size = max_batch_size
+            self.max_wait_seconds = max_wait_ms / 1000
+            self.requests: queue.Queue = queue.Queue()
+            self.batch_count = 0
+            self.image_count = 0
+
+            self.worker = threading.Thread(target=self.run, name=self.__class__.__name__, daemon=True)
+            self.worker.start()
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def submit(self, images:np.ndarray) -> Future:
+
+        """
+        Queues the images of one request.
+
+            Parameters: images (numpy array): Preprocessed images of shape (count, height, width, channels)
+
+            Returns:
+                future (Future): Resolves to the predictions of the images
+        """
+
+        future = Future()
+        self.requests.put((images, future))
+        return future
+
+    def predict(self, images:np.ndarray) -> np.ndarray:
+
+        """
+        Queues the images of one request and waits for their predictions.
+
+            Parameters: images (numpy array)
+
+            Returns:
+                predictions (numpy array)
+        """
+
+        return self.submit(images).result()
+
+    def collect_batch(self) -> list:
+
+        """
+        Waits for a first request, then collects more until the batch is full or the wait is over.
+
+            Parameters: None
+
+            Returns:
+                batch_requests (list): (images, future) of every request of the batch
+        """
+
+        batch_requests = [self.requests.get()]
+        batch_size = len(batch_requests[0][0])
+        deadline = time.perf_counter() + self.max_wait_seconds
+
+        while batch_size < self.max_batch_size:
+            remaining_seconds = deadline - time.perf_counter()
+            if remaining_seconds <= 0:
+                break
+
+            try:
+                images, future = self.requests.get(timeout=remaining_seconds)
+            except queue.Empty:
+                break
+
+            batch_requests.append((images, future))
+            batch_size += len(images)
+
+        return batch_requests
+
+    def run(self) -> None:
+
+        """
+        Runs forward passes of collected batches until the process exits.
+
+            Parameters: None
+
+            Returns: None
+        """
+
+        while True:
+            batch_requests = self.collect_batch()
+
+            try:
+                images = np.concatenate([request_images for request_images, _ in batch_requests])
+                predictions = self.predict_function(images)
+                self.batch_count += 1
+                self.image_count += len(images)
+
+                start = 0
+                for request_images, future in batch_requests:
+                    future.set_result(predictions[start:start + len(request_images)])
+                    start += len(request_images)
+
+            except Exception as e:
+                logging.info(f"Batched prediction failed : [{e}]")
+                for _, future in batch_requests:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+class AsyncMicroBatcher:
+
+    """
+    Asyncio counterpart of MicroBatcher. Requests wait in a bounded queue, so an overloaded
+    server rejects them at once instead of piling up latency, and forward passes run on a
+    dedicated single thread executor so they never block the event loop.
+    """
+
+    def __init__(self, predict_function, max_batch_size:int = SERVING_MAX_BATCH_SIZE,
+                 max_wait_ms:float = SERVING_MAX_WAIT_MS, max_queue_size:int = SERVING_MAX_QUEUE_SIZE):
+        try:
+            self.predict_function = predict_function
+            self.max_batch_size = max_batch_size
+            self.max_wait_seconds = max_wait_ms / 1000
+            self.requests: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+            self.inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+            self.worker = None
+            self.batch_count = 0
+            self.image_count = 0
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def start(self) -> None:
+
+        """
+        Starts the batching task on the running event loop.
+
+            Parameters: None
+
+            Returns: None
+        """
+
+        if self.worker is None:
+            self.worker = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+
+        """
+        Cancels the batching task and shuts the inference executor down.
+
+            Parameters: None
+
+            Returns: None
+        """
+
+        if self.worker is not None:
+            self.worker.cancel()
+            await asyncio.gather(self.worker, return_exceptions=True)
+            self.worker = None
+
+        self.inference_executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, images:np.ndarray) -> asyncio.Future:
+
+        """
+        Queues the images of one request without waiting.
+
+            Parameters: images (numpy array): Preprocessed images of shape (count, height, width, channels)
+
+            Returns:
+                future (asyncio Future): Resolves to the predictions of the images
+
+            Raises:
+                asyncio.QueueFull: When the queue is full
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        self.requests.put_nowait((images, future))
+        return future
+
+    async def collect_batch(self) -> list:
+
+        """
+        Waits for a first request, then collects more until the batch is full or the wait is over.
+
+            Parameters: None
+
+            Returns:
+                batch_requests (list): (images, future) of every request of the batch
+        """
+
+        batch_requests = [await self.requests.get()]
+        batch_size = len(batch_requests[0][0])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_seconds
+
+        while batch_size < self.max_batch_size:
+            remaining_seconds = deadline - loop.time()
+            if remaining_seconds <= 0:
+                break
+
+            try:
+                images, future = await asyncio.wait_for(self.requests.get(), timeout=remaining_seconds)
+            except asyncio.TimeoutError:
+                break
+
+            batch_requests.append((images, future))
+            batch_size += len(images)
+
+        return batch_requests
+
+    async def run(self) -> None:
+
+        """
+        Runs forward passes of collected batches on the inference executor until cancelled.
+
+            Parameters: None
+
+            Returns: None
+        """
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch_requests = await self.collect_batch()
+
+            # Requests that timed out while queued are dropped before the forward pass
+            batch_requests = [(images, future) for images, future in batch_requests if not future.done()]
+            if not batch_requests:
+                continue
+
+            try:
+                images = np.concatenate([request_images for request_images, _ in batch_requests])
+                predictions = await loop.run_in_executor(self.inference_executor, self.predict_function, images)
+                self.batch_count += 1
+                self.image_count += len(images)
+
+                start = 0
+                for request_images, future in batch_requests:
+                    if not future.done():
+                        future.set_result(predictions[start:start + len(request_images)])
+                    start += len(request_images)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logging.info(f"Batched prediction failed : [{e}]")
+                for _, future in batch_requests:
+                    if not future.done():
+                        future.set_exception(e)
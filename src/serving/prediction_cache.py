@@ -0,0 +1,185 @@
+import os
+import sys
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from src.constant import *
+from src.exception import CustomException
+from src.logger import logging
+
+
+class PredictionCache:
+
+    """
+    Caches predictions by model version and image content hash, so resubmitted images skip
+    decoding and inference. An in-process LRU with a time to live is always used, an optional
+    SQLite file shares predictions between the worker processes of a server.
+
+    Keys include the model version, so a new model never returns the predictions of the old one,
+    and entries of other versions are dropped as soon as a new version is seen.
+    """
+
+    def __init__(self, max_entries:int = PREDICTION_CACHE_MAX_ENTRIES, ttl_seconds:float = PREDICTION_CACHE_TTL_SECONDS,
+                 sqlite_file_path:str = None):
+        try:
+            self.max_entries = max_entries
+            self.ttl_seconds = ttl_seconds
+            self.sqlite_file_path = sqlite_file_path
+            self.entries: OrderedDict = OrderedDict()
+            self.lock = threading.Lock()
+            self.model_version = None
+            self.put_count = 0
+
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+            self.connection = None
+            if sqlite_file_path is not None:
+                os.makedirs(os.path.dirname(sqlite_file_path) or '.', exist_ok=True)
+                self.connection = sqlite3.connect(sqlite_file_path, timeout=PREDICTION_CACHE_SQLITE_TIMEOUT,
+                                                  check_same_thread=False, isolation_level=None)
+                self.connection.execute("PRAGMA journal_mode=WAL")
+                self.connection.execute("PRAGMA synchronous=NORMAL")
+                self.connection.execute("CREATE TABLE IF NOT EXISTS predictions (model_version TEXT, image_hash TEXT, "
+                                        "probability REAL, expires_at REAL, PRIMARY KEY (model_version, image_hash))")
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def set_model_version(self, model_version:str) -> None:
+
+        """
+        Drops the entries of other model versions when the version changes. Called with the lock held.
+
+            Parameters: model_version (str)
+
+            Returns: None
+        """
+
+        if model_version == self.model_version:
+            return
+
+        if self.model_version is not None:
+            logging.info(f"Model version changed from [{self.model_version}] to [{model_version}], clearing the prediction cache")
+
+        self.entries.clear()
+        self.model_version = model_version
+
+        if self.connection is not None:
+            self.connection.execute("DELETE FROM predictions WHERE model_version != ?", (model_version,))
+
+    def get(self, model_version:str, image_hash:str):
+
+        """
+        Returns the cached prediction of an image, looking in memory first and then in SQLite.
+
+            Parameters: model_version (str), image_hash (str)
+
+            Returns:
+                probability (float): None when the image is not cached or the entry expired
+        """
+
+        try:
+            now = time.time()
+
+            with self.lock:
+                self.set_model_version(model_version)
+
+                entry = self.entries.get(image_hash)
+                if entry is not None:
+                    probability, expires_at = entry
+                    if expires_at > now:
+                        self.entries.move_to_end(image_hash)
+                        self.memory_hits += 1
+                        return probability
+                    del self.entries[image_hash]
+
+                if self.connection is not None:
+                    row = self.connection.execute("SELECT probability, expires_at FROM predictions WHERE model_version = ? "
+                                                  "AND image_hash = ? AND expires_at > ?", (model_version, image_hash, now)).fetchone()
+                    if row is not None:
+                        self.set_entry(image_hash, row[0], row[1])
+                        self.disk_hits += 1
+                        return row[0]
+
+                self.misses += 1
+                return None
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def set_entry(self, image_hash:str, probability:float, expires_at:float) -> None:
+
+        """
+        Adds an entry to the in-process LRU, evicting the least recently used one when full. Called with the lock held.
+
+            Parameters: image_hash (str), probability (float), expires_at (float)
+
+            Returns: None
+        """
+
+        self.entries[image_hash] = (probability, expires_at)
+        self.entries.move_to_end(image_hash)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def put(self, model_version:str, image_hash:str, probability:float) -> None:
+
+        """
+        Caches the prediction of an image.
+
+            Parameters: model_version (str), image_hash (str), probability (float)
+
+            Returns: None
+        """
+
+        try:
+            now = time.time()
+            expires_at = now + self.ttl_seconds
+
+            with self.lock:
+                self.set_model_version(model_version)
+                self.set_entry(image_hash, float(probability), expires_at)
+
+                if self.connection is not None:
+                    self.connection.execute("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                                            (model_version, image_hash, float(probability), expires_at))
+
+                    # Expired rows are pruned now and then instead of on every write
+                    self.put_count += 1
+                    if self.put_count % PREDICTION_CACHE_PRUNE_INTERVAL == 0:
+                        self.connection.execute("DELETE FROM predictions WHERE expires_at <= ?", (now,))
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_stats(self) -> dict:
+
+        """
+        Returns the hit and miss counters of the cache, used to size it.
+
+            Parameters: None
+
+            Returns:
+                stats (dict)
+        """
+
+        with self.lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+
+            return {
+                'model_version': self.model_version,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'is_shared': self.connection is not None
+            }
@@ -0,0 +1,231 @@
+import sys
+import threading
+import numpy as np
+from src.constant import *
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.tensor_store import preprocess_image_bytes
+from src.utils.download_manager import DownloadManager
+
+
+class Predictor:
+
+    """
+    Loads a trained model once per process and predicts the labels of x-ray images.
+    Images are preprocessed exactly like the training data.
+    """
+
+    def __init__(self, model_file_path:str):
+        try:
+            self.model_file_path = model_file_path
+            self.model = None
+            self.model_version = None
+            self.lock = threading.Lock()
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def load_model(self):
+
+        """
+        Returns the model, loading it on first use.
+
+            Parameters: None
+
+            Returns:
+                model (Model)
+        """
+
+        with self.lock:
+            if self.model is None:
+                if self.model_file_path is None:
+                    raise Exception("No trained model found, train a model or set model_file_path in model_serving_config")
+
+                import tensorflow as tf
+                import efficientnet.tfkeras
+
+                self.model = tf.keras.models.load_model(self.model_file_path)
+                self.model_version = DownloadManager.get_file_sha256(self.model_file_path)[:MODEL_VERSION_LENGTH]
+                logging.info(f"Loaded model [{self.model_file_path}] version [{self.model_version}]")
+
+            return self.model
+
+    def get_model_version(self) -> str:
+
+        """
+        Returns the version of the model, a digest of the model file.
+
+            Parameters: None
+
+            Returns:
+                model_version (str)
+        """
+
+        self.load_model()
+        return self.model_version
+
+    @staticmethod
+    def preprocess(image_bytes:bytes) -> np.ndarray:
+
+        """
+        Decodes, resizes and rescales an uploaded image.
+
+            Parameters: image_bytes (bytes)
+
+            Returns:
+                image (numpy array): float32 image of IMAGE_SIZE x IMAGE_SIZE x IMAGE_COLOR_CHANNELS
+        """
+
+        return preprocess_image_bytes(image_bytes).astype(np.float32) * np.float32(IMAGE_RESCALE)
+
+    def predict(self, images:np.ndarray) -> np.ndarray:
+
+        """
+        Runs one forward pass over a batch of preprocessed images.
+
+            Parameters: images (numpy array)
+
+            Returns:
+                probabilities (numpy array): Probability of LABELS[1] for every image
+        """
+
+        model = self.load_model()
+        return np.asarray(model(images, training=False)).reshape(-1)
+
+    @staticmethod
+    def get_prediction(probability:float) -> dict:
+
+        """
+        Returns the label and probability of one image.
+
+            Parameters: probability (float)
+
+            Returns:
+                prediction (dict)
+        """
+
+        return {'label': LABELS[int(probability >= PREDICTION_THRESHOLD)], 'probability': float(probability)}
+
+
+def load_tflite_interpreter(model_file_path:str):
+
+    """
+    Loads a tflite model with the slimmest interpreter installed -> Interpreter
+    The LiteRT and tflite-runtime packages only ship the interpreter, full tensorflow
+    is only imported when neither is installed.
+
+    Args:
+    model_file_path (str): Path of the .tflite model
+
+    Returns:
+    1. Interpreter with allocated tensors (Interpreter)
+
+    """
+
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+    interpreter = Interpreter(model_path=model_file_path)
+    interpreter.allocate_tensors()
+
+    return interpreter
+
+
+class TFLitePredictor(Predictor):
+
+    """
+    Predictor of a model exported by the model exporter. Only the tflite interpreter is loaded,
+    neither tensorflow nor efficientnet, so workers start faster and use less memory.
+    """
+
+    def __init__(self, model_file_path:str):
+        try:
+            super().__init__(model_file_path=model_file_path)
+            self.batch_size = None
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def load_model(self):
+
+        """
+        Returns the interpreter, loading it on first use.
+
+            Parameters: None
+
+            Returns:
+                interpreter (Interpreter)
+        """
+
+        with self.lock:
+            if self.model is None:
+                if self.model_file_path is None:
+                    raise Exception("No exported model found, export a model or set model_file_path in model_serving_config")
+
+                self.model = load_tflite_interpreter(self.model_file_path)
+                self.batch_size = int(self.model.get_input_details()[0]['shape'][0])
+                self.model_version = DownloadManager.get_file_sha256(self.model_file_path)[:MODEL_VERSION_LENGTH]
+                logging.info(f"Loaded tflite model [{self.model_file_path}] version [{self.model_version}]")
+
+            return self.model
+
+    def predict(self, images:np.ndarray) -> np.ndarray:
+
+        """
+        Runs the interpreter over a batch of preprocessed images. Quantized inputs and outputs
+        are converted with their scale and zero point.
+
+            Parameters: images (numpy array)
+
+            Returns:
+                probabilities (numpy array): Probability of LABELS[1] for every image
+        """
+
+        interpreter = self.load_model()
+
+        with self.lock:
+            input_details = interpreter.get_input_details()[0]
+
+            # Tensors are only reallocated when the batch size changes
+            if len(images) != self.batch_size:
+                interpreter.resize_tensor_input(input_details['index'], [len(images)] + list(input_details['shape'][1:]))
+                interpreter.allocate_tensors()
+                self.batch_size = len(images)
+                input_details = interpreter.get_input_details()[0]
+
+            input_scale, input_zero_point = input_details['quantization']
+            if input_scale:
+                images = np.round(images / input_scale + input_zero_point)
+            interpreter.set_tensor(input_details['index'], images.astype(input_details['dtype']))
+            interpreter.invoke()
+
+            output_details = interpreter.get_output_details()[0]
+            probabilities = interpreter.get_tensor(output_details['index']).astype(np.float32)
+            output_scale, output_zero_point = output_details['quantization']
+            if output_scale:
+                probabilities = (probabilities - output_zero_point) * output_scale
+
+            return probabilities.reshape(-1)
+
+
+def get_predictor(model_file_path:str) -> Predictor:
+
+    """
+    Returns the predictor of a model file, a TFLitePredictor for .tflite models -> Predictor
+
+    Args:
+    model_file_path (str): Path of the .keras or .tflite model
+
+    Returns:
+    1. Predictor of the model (Predictor)
+
+    """
+
+    if model_file_path is not None and model_file_path.endswith(TFLITE_MODEL_EXTENSION):
+        return TFLitePredictor(model_file_path=model_file_path)
+
+    return Predictor(model_file_path=model_file_path)
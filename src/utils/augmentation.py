@@ -0,0 +1,222 @@
+import math
+import numpy as np
+import tensorflow as tf
+from src.constant import *
+
+
+def compose_affine_matrices(theta, shift_rows, shift_cols, shear, zoom_rows, zoom_cols, is_flipped,
+                            image_height:int, image_width:int, xp = np) -> tuple:
+
+    """
+    Composes rotation, shift, shear, zoom and horizontal flip into one affine matrix per sample -> tuple
+    Works on numpy arrays (xp=np) and on tensors (xp=tf), every argument holds one value per sample.
+
+    Args:
+    theta (array): Rotation angles in radians
+    shift_rows (array): Shifts along the rows in pixels
+    shift_cols (array): Shifts along the columns in pixels
+    shear (array): Shear angles in radians
+    zoom_rows (array): Zoom factors along the rows
+    zoom_cols (array): Zoom factors along the columns
+    is_flipped (array): Horizontal flip flags
+    image_height (int): Height of the images
+    image_width (int): Width of the images
+    xp (module): numpy or tensorflow
+
+    Returns:
+    1. Coefficients a00, a01, a10, a11, b0, b1 mapping an output pixel (row, col) to the input pixel
+       (a00 * row + a01 * col + b0, a10 * row + a11 * col + b1) (tuple)
+
+    """
+
+    cos_theta, sin_theta = xp.cos(theta), xp.sin(theta)
+
+    # rotation @ shift @ shear @ zoom in (row, col) coordinates, as in ImageDataGenerator
+    a00 = cos_theta * zoom_rows
+    a01 = -(cos_theta * xp.sin(shear) + sin_theta * xp.cos(shear)) * zoom_cols
+    a10 = sin_theta * zoom_rows
+    a11 = (cos_theta * xp.cos(shear) - sin_theta * xp.sin(shear)) * zoom_cols
+    b0 = cos_theta * shift_rows - sin_theta * shift_cols
+    b1 = sin_theta * shift_rows + cos_theta * shift_cols
+
+    # Transform about the image center
+    center_row, center_col = image_height / 2 - 0.5, image_width / 2 - 0.5
+    b0 = b0 + center_row - a00 * center_row - a01 * center_col
+    b1 = b1 + center_col - a10 * center_row - a11 * center_col
+
+    # Horizontal flip of the output, col -> width - 1 - col
+    b0 = b0 + xp.where(is_flipped, a01 * (image_width - 1), 0.0)
+    b1 = b1 + xp.where(is_flipped, a11 * (image_width - 1), 0.0)
+    flip = xp.where(is_flipped, -1.0, 1.0)
+
+    return a00, a01 * flip, a10, a11 * flip, b0, b1
+
+
+def get_affine_transforms(batch_size, image_height:int, image_width:int, seed) -> tf.Tensor:
+
+    """
+    Draws the random rotation, shift, shear, zoom and flip of every sample of a batch and
+    composes them into one affine transform per sample -> tf.Tensor
+    The ranges are those of the ImageDataGenerator constants, draws are stateless so the
+    same seed always gives the same transforms.
+
+    Args:
+    batch_size (int): Number of samples
+    image_height (int): Height of the images
+    image_width (int): Width of the images
+    seed (tf.Tensor): Stateless seed of shape [2]
+
+    Returns:
+    1. Transforms of shape [batch_size, 8], mapping output pixels to input pixels in the
+       layout of ImageProjectiveTransformV3 (tf.Tensor)
+
+    """
+
+    seeds = tf.random.experimental.stateless_split(seed, num=6)
+
+    def uniform(index, limit):
+        return tf.random.stateless_uniform([batch_size], seed=seeds[index], minval=-limit, maxval=limit)
+
+    zoom = 1.0 + tf.random.stateless_uniform([2, batch_size], seed=seeds[4], minval=-ZOOM_RANGE, maxval=ZOOM_RANGE)
+
+    a00, a01, a10, a11, b0, b1 = compose_affine_matrices(
+        theta=uniform(0, math.radians(ROTATION_RANGE)),
+        shift_rows=uniform(1, HEIGHT_SHIFT_RANGE) * image_height,
+        shift_cols=uniform(2, WIDTH_SHIFT_RANGE) * image_width,
+        shear=uniform(3, math.radians(SHEAR_RANGE)),
+        zoom_rows=zoom[0], zoom_cols=zoom[1],
+        is_flipped=tf.random.stateless_uniform([batch_size], seed=seeds[5]) < (0.5 if HORIZONTAL_FLIP else 0.0),
+        image_height=image_height, image_width=image_width, xp=tf)
+
+    # (x, y) = (col, row) layout of the projective transform op
+    zeros = tf.zeros_like(a00)
+    return tf.stack([a11, a10, b1, a01, a00, b0, zeros, zeros], axis=1)
+
+
+def augment_batch(images:tf.Tensor, seed) -> tf.Tensor:
+
+    """
+    Applies a random affine transform to every image of a batch with a single warp -> tf.Tensor
+
+    Args:
+    images (tf.Tensor): Float images of shape [batch, height, width, channels]
+    seed (tf.Tensor): Stateless seed of shape [2]
+
+    Returns:
+    1. Augmented images, borders are filled with the nearest pixel (tf.Tensor)
+
+    """
+
+    image_shape = tf.shape(images)
+    transforms = get_affine_transforms(image_shape[0], images.shape[1], images.shape[2], seed)
+
+    return tf.raw_ops.ImageProjectiveTransformV3(images=images, transforms=transforms, output_shape=image_shape[1:3],
+                                                 fill_value=0.0, interpolation=AUGMENTATION_INTERPOLATION,
+                                                 fill_mode=AUGMENTATION_FILL_MODE)
+
+
+def get_affine_matrices(batch_size:int, image_height:int, image_width:int, rng:np.random.Generator) -> np.ndarray:
+
+    """
+    Draws the random rotation, shift, shear, zoom and flip of every sample of a batch and
+    composes them into one affine matrix per sample, with numpy -> np.ndarray
+
+    Args:
+    batch_size (int): Number of samples
+    image_height (int): Height of the images
+    image_width (int): Width of the images
+    rng (np.random.Generator): Seeded random generator
+
+    Returns:
+    1. Matrices of shape [batch_size, 2, 3] mapping an output pixel (row, col, 1) to the input pixel (np.ndarray)
+
+    """
+
+    def uniform(limit):
+        return rng.uniform(-limit, limit, batch_size)
+
+    a00, a01, a10, a11, b0, b1 = compose_affine_matrices(
+        theta=uniform(math.radians(ROTATION_RANGE)),
+        shift_rows=uniform(HEIGHT_SHIFT_RANGE) * image_height,
+        shift_cols=uniform(WIDTH_SHIFT_RANGE) * image_width,
+        shear=uniform(math.radians(SHEAR_RANGE)),
+        zoom_rows=1.0 + uniform(ZOOM_RANGE), zoom_cols=1.0 + uniform(ZOOM_RANGE),
+        is_flipped=rng.random(batch_size) < (0.5 if HORIZONTAL_FLIP else 0.0),
+        image_height=image_height, image_width=image_width, xp=np)
+
+    return np.stack([np.stack([a00, a01, b0], axis=1), np.stack([a10, a11, b1], axis=1)], axis=1)
+
+
+def warp_batch(images:np.ndarray, matrices:np.ndarray) -> np.ndarray:
+
+    """
+    Warps every image of a batch with its affine matrix in one vectorized pass -> np.ndarray
+    Pixels are sampled bilinearly, borders are filled with the nearest pixel.
+
+    Args:
+    images (np.ndarray): Images of shape [batch, height, width, channels]
+    matrices (np.ndarray): Matrices of shape [batch, 2, 3] returned by get_affine_matrices
+
+    Returns:
+    1. Warped float32 images of shape [batch, height, width, channels] (np.ndarray)
+
+    """
+
+    batch_size, image_height, image_width, channels = images.shape
+    matrices = matrices.astype(np.float32)
+
+    rows = np.arange(image_height, dtype=np.float32)[:, None]
+    cols = np.arange(image_width, dtype=np.float32)[None, :]
+
+    # Input coordinates of every output pixel of every sample, clipped to the image for nearest fill
+    source_rows = matrices[:, 0, 0, None, None] * rows + (matrices[:, 0, 1, None, None] * cols + matrices[:, 0, 2, None, None])
+    source_cols = matrices[:, 1, 0, None, None] * rows + (matrices[:, 1, 1, None, None] * cols + matrices[:, 1, 2, None, None])
+    np.clip(source_rows, 0, image_height - 1, out=source_rows)
+    np.clip(source_cols, 0, image_width - 1, out=source_cols)
+
+    # Top left neighbour, kept one pixel off the last row and column so all four neighbours are valid
+    top_rows = np.minimum(source_rows.astype(np.int32), image_height - 2)
+    left_cols = np.minimum(source_cols.astype(np.int32), image_width - 2)
+    row_weights = (source_rows - top_rows)[..., None]
+    col_weights = (source_cols - left_cols)[..., None]
+
+    top_left_indices = top_rows * image_width
+    top_left_indices += left_cols
+    top_left_indices += (np.arange(batch_size, dtype=np.int32) * image_height * image_width)[:, None, None]
+
+    # Four gathers over the flattened batch instead of one interpolation per image
+    flat_images = images.reshape(-1, channels).astype(np.float32, copy=False)
+    top = flat_images.take(top_left_indices, axis=0)
+    top_right = flat_images.take(top_left_indices + 1, axis=0)
+    bottom = flat_images.take(top_left_indices + image_width, axis=0)
+    bottom_right = flat_images.take(top_left_indices + (image_width + 1), axis=0)
+
+    # In place interpolation along the columns, then along the rows
+    top_right -= top
+    top_right *= col_weights
+    top += top_right
+    bottom_right -= bottom
+    bottom_right *= col_weights
+    bottom += bottom_right
+    bottom -= top
+    bottom *= row_weights
+    top += bottom
+
+    return top
+
+
+def augment_numpy_batch(images:np.ndarray, rng:np.random.Generator) -> np.ndarray:
+
+    """
+    Applies a random affine transform to every image of a batch with a single numpy warp -> np.ndarray
+
+    Args:
+    images (np.ndarray): Images of shape [batch, height, width, channels]
+    rng (np.random.Generator): Seeded random generator
+
+    Returns:
+    1. Augmented float32 images (np.ndarray)
+
+    """
+
+    return warp_batch(images, get_affine_matrices(images.shape[0], images.shape[1], images.shape[2], rng))
@@ -0,0 +1,361 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+from six.moves import urllib, http_client
+from src.constant import *
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.profiler import profiled
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class DownloadManager:
+
+    """
+    Downloads a file in chunks, resumes interrupted transfers with HTTP Range requests
+    and keeps every verified file in a content addressed cache.
+
+    Cache layout: cache_dir/<sha256 of url>/<sha256 of content>.zip
+    """
+
+    def __init__(self, cache_dir:str, chunk_size:int = DOWNLOAD_CHUNK_SIZE,
+                 max_retries:int = DOWNLOAD_MAX_RETRIES, timeout:int = DOWNLOAD_TIMEOUT):
+        try:
+            self.cache_dir = cache_dir
+            self.chunk_size = chunk_size
+            self.max_retries = max_retries
+            self.timeout = timeout
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    @staticmethod
+    def get_file_sha256(file_path:str, chunk_size:int = DOWNLOAD_CHUNK_SIZE) -> str:
+
+        """
+        Returns the hex sha256 digest of a file, read in chunks.
+
+            Parameters: file_path (str), chunk_size (int)
+
+            Returns:
+                sha256 (str)
+        """
+
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                sha256.update(chunk)
+
+        return sha256.hexdigest()
+
+    def get_url_cache_dir(self, url:str) -> str:
+
+        """
+        Returns the cache directory of a source url.
+
+            Parameters: url (str)
+
+            Returns:
+                url_cache_dir (str)
+        """
+
+        url_cache_dir = os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest()[:DOWNLOAD_URL_KEY_LENGTH])
+        os.makedirs(url_cache_dir, exist_ok=True)
+
+        return url_cache_dir
+
+    def get_cache_index(self, url:str) -> dict:
+
+        """
+        Returns the sha256, size and validators of the last verified download of the url.
+
+            Parameters: url (str)
+
+            Returns:
+                cache_index (dict): None when the url was never downloaded
+        """
+
+        cache_index_file_path = os.path.join(self.get_url_cache_dir(url), DOWNLOAD_CACHE_INDEX_FILE_NAME)
+        if not os.path.exists(cache_index_file_path):
+            return None
+
+        with open(cache_index_file_path) as cache_index_file:
+            return json.load(cache_index_file)
+
+    def get_cached_file_path(self, url:str, sha256:str = None) -> str:
+
+        """
+        Returns the path of a verified cached file for the url or None.
+        Without an expected sha256 the last verified download of the url is returned,
+        which has to be revalidated with the source before it is used.
+
+            Parameters: url (str), sha256 (str)
+
+            Returns:
+                cached_file_path (str)
+        """
+
+        try:
+            if sha256 is None:
+                cache_index = self.get_cache_index(url)
+                sha256 = cache_index[DOWNLOAD_SHA256_KEY] if cache_index is not None else None
+
+            if sha256 is None:
+                return None
+
+            sha256 = sha256.lower()
+
+            cached_file_path = os.path.join(self.get_url_cache_dir(url), sha256 + ZIP_EXTENSION)
+
+            return cached_file_path if os.path.exists(cached_file_path) else None
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    @staticmethod
+    def get_validators(headers) -> dict:
+
+        """
+        Returns the validators of a response, used to revalidate and resume downloads.
+
+            Parameters: headers (http.client.HTTPMessage)
+
+            Returns:
+                validators (dict): ETag and Last-Modified, None when not sent
+        """
+
+        return {DOWNLOAD_ETAG_KEY: headers.get('ETag'), DOWNLOAD_LAST_MODIFIED_KEY: headers.get('Last-Modified')}
+
+    @staticmethod
+    def get_if_range(validators:dict) -> str:
+
+        """
+        Returns the If-Range value of a resumed download, a strong ETag or else the Last-Modified date.
+
+            Parameters: validators (dict)
+
+            Returns:
+                if_range (str): None when the version of the partial download is unknown
+        """
+
+        etag = validators.get(DOWNLOAD_ETAG_KEY)
+        if etag is not None and not etag.startswith('W/'):
+            return etag
+
+        return validators.get(DOWNLOAD_LAST_MODIFIED_KEY)
+
+    def get_source_version(self, url:str) -> dict:
+
+        """
+        Returns the version of the source, read with a HEAD request. When the source can not be
+        reached, the version of the last verified download is returned.
+
+            Parameters: url (str)
+
+            Returns:
+                source_version (dict): ETag, Last-Modified and size, None when nothing is known
+        """
+
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, method='HEAD'), timeout=self.timeout) as response:
+                content_length = response.headers.get('Content-Length')
+                return {**self.get_validators(response.headers),
+                        DOWNLOAD_SIZE_KEY: int(content_length) if content_length is not None else None}
+
+        except (urllib.error.URLError, http_client.HTTPException, IOError) as e:
+            logging.info(f"Can not read the version of [{url}] : [{e}]")
+
+            cache_index = self.get_cache_index(url)
+            if cache_index is None:
+                return None
+
+            return {key: cache_index.get(key) for key in (DOWNLOAD_ETAG_KEY, DOWNLOAD_LAST_MODIFIED_KEY, DOWNLOAD_SIZE_KEY)}
+
+    def download_part(self, url:str, part_file_path:str, cache_index:dict = None) -> bool:
+
+        """
+        Downloads the url into part_file_path, continuing from the bytes already present when the
+        source is still the version they came from. With cache_index, a new download is a conditional
+        request that the source answers with 304 when the cached copy is up to date.
+
+            Parameters: url (str), part_file_path (str), cache_index (dict): Index of the cached copy to revalidate
+
+            Returns:
+                is_modified (bool): False when the cached copy is up to date and nothing was downloaded
+        """
+
+        part_info_file_path = os.path.join(os.path.dirname(part_file_path), DOWNLOAD_PART_INFO_FILE_NAME)
+
+        downloaded_size = os.path.getsize(part_file_path) if os.path.exists(part_file_path) else 0
+
+        part_validators = {}
+        if downloaded_size > 0 and os.path.exists(part_info_file_path):
+            with open(part_info_file_path) as part_info_file:
+                part_validators = json.load(part_info_file)
+
+        if_range = self.get_if_range(part_validators)
+
+        # Bytes of an unknown version of the file can not be continued safely
+        if downloaded_size > 0 and if_range is None:
+            logging.info(f"Restarting download of [{url}], the version of the partial download is unknown")
+            downloaded_size = 0
+
+        request = urllib.request.Request(url)
+        if downloaded_size > 0:
+            request.add_header('Range', f"bytes={downloaded_size}-")
+            request.add_header('If-Range', if_range)
+            logging.info(f"Resuming download of [{url}] from byte [{downloaded_size}]")
+        elif cache_index is not None:
+            if cache_index.get(DOWNLOAD_ETAG_KEY) is not None:
+                request.add_header('If-None-Match', cache_index[DOWNLOAD_ETAG_KEY])
+            if cache_index.get(DOWNLOAD_LAST_MODIFIED_KEY) is not None:
+                request.add_header('If-Modified-Since', cache_index[DOWNLOAD_LAST_MODIFIED_KEY])
+
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            # Cached copy is still the current version of the source
+            if e.code == 304 and downloaded_size == 0 and cache_index is not None:
+                return False
+            # Requested range starts at the end of the file, the part is already complete
+            if e.code == 416 and downloaded_size > 0:
+                return True
+            raise
+
+        with response:
+            is_resumed = downloaded_size > 0 and response.getcode() == 206
+
+            if is_resumed:
+                content_range = response.headers.get('Content-Range', '')
+                if not content_range.startswith(f"bytes {downloaded_size}-"):
+                    raise IOError(f"Unexpected Content-Range [{content_range}] resuming [{url}] from byte [{downloaded_size}]")
+            else:
+                # Source changed since the part was started or ignores ranges, it is downloaded again from zero
+                if downloaded_size > 0:
+                    logging.info(f"Source of [{url}] changed or does not support ranges, downloading it again")
+
+                with open(part_info_file_path, 'w') as part_info_file:
+                    json.dump(self.get_validators(response.headers), part_info_file)
+
+            file_mode = 'ab' if is_resumed else 'wb'
+
+            with open(part_file_path, file_mode) as part_file:
+                shutil.copyfileobj(response, part_file, self.chunk_size)
+                written_size = part_file.tell() - (downloaded_size if file_mode == 'ab' else 0)
+
+            content_length = response.headers.get('Content-Length')
+
+        if content_length is not None and written_size < int(content_length):
+            raise IOError(f"Incomplete download of [{url}]")
+
+        return True
+
+    @profiled
+    def download(self, url:str, sha256:str = None) -> str:
+
+        """
+        Returns the path of a verified copy of the url in the cache, downloading only
+        what is missing. Interrupted transfers are retried and resumed. Without an expected
+        sha256 the cached copy is revalidated with the source and downloaded again when it
+        changed; it is still used when the source can not be reached.
+
+            Parameters: url (str), sha256 (str): Expected sha256 of the file, optional
+
+            Returns:
+                cached_file_path (str)
+        """
+
+        try:
+            url_cache_dir = self.get_url_cache_dir(url)
+
+            with open(os.path.join(url_cache_dir, DOWNLOAD_LOCK_FILE_NAME), 'w') as lock_file:
+
+                # Only one pipeline run downloads a url at a time, the others wait and reuse it
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                cached_file_path = self.get_cached_file_path(url, sha256)
+
+                # Content of an expected sha256 never changes, it needs no revalidation
+                if cached_file_path is not None and sha256 is not None:
+                    logging.info(f"Using cached download : [{cached_file_path}]")
+                    return cached_file_path
+
+                cache_index = self.get_cache_index(url) if cached_file_path is not None else None
+
+                part_file_path = os.path.join(url_cache_dir, DOWNLOAD_PART_FILE_NAME)
+
+                for attempt in range(1, self.max_retries + 1):
+                    try:
+                        is_modified = self.download_part(url, part_file_path, cache_index)
+                        break
+                    except (urllib.error.URLError, http_client.HTTPException, IOError) as e:
+                        logging.info(f"Download attempt [{attempt}] of [{url}] failed : [{e}]")
+                        if cache_index is not None:
+                            logging.info(f"Can not revalidate [{url}], using cached download : [{cached_file_path}]")
+                            return cached_file_path
+                        if attempt == self.max_retries:
+                            raise
+                        time.sleep(min(2 ** attempt, 30))
+
+                if not is_modified:
+                    logging.info(f"Cached download of [{url}] is up to date : [{cached_file_path}]")
+                    return cached_file_path
+
+                downloaded_sha256 = self.get_file_sha256(part_file_path, self.chunk_size)
+
+                part_info_file_path = os.path.join(url_cache_dir, DOWNLOAD_PART_INFO_FILE_NAME)
+                with open(part_info_file_path) as part_info_file:
+                    validators = json.load(part_info_file)
+
+                if sha256 is not None and downloaded_sha256 != sha256.lower():
+                    os.remove(part_file_path)
+                    os.remove(part_info_file_path)
+                    raise Exception(f"Checksum mismatch for [{url}] : expected [{sha256}], got [{downloaded_sha256}]")
+
+                cached_file_path = os.path.join(url_cache_dir, downloaded_sha256 + ZIP_EXTENSION)
+                os.replace(part_file_path, cached_file_path)
+                os.remove(part_info_file_path)
+
+                with open(os.path.join(url_cache_dir, DOWNLOAD_CACHE_INDEX_FILE_NAME), 'w') as cache_index_file:
+                    json.dump({DOWNLOAD_URL_KEY: url, DOWNLOAD_SHA256_KEY: downloaded_sha256,
+                               DOWNLOAD_SIZE_KEY: os.path.getsize(cached_file_path), **validators}, cache_index_file, indent=4)
+
+                logging.info(f"Download of [{url}] verified with sha256 [{downloaded_sha256}]")
+
+                return cached_file_path
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    @staticmethod
+    def link_file(source_file_path:str, target_file_path:str) -> str:
+
+        """
+        Places a cached file at target_file_path without copying its bytes when possible.
+
+            Parameters: source_file_path (str), target_file_path (str)
+
+            Returns:
+                target_file_path (str)
+        """
+
+        try:
+            if os.path.lexists(target_file_path):
+                os.remove(target_file_path)
+
+            try:
+                os.link(source_file_path, target_file_path)
+            except OSError:
+                os.symlink(os.path.abspath(source_file_path), target_file_path)
+
+            return target_file_path
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
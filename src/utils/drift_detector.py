@@ -0,0 +1,210 @@
+import sys
+import html
+import numpy as np
+import pandas as pd
+from src.constant import *
+from src.exception import CustomException
+from src.utils.profiler import profiled
+
+
+def ks_2samp(reference:np.ndarray, current:np.ndarray) -> tuple:
+
+    """
+    Two sample Kolmogorov-Smirnov test, vectorized with numpy -> tuple[float,float]
+
+    Args:
+    reference (np.ndarray): Reference sample
+    current (np.ndarray): Current sample
+
+    Returns:
+    1. KS statistic (float)
+    2. Asymptotic p-value (float)
+
+    """
+
+    reference = np.sort(reference[~np.isnan(reference)])
+    current = np.sort(current[~np.isnan(current)])
+
+    if len(reference) == 0 or len(current) == 0:
+        return 0.0, 1.0
+
+    # Both empirical cdfs evaluated on all points at once
+    all_values = np.concatenate([reference, current])
+    reference_cdf = np.searchsorted(reference, all_values, side='right') / len(reference)
+    current_cdf = np.searchsorted(current, all_values, side='right') / len(current)
+    statistic = float(np.max(np.abs(reference_cdf - current_cdf)))
+
+    effective_size = len(reference) * len(current) / (len(reference) + len(current))
+    sqrt_effective_size = np.sqrt(effective_size)
+    lam = (sqrt_effective_size + 0.12 + 0.11 / sqrt_effective_size) * statistic
+
+    if lam < 1e-3:
+        return statistic, 1.0
+
+    terms = np.arange(1, DRIFT_KS_SERIES_TERMS + 1)
+    p_value = 2 * np.sum((-1) ** (terms - 1) * np.exp(-2 * terms ** 2 * lam ** 2))
+
+    return statistic, float(np.clip(p_value, 0.0, 1.0))
+
+
+def compare_histograms(reference_counts:np.ndarray, current_counts:np.ndarray) -> dict:
+
+    """
+    Compares two aggregated intensity histograms -> dict
+
+    Args:
+    reference_counts (np.ndarray): Pixel counts per bin of the reference split
+    current_counts (np.ndarray): Pixel counts per bin of the current split
+
+    Returns:
+    1. Population stability index, Jensen-Shannon distance and drift flag (dict)
+
+    """
+
+    reference_distribution = reference_counts / max(reference_counts.sum(), 1) + DRIFT_HISTOGRAM_EPSILON
+    current_distribution = current_counts / max(current_counts.sum(), 1) + DRIFT_HISTOGRAM_EPSILON
+
+    psi = float(np.sum((current_distribution - reference_distribution) * np.log(current_distribution / reference_distribution)))
+
+    mixture = (reference_distribution + current_distribution) / 2
+    js_divergence = 0.5 * np.sum(reference_distribution * np.log2(reference_distribution / mixture)) + \
+                    0.5 * np.sum(current_distribution * np.log2(current_distribution / mixture))
+
+    return {'psi': psi, 'js_distance': float(np.sqrt(max(js_divergence, 0.0))), DRIFT_DETECTED_KEY: psi > DRIFT_PSI_THRESHOLD}
+
+
+def get_drift_features(image_stats:pd.DataFrame) -> pd.DataFrame:
+
+    """
+    Returns the per image features compared between splits -> pd.DataFrame
+
+    Args:
+    image_stats (pd.DataFrame): Image stats table of validate_images, corrupt images are ignored
+
+    Returns:
+    1. Mean and std intensity, width, height and aspect ratio of every image (pd.DataFrame)
+
+    """
+
+    image_stats = image_stats[~image_stats[IS_CORRUPT]]
+    drift_features = image_stats[[SPLIT_NAME, IMAGE_MEAN_INTENSITY, IMAGE_STD_INTENSITY, IMAGE_WIDTH, IMAGE_HEIGHT]].astype(
+        {IMAGE_WIDTH: 'float64', IMAGE_HEIGHT: 'float64'})
+    drift_features[IMAGE_ASPECT_RATIO] = drift_features[IMAGE_WIDTH] / drift_features[IMAGE_HEIGHT]
+
+    return drift_features
+
+
+@profiled
+def get_data_drift_report(image_stats:pd.DataFrame, reference_split:str = TRAIN_DATA) -> dict:
+
+    """
+    Compares every split with the reference split using per image summaries -> dict
+    Only the per image stats are needed, no image is loaded. The reference split needs at least
+    one decodable image.
+
+    Args:
+    image_stats (pd.DataFrame): Image stats table of validate_images with a Split column
+    reference_split (str): Split the others are compared with
+
+    Returns:
+    1. Data drift report with per split summaries, KS tests of the per image features,
+       intensity histogram comparisons and drift flags (dict)
+
+    """
+
+    try:
+        drift_features = get_drift_features(image_stats)
+        valid_image_stats = image_stats[~image_stats[IS_CORRUPT]]
+
+        # Aggregated histograms of all splits in one groupby
+        split_histograms = valid_image_stats.groupby(SPLIT_NAME, observed=True)[INTENSITY_HISTOGRAM_COLUMNS].sum()
+        split_features = {split: split_df for split, split_df in drift_features.groupby(SPLIT_NAME, observed=True)}
+
+        split_summaries = {}
+        for split, split_df in split_features.items():
+            split_summaries[split] = {'image_count': int(len(split_df))}
+            for column in DRIFT_FEATURE_COLUMNS:
+                split_summaries[split][column] = {'mean': float(split_df[column].mean()), 'std': float(split_df[column].std(ddof=0))}
+
+        if reference_split not in split_features:
+            raise ValueError(f"Reference split [{reference_split}] has no decodable images, "
+                             f"data drift can not be computed. Check the corrupt images in the image stats")
+
+        comparisons = {}
+        reference_features = split_features[reference_split]
+        reference_histogram = split_histograms.loc[reference_split].to_numpy(dtype=np.float64)
+
+        for split, split_df in split_features.items():
+            if split == reference_split:
+                continue
+
+            feature_tests = {}
+            for column in DRIFT_FEATURE_COLUMNS:
+                statistic, p_value = ks_2samp(reference_features[column].to_numpy(), split_df[column].to_numpy())
+                feature_tests[column] = {'ks_statistic': statistic, 'p_value': p_value,
+                                         DRIFT_DETECTED_KEY: p_value < DRIFT_P_VALUE_THRESHOLD}
+
+            histogram_test = compare_histograms(reference_histogram, split_histograms.loc[split].to_numpy(dtype=np.float64))
+
+            comparisons[split] = {
+                DRIFT_FEATURES_KEY: feature_tests,
+                DRIFT_HISTOGRAM_KEY: histogram_test,
+                DRIFT_DETECTED_KEY: histogram_test[DRIFT_DETECTED_KEY] or any(test[DRIFT_DETECTED_KEY] for test in feature_tests.values())
+            }
+
+        return {
+            DRIFT_REFERENCE_KEY: reference_split,
+            DRIFT_SPLIT_SUMMARIES_KEY: split_summaries,
+            DRIFT_COMPARISONS_KEY: comparisons,
+            DRIFT_DETECTED_KEY: any(comparison[DRIFT_DETECTED_KEY] for comparison in comparisons.values())
+        }
+
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def render_data_drift_report_page(report:dict) -> str:
+
+    """
+    Renders a data drift report as a standalone html page -> str
+
+    Args:
+    report (dict): Data drift report of get_data_drift_report
+
+    Returns:
+    1. Html page (str)
+
+    """
+
+    rows = []
+    for split, comparison in report[DRIFT_COMPARISONS_KEY].items():
+        for feature, test in comparison[DRIFT_FEATURES_KEY].items():
+            rows.append((split, feature, 'KS', f"{test['ks_statistic']:.4f}", f"{test['p_value']:.4g}", test[DRIFT_DETECTED_KEY]))
+
+        histogram_test = comparison[DRIFT_HISTOGRAM_KEY]
+        rows.append((split, DRIFT_HISTOGRAM_KEY, 'PSI / JS', f"{histogram_test['psi']:.4f}",
+                     f"{histogram_test['js_distance']:.4f}", histogram_test[DRIFT_DETECTED_KEY]))
+
+    table_rows = ''.join(
+        f"<tr class=\"{'drift' if is_drift else ''}\">" + ''.join(f"<td>{html.escape(str(cell))}</td>" for cell in row[:-1]) +
+        f"<td>{'Yes' if is_drift else 'No'}</td></tr>"
+        for row in rows for is_drift in [row[-1]])
+
+    summary_rows = ''.join(
+        f"<tr><td>{html.escape(split)}</td><td>{summary['image_count']}</td>" +
+        ''.join(f"<td>{summary[column]['mean']:.2f} &plusmn; {summary[column]['std']:.2f}</td>" for column in DRIFT_FEATURE_COLUMNS) +
+        "</tr>"
+        for split, summary in report[DRIFT_SPLIT_SUMMARIES_KEY].items())
+
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Data Drift Report</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse;margin-bottom:2em}}
+td,th{{border:1px solid #ccc;padding:4px 8px}}tr.drift{{background:#fdd}}</style></head>
+<body><h1>Data Drift Report</h1>
+<p>Reference split : <b>{html.escape(report[DRIFT_REFERENCE_KEY])}</b>, drift detected : <b>{'Yes' if report[DRIFT_DETECTED_KEY] else 'No'}</b></p>
+<h2>Split summaries</h2>
+<table><tr><th>Split</th><th>Images</th>{''.join(f'<th>{html.escape(column)}</th>' for column in DRIFT_FEATURE_COLUMNS)}</tr>{summary_rows}</table>
+<h2>Tests against the reference split</h2>
+<table><tr><th>Split</th><th>Feature</th><th>Test</th><th>Statistic</th><th>p-value / JS distance</th><th>Drift</th></tr>{table_rows}</table>
+</body></html>
+"""
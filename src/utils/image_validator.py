@@ -0,0 +1,240 @@
+import io
+import os
+import sys
+import hashlib
+import multiprocessing
+import pandas as pd
+from PIL import Image, ImageStat
+from concurrent.futures import ProcessPoolExecutor
+from src.constant import *
+from src.exception import CustomException
+from src.utils.utils import is_columnar_manifest_supported, read_image_bytes, fill_content_hashes
+from src.utils.profiler import profiled
+
+
+# Bits per channel of the PIL image modes
+IMAGE_MODE_BIT_DEPTHS = {'1': 1, 'L': 8, 'P': 8, 'RGB': 8, 'RGBA': 8, 'CMYK': 8, 'YCbCr': 8, 'LA': 8,
+                         'I;16': 16, 'I;16B': 16, 'I;16L': 16, 'I': 32, 'F': 32}
+
+
+def get_image_stats(image_path:str) -> dict:
+
+    """
+    Checks the header of an image, decodes it and returns its stats -> dict
+    Runs in a worker process, so it only depends on its argument.
+
+    Args:
+    image_path (str): Path of the image file, or a streamed path (archive.zip!member)
+
+    Returns:
+    1. Content hash, format, width, height, channels, bit depth, mean and std intensity,
+       intensity histogram, corruption flag and error (dict)
+
+    """
+
+    image_stats = {LABEL_IMAGE_PATH: image_path, CONTENT_HASH: None, IMAGE_FORMAT: None, IMAGE_WIDTH: 0,
+                   IMAGE_HEIGHT: 0, IMAGE_CHANNELS: 0, IMAGE_BIT_DEPTH: 0, IMAGE_MEAN_INTENSITY: 0.0,
+                   IMAGE_STD_INTENSITY: 0.0, IS_CORRUPT: True, IMAGE_ERROR: None}
+    image_stats.update(dict.fromkeys(INTENSITY_HISTOGRAM_COLUMNS, 0))
+
+    try:
+        image_bytes = read_image_bytes(image_path)
+        image_stats[CONTENT_HASH] = hashlib.sha256(image_bytes).hexdigest()
+
+        # Header and structure check, verify() leaves the image unusable so it is opened again to decode
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            image.verify()
+
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            image.load()
+
+            image_stats.update({
+                IMAGE_FORMAT: image.format,
+                IMAGE_WIDTH: image.width,
+                IMAGE_HEIGHT: image.height,
+                IMAGE_CHANNELS: len(image.getbands()),
+                IMAGE_BIT_DEPTH: IMAGE_MODE_BIT_DEPTHS.get(image.mode, 0),
+                IS_CORRUPT: False
+            })
+            
+            # Intensity summary of the decoded pixels, used for drift detection
+            gray_image = image.convert('L')
+            gray_image_stat = ImageStat.Stat(gray_image)
+            image_stats[IMAGE_MEAN_INTENSITY] = gray_image_stat.mean[0]
+            image_stats[IMAGE_STD_INTENSITY] = gray_image_stat.stddev[0]
+            
+            pixel_counts = gray_image.histogram()
+            bin_width = len(pixel_counts) // INTENSITY_HISTOGRAM_BINS
+            for bin_index, column in enumerate(INTENSITY_HISTOGRAM_COLUMNS):
+                image_stats[column] = sum(pixel_counts[bin_index * bin_width:(bin_index + 1) * bin_width])
+
+    except Exception as e:
+        image_stats[IMAGE_ERROR] = f"{type(e).__name__}: {e}"
+
+    return image_stats
+
+
+def read_stats_table(file_path:str) -> pd.DataFrame:
+
+    """
+    Reads a stats table written by write_stats_table -> pd.DataFrame
+
+    Args:
+    file_path (str): Path of the arrow or csv file
+
+    Returns:
+    1. Stats table, empty when the file does not exist (pd.DataFrame)
+
+    """
+
+    try:
+        if not os.path.exists(file_path):
+            return pd.DataFrame()
+
+        if file_path.endswith(ARROW_EXTENSION):
+            return pd.read_feather(file_path)
+
+        return pd.read_csv(file_path)
+
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def write_stats_table(stats_table:pd.DataFrame, file_path:str) -> None:
+
+    """
+    Writes a stats table, atomically replacing an existing file -> None
+
+    Args:
+    stats_table (pd.DataFrame): Stats table
+    file_path (str): Path of the arrow or csv file
+
+    Returns: None
+
+    """
+
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_file_path = file_path + '.tmp'
+
+        if file_path.endswith(ARROW_EXTENSION):
+            stats_table.reset_index(drop=True).to_feather(temp_file_path)
+        else:
+            stats_table.to_csv(temp_file_path, index=False)
+
+        os.replace(temp_file_path, file_path)
+
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def get_stats_table_extension() -> str:
+
+    """
+    Returns the file extension of stats tables -> str
+
+    Returns:
+    1. .arrow when pyarrow is installed, else .csv (str)
+
+    """
+
+    return ARROW_EXTENSION if is_columnar_manifest_supported() else CSV_EXTENSION
+
+
+def compact_image_stats(stats_table:pd.DataFrame) -> pd.DataFrame:
+
+    """
+    Downcasts the columns of an image stats table -> pd.DataFrame
+
+    Args:
+    stats_table (pd.DataFrame): Image stats table
+
+    Returns:
+    1. Image stats table with small integer and categorical columns (pd.DataFrame)
+
+    """
+
+    column_types = {IMAGE_WIDTH: 'int32', IMAGE_HEIGHT: 'int32', IMAGE_CHANNELS: 'uint8',
+                    IMAGE_BIT_DEPTH: 'uint8', IS_CORRUPT: 'bool', IMAGE_FORMAT: 'category',
+                    IMAGE_MEAN_INTENSITY: 'float32', IMAGE_STD_INTENSITY: 'float32'}
+    column_types.update(dict.fromkeys(INTENSITY_HISTOGRAM_COLUMNS, 'int64'))
+
+    return stats_table.astype({column: column_type for column, column_type in column_types.items()
+                               if column in stats_table.columns})
+
+
+@profiled
+def validate_images(image_paths:list, content_hashes:list = None, cache_file_path:str = None,
+                    max_workers:int = None) -> pd.DataFrame:
+
+    """
+    Checks and decodes images on a process pool and returns a per image stats table -> pd.DataFrame
+    Stats are cached by content hash, so images already checked by an earlier run are not decoded again.
+    Images without a known content hash are hashed first, which only reads their bytes.
+
+    Args:
+    image_paths (list): Paths of the images
+    content_hashes (list): Known content hashes of the images (from the ingestion manifest), optional
+                           Missing ones are hashed when a cache is used
+    cache_file_path (str): Path of the stats cache shared by all runs, optional
+    max_workers (int): Number of worker processes, defaults to the number of cpus
+
+    Returns:
+    1. Stats table in the order of image_paths with Content_Hash, Image_Format, Image_Width, Image_Height,
+       Image_Channels, Image_Bit_Depth, Is_Corrupt, Image_Error and Is_Duplicate columns (pd.DataFrame)
+
+    """
+
+    try:
+        max_workers = max_workers or os.cpu_count() or 1
+
+        stats_cache = read_stats_table(cache_file_path) if cache_file_path is not None else pd.DataFrame()
+        # A cache written before new stats columns were added is not used
+        if not set(IMAGE_STATS_COLUMNS).difference([LABEL_IMAGE_PATH, IMAGE_ERROR]).issubset(stats_cache.columns):
+            stats_cache = pd.DataFrame()
+            
+        cached_stats = {}
+        if not stats_cache.empty:
+            cached_stats = stats_cache.drop_duplicates(CONTENT_HASH).set_index(CONTENT_HASH).to_dict(orient='index')
+
+            # Csv manifests carry no content hash, the images are hashed so cached ones are not decoded again
+            content_hashes = fill_content_hashes(image_paths, content_hashes, max_workers=max_workers)
+
+        if content_hashes is None:
+            content_hashes = [None] * len(image_paths)
+
+        image_stats: list = [None] * len(image_paths)
+        paths_to_check: list = []
+        indices_to_check: list = []
+
+        for index, (image_path, content_hash) in enumerate(zip(image_paths, content_hashes)):
+            if content_hash is not None and content_hash in cached_stats:
+                image_stats[index] = dict(cached_stats[content_hash], **{LABEL_IMAGE_PATH: image_path, CONTENT_HASH: content_hash})
+            else:
+                paths_to_check.append(image_path)
+                indices_to_check.append(index)
+
+        # Decoding is cpu bound, images are spread over worker processes in chunks
+        if paths_to_check:
+            chunksize = max(1, len(paths_to_check) // (max_workers * IMAGE_VALIDATION_CHUNKS_PER_WORKER))
+
+            # Spawned, forking this multithreaded process with tensorflow loaded can deadlock the workers
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                for index, stats in zip(indices_to_check, executor.map(get_image_stats, paths_to_check, chunksize=chunksize)):
+                    image_stats[index] = stats
+
+        stats_table = compact_image_stats(pd.DataFrame(image_stats, columns=IMAGE_STATS_COLUMNS))
+        stats_table[IS_DUPLICATE] = stats_table[CONTENT_HASH].notna() & stats_table.duplicated(CONTENT_HASH, keep=False)
+
+        # Only successfully decoded images are cached, corrupt files are checked again on the next run
+        if cache_file_path is not None and paths_to_check:
+            new_stats = stats_table.iloc[indices_to_check]
+            new_stats = new_stats[~new_stats[IS_CORRUPT]].drop(columns=[LABEL_IMAGE_PATH, IS_DUPLICATE])
+            updated_cache = new_stats if stats_cache.empty else pd.concat([stats_cache, new_stats], ignore_index=True)
+            updated_cache = updated_cache.drop_duplicates(CONTENT_HASH, keep='last')
+            write_stats_table(compact_image_stats(updated_cache), cache_file_path)
+
+        return stats_table
+
+    except Exception as e:
+        raise CustomException(e,sys) from e
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import threading
+import pandas as pd
+from src.constant import *
+from src.exception import CustomException
+from src.entity.artifact_entity import DataIngestionArtifact
+from src.logger import logging
+from src.utils.utils import map_splits, read_columnar_manifest
+from src.utils.profiler import profiled
+
+
+class IngestedDataset:
+
+    """
+    Shared, read only handle on the ingested data of every split.
+    Each split is loaded lazily on first use and then reused by every caller, it is
+    loaded again only when the size or mtime of its manifest file changes. Splits have
+    their own locks, so different splits load concurrently.
+    """
+
+    def __init__(self, data_ingestion_artifact: DataIngestionArtifact):
+        try:
+            self.data_ingestion_artifact = data_ingestion_artifact
+            self.split_dfs: dict = {}
+            self.split_signatures: dict = {}
+            self.load_timings: dict = {}
+            self.load_counts: dict = {}
+            self.split_locks: dict = {}
+            self.lock = threading.Lock()
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_split_file_path(self, split:str) -> str:
+
+        """
+        Returns the manifest file that holds a split.
+
+            Parameters: split (str)
+
+            Returns:
+                split_file_path (str): Columnar manifest when ingestion wrote one, else the split csv
+        """
+
+        if self.data_ingestion_artifact.ingested_data_manifest_file_path is not None:
+            return self.data_ingestion_artifact.ingested_data_manifest_file_path
+
+        return self.data_ingestion_artifact.ingested_data_csv_file_paths[split]
+
+    @staticmethod
+    def get_file_signature(file_path:str) -> tuple:
+
+        """
+        Returns the signature used to invalidate a loaded split.
+
+            Parameters: file_path (str)
+
+            Returns:
+                signature (tuple): mtime in nanoseconds and size of the file
+        """
+
+        file_stat = os.stat(file_path)
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    @profiled
+    def get_split_df(self, split:str) -> pd.DataFrame:
+
+        """
+        Returns the dataframe of a split, loading it only when it is not loaded yet or its
+        manifest changed on disk. The dataframe is shared and must not be modified.
+
+            Parameters: split (str)
+
+            Returns:
+                split_df (dataframe)
+        """
+
+        try:
+            split_file_path = self.get_split_file_path(split)
+            signature = self.get_file_signature(split_file_path)
+
+            with self.lock:
+                split_lock = self.split_locks.setdefault(split, threading.Lock())
+
+            with split_lock:
+                if self.split_signatures.get(split) == signature:
+                    return self.split_dfs[split]
+
+                start_time = time.perf_counter()
+
+                if self.data_ingestion_artifact.ingested_data_manifest_file_path is not None:
+                    split_df = read_columnar_manifest(file_path=split_file_path, split=split)
+                else:
+                    split_df = pd.read_csv(split_file_path)
+
+                load_time = time.perf_counter() - start_time
+
+                self.split_dfs[split] = split_df
+                self.split_signatures[split] = signature
+                self.load_timings[split] = self.load_timings.get(split, 0.0) + load_time
+                self.load_counts[split] = self.load_counts.get(split, 0) + 1
+
+                logging.info(f"Loaded [{split}] split with [{len(split_df)}] rows in [{load_time:.4f}] seconds.")
+
+                return split_df
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_split_dfs(self) -> dict:
+
+        """
+        Returns the shared dataframes of every split, loading the splits concurrently.
+
+            Parameters: None
+
+            Returns:
+                split_dfs (dict): split -> dataframe, in the order of the ingested splits
+        """
+
+        return map_splits(self.get_split_df, self.data_ingestion_artifact.splits)
+
+    def get_load_report(self) -> dict:
+
+        """
+        Returns how often and how long each split was loaded.
+
+            Parameters: None
+
+            Returns:
+                load_report (dict): split -> load count and total load time in seconds
+        """
+
+        return {split: {DATASET_LOAD_COUNT_KEY: self.load_counts[split], DATASET_LOAD_TIME_KEY: self.load_timings[split]}
+                for split in self.load_counts}
@@ -0,0 +1,503 @@
+import os
+import sys
+import glob
+import json
+import time
+import pstats
+import cProfile
+import functools
+import threading
+import contextlib
+from src.constant import *
+from src.exception import CustomException
+from src.logger import logging
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+
+def get_io_counters() -> dict:
+
+    """
+    Returns the bytes read and written by this process so far -> dict
+    bytes_read and bytes_written count every read and write call, cached or not,
+    storage_bytes_read and storage_bytes_written only what reached the disk.
+    Linux only, every counter is 0 elsewhere.
+
+    Args: None
+
+    Returns:
+    1. Counter name -> bytes (dict)
+
+    """
+
+    io_counters = {'bytes_read': 0, 'bytes_written': 0, 'storage_bytes_read': 0, 'storage_bytes_written': 0}
+
+    try:
+        with open('/proc/self/io') as io_file:
+            proc_io = dict(line.split(':') for line in io_file.read().splitlines())
+
+        io_counters.update({
+            'bytes_read': int(proc_io['rchar']),
+            'bytes_written': int(proc_io['wchar']),
+            'storage_bytes_read': int(proc_io['read_bytes']),
+            'storage_bytes_written': int(proc_io['write_bytes'])
+        })
+    except (OSError, KeyError, ValueError):
+        pass
+
+    return io_counters
+
+
+def get_rss() -> int:
+
+    """
+    Returns the resident set size of this process in bytes -> int
+    Falls back to the peak resident set size where /proc is not available.
+
+    Args: None
+
+    Returns:
+    1. Resident set size in bytes (int)
+
+    """
+
+    try:
+        with open('/proc/self/statm') as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return 0
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def get_cpu_seconds(is_children:bool = False) -> float:
+
+    """
+    Returns the user and system cpu time of this process, or of its waited for children -> float
+
+    Args:
+    is_children (bool): Cpu time of the children, e.g. of finished process pools, 0 where not available
+
+    Returns:
+    1. Cpu seconds (float)
+
+    """
+
+    if resource is None:
+        return 0.0 if is_children else time.process_time()
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if is_children else resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Profiler:
+
+    """
+    Records timing spans and per stage resource usage of a pipeline run. Disabled until enable is
+    called, a disabled profiler only costs one attribute check per span.
+
+    Spans are kept per process, nested spans know their parent. A stage record holds the wall and
+    cpu time, bytes read and written, files opened and the peak resident set size of its process
+    while the stage ran. Counters are process wide, stages running at once in one process share them.
+    """
+
+    def __init__(self):
+        self.is_enabled = False
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self.spans: list = []
+        self.dropped_span_count = 0
+        self.open_count = 0
+        self.stage_peak_rss: dict = {}
+        self.sampler_thread = None
+
+    def enable(self) -> None:
+
+        """
+        Starts counting opened files and sampling the resident set size. The audit hook
+        can not be removed, it only counts while the profiler is enabled.
+
+            Parameters: None
+
+            Returns: None
+        """
+
+        with self.lock:
+            if self.is_enabled:
+                return
+
+            if self.sampler_thread is None:
+                sys.addaudithook(self.audit_hook)
+                self.sampler_thread = threading.Thread(target=self.sample_rss, name='profiler-rss', daemon=True)
+                self.sampler_thread.start()
+
+            self.is_enabled = True
+
+    def audit_hook(self, event:str, args:tuple) -> None:
+
+        # Reads of the profiler's own /proc counters are not counted
+        if event == 'open' and self.is_enabled and not str(args[0]).startswith('/proc/self/'):
+            with self.lock:
+                self.open_count += 1
+
+    def clear(self) -> None:
+
+        """
+        Drops the spans recorded so far, e.g. of an earlier run of this process.
+
+            Parameters: None
+
+            Returns: None
+        """
+
+        with self.lock:
+            self.spans = []
+            self.dropped_span_count = 0
+
+    def sample_rss(self) -> None:
+
+        """
+        Raises the peak resident set size of every running stage, runs on a daemon thread.
+
+            Parameters: None
+
+            Returns: None
+        """
+
+        while True:
+            if self.stage_peak_rss:
+                rss = get_rss()
+                with self.lock:
+                    for stage in self.stage_peak_rss:
+                        self.stage_peak_rss[stage] = max(self.stage_peak_rss[stage], rss)
+
+            time.sleep(PROFILE_RSS_SAMPLE_INTERVAL)
+
+    @contextlib.contextmanager
+    def span(self, name:str, **args):
+
+        """
+        Records the time spent in a block of code.
+
+            Parameters:
+                name (str), args: Shown with the span in the chrome trace
+
+            Returns: None
+        """
+
+        if not self.is_enabled:
+            yield
+            return
+
+        parents = self.local.__dict__.setdefault('span_names', [])
+        start_time = time.time()
+        start_counter = time.perf_counter()
+        parents.append(name)
+
+        try:
+            yield
+        finally:
+            parents.pop()
+            span = {
+                'name': name,
+                'parent': parents[-1] if parents else None,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'thread': threading.current_thread().name,
+                'start': start_time,
+                'duration': time.perf_counter() - start_counter
+            }
+            if args:
+                span['args'] = args
+
+            with self.lock:
+                if len(self.spans) < PROFILE_MAX_SPANS:
+                    self.spans.append(span)
+                else:
+                    self.dropped_span_count += 1
+
+    @contextlib.contextmanager
+    def stage(self, stage:str, profile_dir:str, deep_profiler:str = None):
+
+        """
+        Profiles a pipeline stage and writes its record into profile_dir, together with the spans
+        of this process, so stages run in other processes are merged by save_run_profile.
+
+            Parameters:
+                stage (str), profile_dir (str)
+                deep_profiler (str): cprofile or pyinstrument, captures every call of the stage, None to skip
+
+            Returns:
+                stage_record (dict): Completed by the stage, e.g. with is_cached
+        """
+
+        self.enable()
+        os.makedirs(profile_dir, exist_ok=True)
+
+        stage_record = {'stage': stage, 'pid': os.getpid(), 'thread': threading.current_thread().name, 'start': time.time()}
+        start_io_counters = get_io_counters()
+        start_cpu_seconds = get_cpu_seconds()
+        start_children_cpu_seconds = get_cpu_seconds(is_children=True)
+        start_rss = get_rss()
+
+        with self.lock:
+            start_open_count = self.open_count
+            self.stage_peak_rss[stage] = start_rss
+
+        deep_profile = None
+        if deep_profiler == DEEP_PROFILER_PYINSTRUMENT and pyinstrument is None:
+            logging.info(f"pyinstrument is not installed, deep profiling [{stage}] with cProfile instead.")
+            deep_profiler = DEEP_PROFILER_CPROFILE
+
+        try:
+            if deep_profiler == DEEP_PROFILER_PYINSTRUMENT:
+                deep_profile = pyinstrument.Profiler(async_mode='disabled')
+                deep_profile.start()
+            elif deep_profiler == DEEP_PROFILER_CPROFILE:
+                deep_profile = cProfile.Profile()
+                deep_profile.enable()
+        except Exception as e:
+            # e.g. another stage of this process is deep profiled where only one profiler can be active
+            logging.info(f"Can not deep profile [{stage}] : [{e}]")
+            deep_profiler = None
+
+        start_counter = time.perf_counter()
+
+        try:
+            with self.span(PROFILE_STAGE_SPAN_PREFIX + stage):
+                yield stage_record
+
+        finally:
+            duration = time.perf_counter() - start_counter
+
+            if deep_profiler == DEEP_PROFILER_PYINSTRUMENT:
+                deep_profile.stop()
+                stage_record['deep_profile_file_path'] = os.path.join(profile_dir, stage + PYINSTRUMENT_FILE_EXTENSION)
+                with open(stage_record['deep_profile_file_path'], 'w') as deep_profile_file:
+                    deep_profile_file.write(deep_profile.output_html())
+            elif deep_profiler == DEEP_PROFILER_CPROFILE:
+                deep_profile.disable()
+                stage_record['deep_profile_file_path'] = os.path.join(profile_dir, stage + CPROFILE_FILE_EXTENSION)
+                pstats.Stats(deep_profile).dump_stats(stage_record['deep_profile_file_path'])
+
+            end_io_counters = get_io_counters()
+            end_rss = get_rss()
+
+            with self.lock:
+                open_count = self.open_count - start_open_count
+                peak_rss = max(self.stage_peak_rss.pop(stage), end_rss)
+
+            stage_record.update({
+                'duration_seconds': duration,
+                'cpu_seconds': get_cpu_seconds() - start_cpu_seconds,
+                'children_cpu_seconds': get_cpu_seconds(is_children=True) - start_children_cpu_seconds,
+                'files_opened': open_count,
+                'start_rss': start_rss,
+                'peak_rss': peak_rss,
+                'end_rss': end_rss,
+                **{counter: end_io_counters[counter] - start_io_counters[counter] for counter in end_io_counters}
+            })
+
+            with open(os.path.join(profile_dir, PROFILE_STAGE_FILE_PREFIX + stage + JSON_EXTENTION), 'w') as stage_file:
+                json.dump(stage_record, stage_file, indent=4)
+
+            self.save_spans(profile_dir)
+
+    def save_spans(self, profile_dir:str) -> str:
+
+        """
+        Writes every span recorded by this process so far, one file per process.
+
+            Parameters: profile_dir (str)
+
+            Returns:
+                spans_file_path (str)
+        """
+
+        spans_file_path = os.path.join(profile_dir, PROFILE_SPANS_FILE_PREFIX + str(os.getpid()) + JSON_EXTENTION)
+
+        with self.lock:
+            spans = {'spans': list(self.spans), 'dropped_span_count': self.dropped_span_count}
+
+        temp_file_path = spans_file_path + '.tmp'
+        with open(temp_file_path, 'w') as spans_file:
+            json.dump(spans, spans_file)
+        os.replace(temp_file_path, spans_file_path)
+
+        return spans_file_path
+
+
+# Profiler of this process, used by the profiled decorators
+profiler = Profiler()
+
+
+def profiled(function):
+
+    """
+    Decorates a function so every call is recorded as a span named after it -> function
+
+    Args:
+    function (function)
+
+    Returns:
+    1. Decorated function (function)
+
+    """
+
+    @functools.wraps(function)
+    def profiled_function(*args, **kwargs):
+        if not profiler.is_enabled:
+            return function(*args, **kwargs)
+
+        with profiler.span(function.__qualname__):
+            return function(*args, **kwargs)
+
+    return profiled_function
+
+
+def profile_methods(cls):
+
+    """
+    Decorates a class so every call of its methods is recorded as a span -> class
+    Dunder methods are left out.
+
+    Args:
+    cls (class)
+
+    Returns:
+    1. The class, with profiled methods (class)
+
+    """
+
+    for name, value in list(vars(cls).items()):
+        if name.startswith('__'):
+            continue
+
+        if isinstance(value, staticmethod):
+            setattr(cls, name, staticmethod(profiled(value.__func__)))
+        elif isinstance(value, classmethod):
+            setattr(cls, name, classmethod(profiled(value.__func__)))
+        elif callable(value):
+            setattr(cls, name, profiled(value))
+
+    return cls
+
+
+def get_span_summary(spans:list) -> dict:
+
+    """
+    Aggregates spans by name -> dict
+
+    Args:
+    spans (list): Spans of every process
+
+    Returns:
+    1. Span name -> count, total, mean and max seconds, sorted by total (dict)
+
+    """
+
+    span_summary: dict = {}
+    for span in spans:
+        summary = span_summary.setdefault(span['name'], {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        summary['count'] += 1
+        summary['total_seconds'] += span['duration']
+        summary['max_seconds'] = max(summary['max_seconds'], span['duration'])
+
+    for summary in span_summary.values():
+        summary['mean_seconds'] = summary['total_seconds'] / summary['count']
+
+    return dict(sorted(span_summary.items(), key=lambda item: item[1]['total_seconds'], reverse=True))
+
+
+def get_chrome_trace(spans:list) -> dict:
+
+    """
+    Converts spans into the chrome trace event format, opened by chrome://tracing or Perfetto -> dict
+
+    Args:
+    spans (list): Spans of every process
+
+    Returns:
+    1. Chrome trace (dict)
+
+    """
+
+    trace_events = []
+    thread_names = {}
+
+    for span in spans:
+        trace_events.append({'name': span['name'], 'cat': 'stage' if span['name'].startswith(PROFILE_STAGE_SPAN_PREFIX) else 'span',
+                             'ph': 'X', 'ts': span['start'] * 1e6, 'dur': span['duration'] * 1e6,
+                             'pid': span['pid'], 'tid': span['tid'], 'args': span.get('args', {})})
+        thread_names[(span['pid'], span['tid'])] = span['thread']
+
+    for (pid, tid), thread_name in thread_names.items():
+        trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}})
+
+    return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+
+def save_run_profile(profile_dir:str, time_stamp:str, duration:float, is_chrome_trace_exported:bool = False) -> str:
+
+    """
+    Merges the stage records and spans written by every process of a run into one json run profile -> str
+
+    Args:
+    profile_dir (str): Directory the stages of the run were profiled into
+    time_stamp (str): Time stamp of the run
+    duration (float): Wall time of the run in seconds
+    is_chrome_trace_exported (bool): Also writes the spans as a chrome trace
+
+    Returns:
+    1. Path of the run profile (str)
+
+    """
+
+    try:
+        profiler.save_spans(profile_dir)
+
+        stages = {}
+        for stage_file_path in sorted(glob.glob(os.path.join(profile_dir, PROFILE_STAGE_FILE_PREFIX + '*' + JSON_EXTENTION))):
+            with open(stage_file_path) as stage_file:
+                stage_record = json.load(stage_file)
+            stages[stage_record['stage']] = stage_record
+
+        spans = []
+        dropped_span_count = 0
+        for spans_file_path in sorted(glob.glob(os.path.join(profile_dir, PROFILE_SPANS_FILE_PREFIX + '*' + JSON_EXTENTION))):
+            with open(spans_file_path) as spans_file:
+                process_spans = json.load(spans_file)
+            spans.extend(process_spans['spans'])
+            dropped_span_count += process_spans['dropped_span_count']
+
+        run_profile_file_path = os.path.join(profile_dir, PROFILE_RUN_FILE_NAME)
+        with open(run_profile_file_path, 'w') as run_profile_file:
+            json.dump({
+                'time_stamp': time_stamp,
+                'duration_seconds': duration,
+                'stages': dict(sorted(stages.items(), key=lambda item: item[1].get('start', 0))),
+                'spans': get_span_summary(spans),
+                'span_count': len(spans),
+                'dropped_span_count': dropped_span_count
+            }, run_profile_file, indent=4)
+
+        if is_chrome_trace_exported:
+            with open(os.path.join(profile_dir, PROFILE_CHROME_TRACE_FILE_NAME), 'w') as chrome_trace_file:
+                json.dump(get_chrome_trace(spans), chrome_trace_file)
+
+        logging.info(f"Run profile : [{run_profile_file_path}]")
+
+        return run_profile_file_path
+
+    except Exception as e:
+        raise CustomException(e,sys) from e
@@ -0,0 +1,275 @@
+import os
+import sys
+import glob
+import shutil
+import pandas as pd
+from src.constant import *
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.utils import get_record_path, read_record_bytes, record_shard_files
+from src.utils.image_validator import read_stats_table, write_stats_table, get_stats_table_extension
+
+
+class ShardWriter:
+
+    """
+    Packs the images of a split into fixed size record shards. Every shard is a plain
+    concatenation of the encoded image bytes with an index file holding the record id,
+    relative path, label, content hash, offset and length of every record.
+
+    Shards are written into a staging directory that replaces the split directory on close,
+    so readers never see a partially written split.
+
+    Layout: shards_dir/<split>/<split>-<n>.bin and <split>-<n>.index
+    """
+
+    def __init__(self, shards_dir:str, split:str, shard_size:int = RECORD_SHARD_SIZE_MB * 1024 * 1024):
+        try:
+            self.split = split
+            self.shard_size = shard_size
+            self.split_dir = os.path.join(shards_dir, split)
+            self.staging_dir = self.split_dir + RECORD_SHARD_STAGING_SUFFIX
+
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            os.makedirs(self.staging_dir)
+
+            self.shard_id = -1
+            self.shard_file = None
+            self.shard_index_rows: list = []
+            self.record_count = 0
+            self.shard_file_paths: list = []
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def get_shard_file_name(self, shard_id:int) -> str:
+
+        """
+        Returns the file name of a shard of the split.
+
+            Parameters: shard_id (int)
+
+            Returns:
+                shard_file_name (str)
+        """
+
+        return RECORD_SHARD_FILE_NAME.format(self.split, shard_id)
+
+    def close_shard(self) -> None:
+
+        """
+        Closes the current shard and writes its index.
+
+            Parameters: None
+
+            Returns: None
+        """
+
+        if self.shard_file is None:
+            return
+
+        self.shard_file.close()
+        self.shard_file = None
+
+        shard_index_file_path = os.path.join(self.staging_dir, os.path.splitext(self.get_shard_file_name(self.shard_id))[0]
+                                             + RECORD_SHARD_INDEX_SUFFIX + get_stats_table_extension())
+        write_stats_table(pd.DataFrame(self.shard_index_rows, columns=RECORD_SHARD_INDEX_COLUMNS), shard_index_file_path)
+        self.shard_index_rows = []
+
+    def write(self, record_bytes:bytes, relative_path:str, label:str, content_hash:str = None) -> str:
+
+        """
+        Appends a record, starting a new shard when the current one would exceed the shard size.
+
+            Parameters:
+                record_bytes (bytes), relative_path (str), label (str), content_hash (str)
+
+            Returns:
+                record_path (str): Path of the record in the final split directory (shard.bin@offset:length)
+        """
+
+        try:
+            if self.shard_file is None or (self.shard_file.tell() > 0 and self.shard_file.tell() + len(record_bytes) > self.shard_size):
+                self.close_shard()
+                self.shard_id += 1
+                self.shard_file = open(os.path.join(self.staging_dir, self.get_shard_file_name(self.shard_id)), 'wb')
+                self.shard_file_paths.append(os.path.join(self.split_dir, self.get_shard_file_name(self.shard_id)))
+
+            offset = self.shard_file.tell()
+            self.shard_file.write(record_bytes)
+
+            self.shard_index_rows.append({RECORD_ID: self.record_count, RELATIVE_IMAGE_PATH: relative_path, IMAGE_LABEL: label,
+                                          CONTENT_HASH: content_hash, RECORD_OFFSET: offset, RECORD_LENGTH: len(record_bytes)})
+            self.record_count += 1
+
+            return get_record_path(self.shard_file_paths[-1], offset, len(record_bytes))
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def close(self) -> list:
+
+        """
+        Closes the last shard and replaces the split directory with the staged shards. Open
+        descriptors of the replaced shards are closed.
+
+            Parameters: None
+
+            Returns:
+                shard_file_paths (list)
+        """
+
+        try:
+            self.close_shard()
+
+            previous_split_dir = self.split_dir + '.old'
+            shutil.rmtree(previous_split_dir, ignore_errors=True)
+            if os.path.exists(self.split_dir):
+                os.replace(self.split_dir, previous_split_dir)
+            os.replace(self.staging_dir, self.split_dir)
+            shutil.rmtree(previous_split_dir, ignore_errors=True)
+
+            # Descriptors of this process still point at the replaced shards
+            record_shard_files.close(self.split_dir)
+
+            logging.info(f"Wrote [{self.record_count}] records of [{self.split}] into [{len(self.shard_file_paths)}] shards.")
+
+            return self.shard_file_paths
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def abort(self) -> None:
+
+        """
+        Discards the staged shards, the split directory is left as it was.
+
+            Parameters: None
+
+            Returns: None
+        """
+
+        if self.shard_file is not None:
+            self.shard_file.close()
+            self.shard_file = None
+
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+class ShardReader:
+
+    """
+    Reads the record shards of a split, sequentially shard by shard or randomly by record id.
+    """
+
+    def __init__(self, shards_dir:str, split:str):
+        try:
+            self.split_dir = os.path.join(shards_dir, split)
+
+            index_file_paths = sorted(glob.glob(os.path.join(self.split_dir, '*' + RECORD_SHARD_INDEX_SUFFIX + '.*')))
+            shard_indexes: list = []
+
+            for index_file_path in index_file_paths:
+                shard_index = read_stats_table(index_file_path)
+                shard_index[SHARD_ID] = len(shard_indexes)
+                shard_indexes.append(shard_index)
+
+            self.shard_file_paths: list = [index_file_path.rsplit(RECORD_SHARD_INDEX_SUFFIX, 1)[0] + RECORD_SHARD_EXTENSION
+                                           for index_file_path in index_file_paths]
+
+            self.index = pd.concat(shard_indexes, ignore_index=True) if shard_indexes else \
+                         pd.DataFrame(columns=RECORD_SHARD_INDEX_COLUMNS + [SHARD_ID])
+            self.index = self.index.sort_values(RECORD_ID).set_index(RECORD_ID, drop=False)
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def is_complete(self) -> bool:
+
+        """
+        Checks that the split has shards and every shard of the index exists.
+
+            Parameters: None
+
+            Returns:
+                is_complete (bool)
+        """
+
+        return len(self.index) > 0 and all(os.path.exists(shard_file_path) for shard_file_path in self.shard_file_paths)
+
+    def get_record_path(self, record_id:int) -> str:
+
+        """
+        Returns the path of a record.
+
+            Parameters: record_id (int)
+
+            Returns:
+                record_path (str): shard.bin@offset:length
+        """
+
+        record = self.index.loc[record_id]
+        return get_record_path(self.shard_file_paths[int(record[SHARD_ID])], int(record[RECORD_OFFSET]), int(record[RECORD_LENGTH]))
+
+    def get_record(self, record_id:int) -> bytes:
+
+        """
+        Returns the bytes of a record with one positioned read.
+
+            Parameters: record_id (int)
+
+            Returns:
+                record_bytes (bytes)
+        """
+
+        try:
+            return read_record_bytes(self.get_record_path(record_id))
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_record_paths(self) -> dict:
+
+        """
+        Returns the record path of every relative image path of the split.
+
+            Parameters: None
+
+            Returns:
+                record_paths (dict): relative path -> record path
+        """
+
+        return {relative_path: get_record_path(self.shard_file_paths[shard_id], offset, length)
+                for relative_path, shard_id, offset, length in zip(self.index[RELATIVE_IMAGE_PATH], self.index[SHARD_ID],
+                                                                   self.index[RECORD_OFFSET], self.index[RECORD_LENGTH])}
+
+    def iter_records(self):
+
+        """
+        Streams every record of the split, reading each shard front to back.
+
+            Parameters: None
+
+            Yields:
+                record_info (dict), record_bytes (bytes)
+        """
+
+        try:
+            for shard_id, shard_index in self.index.groupby(SHARD_ID, sort=True):
+                with open(self.shard_file_paths[shard_id], 'rb', buffering=DOWNLOAD_CHUNK_SIZE) as shard_file:
+                    for record_info in shard_index.sort_values(RECORD_OFFSET).to_dict(orient='records'):
+                        shard_file.seek(record_info[RECORD_OFFSET])
+                        yield record_info, shard_file.read(record_info[RECORD_LENGTH])
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
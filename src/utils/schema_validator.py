@@ -0,0 +1,136 @@
+import sys
+import numpy as np
+import pandas as pd
+from src.constant import *
+from src.exception import CustomException
+from src.utils.utils import get_column_dtype_name, map_splits
+
+
+class SchemaValidator:
+
+    """
+    Compiles schema.yml (columns, column datatypes, domain values and target column) into
+    vectorized checks. Every column is checked in a single pass, for any number of splits
+    and classes, and the number of violations of every row is returned.
+    """
+
+    def __init__(self, schema_file_info: dict):
+        try:
+            self.columns: list = list(schema_file_info[SCHEMA_DATA_COLUMNS])
+            self.column_datatypes: dict = dict(schema_file_info.get(SCHEMA_DATA_COLUMN_DATATYPES) or {})
+            self.target_column: str = schema_file_info.get(SCHEMA_DATA_TARGET_COLUMN)
+            self.domain_values: dict = {column: pd.Index(values)
+                                        for column, values in (schema_file_info.get(SCHEMA_DATA_DOMIAN_VALUES) or {}).items()}
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_column_violations(self, column_data: pd.Series) -> np.ndarray:
+
+        """
+        Returns a boolean mask of the rows violating the schema in one column.
+        Null values and values outside the domain of the column are violations.
+
+            Parameters: column_data (series)
+
+            Returns:
+                violations (numpy array)
+        """
+
+        violations = column_data.isna().to_numpy()
+
+        domain = self.domain_values.get(column_data.name)
+        if domain is None:
+            return violations
+
+        # Categorical columns are checked once per category instead of once per row
+        if isinstance(column_data.dtype, pd.CategoricalDtype):
+            is_category_outside_domain = ~column_data.cat.categories.isin(domain)
+            codes = column_data.cat.codes.to_numpy()
+            return violations | ((codes >= 0) & np.append(is_category_outside_domain, False)[codes])
+
+        return violations | ~column_data.isin(domain).to_numpy()
+
+    def validate(self, dataframe: pd.DataFrame) -> dict:
+
+        """
+        Validates a dataframe against the schema.
+
+            Parameters: dataframe (dataframe)
+
+            Returns:
+                result (dict) -> It contains
+                    1. is_valid (bool)
+                    2. column_errors (list): missing, unexpected, misordered or mistyped columns
+                    3. column_violation_counts (dict): column -> number of violating rows
+                    4. row_violation_counts (numpy array): number of violations of every row
+                    5. label_counts (dict): number of rows of every target class
+                    6. missing_domain_values (dict): column -> domain values absent from the data
+        """
+
+        try:
+            column_errors: list = []
+
+            missing_columns = [column for column in self.columns if column not in dataframe.columns]
+            unexpected_columns = [column for column in dataframe.columns[:len(self.columns)] if column not in self.columns]
+
+            if missing_columns:
+                column_errors.append(f"Missing columns : {missing_columns}")
+            if unexpected_columns:
+                column_errors.append(f"Unexpected columns : {unexpected_columns}")
+            if not missing_columns and list(dataframe.columns[:len(self.columns)]) != self.columns:
+                column_errors.append(f"Columns are not in schema order : {list(dataframe.columns[:len(self.columns)])}")
+
+            row_violation_counts = np.zeros(len(dataframe), dtype=np.int64)
+            column_violation_counts: dict = {}
+            missing_domain_values: dict = {}
+
+            for column in self.columns:
+                if column not in dataframe.columns:
+                    continue
+
+                column_data = dataframe[column]
+
+                expected_datatype = self.column_datatypes.get(column)
+                actual_datatype = get_column_dtype_name(column_data)
+                if expected_datatype is not None and actual_datatype != expected_datatype:
+                    column_errors.append(f"Column [{column}] has datatype [{actual_datatype}], expected [{expected_datatype}]")
+
+                violations = self.get_column_violations(column_data)
+                row_violation_counts += violations
+                column_violation_counts[column] = int(violations.sum())
+
+                domain = self.domain_values.get(column)
+                if domain is not None:
+                    missing_domain_values[column] = list(domain.difference(pd.Index(column_data.unique()).dropna()))
+
+            label_counts: dict = {}
+            if self.target_column in dataframe.columns:
+                label_counts = {str(label): int(count) for label, count in
+                                dataframe[self.target_column].value_counts(sort=False).items() if count > 0}
+
+            is_valid = not column_errors and not row_violation_counts.any()
+
+            return {
+                SCHEMA_RESULT_IS_VALID: is_valid,
+                SCHEMA_RESULT_COLUMN_ERRORS: column_errors,
+                SCHEMA_RESULT_COLUMN_VIOLATION_COUNTS: column_violation_counts,
+                SCHEMA_RESULT_ROW_VIOLATION_COUNTS: row_violation_counts,
+                SCHEMA_RESULT_LABEL_COUNTS: label_counts,
+                SCHEMA_RESULT_MISSING_DOMAIN_VALUES: missing_domain_values
+            }
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def validate_splits(self, split_dfs: dict) -> dict:
+
+        """
+        Validates the dataframes of any number of splits against the schema, one split per thread.
+
+            Parameters: split_dfs (dict): split -> dataframe
+
+            Returns:
+                results (dict): split -> result of validate
+        """
+
+        return map_splits(lambda split: self.validate(split_dfs[split]), list(split_dfs))
@@ -0,0 +1,333 @@
+import io
+import os
+import sys
+import json
+import hashlib
+import threading
+import multiprocessing
+import numpy as np
+import pandas as pd
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from src.constant import *
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.utils import read_image_bytes, fill_content_hashes
+from src.utils.profiler import profiled
+from src.utils.image_validator import read_stats_table, write_stats_table, get_stats_table_extension
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# PIL resampling filters of the keras interpolation names
+INTERPOLATION_RESAMPLING_FILTERS = {'nearest': Image.NEAREST, 'bilinear': Image.BILINEAR, 'bicubic': Image.BICUBIC,
+                                    'lanczos': Image.LANCZOS, 'box': Image.BOX, 'hamming': Image.HAMMING}
+
+
+def preprocess_image_bytes(image_bytes:bytes, image_size:int = IMAGE_SIZE, interpolation:str = INTERPOLATION,
+                           channels:int = IMAGE_COLOR_CHANNELS) -> np.ndarray:
+
+    """
+    Decodes and resizes encoded image bytes into a uint8 tensor -> np.ndarray
+    Training and serving share this function, so both see the same pixels.
+
+    Args:
+    image_bytes (bytes): Encoded image
+    image_size (int): Height and width of the tensor
+    interpolation (str): Keras name of the resampling filter
+    channels (int): Number of color channels of the tensor, 1 or 3
+
+    Returns:
+    1. Tensor of image_size x image_size x channels (np.ndarray)
+
+    """
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image = image.convert('L' if channels == 1 else 'RGB')
+        image = image.resize((image_size, image_size), INTERPOLATION_RESAMPLING_FILTERS[interpolation])
+        return np.asarray(image, dtype=np.uint8).reshape(image_size, image_size, channels)
+
+
+def preprocess_image(image_path:str, image_size:int, interpolation:str, channels:int) -> tuple:
+
+    """
+    Decodes and resizes an image into a uint8 tensor -> tuple
+    Runs in a worker process, so it only depends on its arguments.
+
+    Args:
+    image_path (str): Path of the image file, or a streamed path (archive.zip!member)
+    image_size (int): Height and width of the tensor
+    interpolation (str): Keras name of the resampling filter
+    channels (int): Number of color channels of the tensor, 1 or 3
+
+    Returns:
+    1. Content hash of the image bytes (str)
+    2. Tensor of image_size x image_size x channels, None when the image can not be decoded (np.ndarray)
+
+    """
+
+    try:
+        image_bytes = read_image_bytes(image_path)
+        content_hash = hashlib.sha256(image_bytes).hexdigest()
+    except Exception:
+        return None, None
+
+    try:
+        return content_hash, preprocess_image_bytes(image_bytes, image_size, interpolation, channels)
+
+    except Exception:
+        return content_hash, None
+
+
+class TensorStore:
+
+    """
+    Memory mapped store of preprocessed images. Every image is decoded and resized once,
+    and kept as a uint8 tensor in a .npy shard, keyed by the content hash of its bytes.
+    Every set of preprocessing parameters has its own store, so changing the image size or
+    interpolation never reuses stale tensors.
+
+    Store layout: store_dir/<params key>/shard_<n>.npy, index and params.json
+    """
+
+    def __init__(self, store_dir:str, image_size:int = IMAGE_SIZE, interpolation:str = INTERPOLATION,
+                 channels:int = IMAGE_COLOR_CHANNELS, shard_size:int = TENSOR_STORE_SHARD_SIZE):
+        try:
+            self.image_size = image_size
+            self.interpolation = interpolation
+            self.channels = channels
+            self.shard_size = shard_size
+            self.store_dir = os.path.join(store_dir, self.get_params_key())
+            self.index_file_path = os.path.join(self.store_dir, TENSOR_STORE_INDEX_FILE_NAME + get_stats_table_extension())
+            self.shards: dict = {}
+            self.lock = threading.Lock()
+
+            os.makedirs(self.store_dir, exist_ok=True)
+            with open(os.path.join(self.store_dir, TENSOR_STORE_PARAMS_FILE_NAME), 'w') as params_file:
+                json.dump(self.get_params(), params_file, indent=4)
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_params(self) -> dict:
+
+        """
+        Returns the preprocessing parameters of the stored tensors.
+
+            Parameters: None
+
+            Returns:
+                params (dict)
+        """
+
+        return {'image_size': self.image_size, 'interpolation': self.interpolation,
+                'channels': self.channels, 'dtype': 'uint8'}
+
+    def get_params_key(self) -> str:
+
+        """
+        Returns the key of the preprocessing parameters, used as the store directory name.
+
+            Parameters: None
+
+            Returns:
+                params_key (str)
+        """
+
+        return hashlib.sha256(json.dumps(self.get_params(), sort_keys=True).encode()).hexdigest()[:TENSOR_STORE_PARAMS_KEY_LENGTH]
+
+    def read_index(self) -> pd.DataFrame:
+
+        """
+        Returns the index of the stored tensors.
+
+            Parameters: None
+
+            Returns:
+                index (dataframe): Content_Hash, Shard_Id and Shard_Offset of every stored tensor
+        """
+
+        index = read_stats_table(self.index_file_path)
+        if index.empty:
+            return pd.DataFrame({CONTENT_HASH: pd.Series(dtype=object), SHARD_ID: pd.Series(dtype='int64'),
+                                 SHARD_OFFSET: pd.Series(dtype='int64')})
+
+        return index
+
+    def get_shard_file_path(self, shard_id:int) -> str:
+
+        """
+        Returns the path of a shard.
+
+            Parameters: shard_id (int)
+
+            Returns:
+                shard_file_path (str)
+        """
+
+        return os.path.join(self.store_dir, TENSOR_STORE_SHARD_FILE_NAME.format(shard_id))
+
+    def get_shard(self, shard_id:int) -> np.ndarray:
+
+        """
+        Returns a read only memory map of a shard, opened once per store.
+
+            Parameters: shard_id (int)
+
+            Returns:
+                shard (numpy memmap): Tensors of the shard, shape (count, image_size, image_size, channels)
+        """
+
+        shard = self.shards.get(shard_id)
+        if shard is None:
+            shard = np.load(self.get_shard_file_path(shard_id), mmap_mode='r')
+            self.shards[shard_id] = shard
+
+        return shard
+
+    def write_shard(self, shard_id:int, image_tensors:list) -> None:
+
+        """
+        Writes tensors into a new shard, atomically.
+
+            Parameters: shard_id (int), image_tensors (list)
+
+            Returns: None
+        """
+
+        shard_file_path = self.get_shard_file_path(shard_id)
+        temp_file_path = shard_file_path + '.tmp'
+
+        shard = np.lib.format.open_memmap(temp_file_path, mode='w+', dtype=np.uint8,
+                                          shape=(len(image_tensors), self.image_size, self.image_size, self.channels))
+        for offset, image_tensor in enumerate(image_tensors):
+            shard[offset] = image_tensor
+        shard.flush()
+        del shard
+
+        os.replace(temp_file_path, shard_file_path)
+
+    @profiled
+    def add_images(self, image_paths:list, content_hashes:list = None, max_workers:int = None) -> np.ndarray:
+
+        """
+        Preprocesses the images missing from the store on a process pool and returns where
+        every image is stored. Images already in the store are never decoded; images without
+        a known content hash are read and hashed first, on a thread pool, to look them up.
+        Threads of a run, e.g. one per split, add their images one after another.
+
+            Parameters:
+                image_paths (list), content_hashes (list): Known content hashes of the images, optional
+                max_workers (int): Number of worker processes, defaults to the number of cpus
+
+            Returns:
+                positions (numpy array): Shard_Id and Shard_Offset of every image, -1 for images that
+                                         can not be decoded
+        """
+
+        try:
+            max_workers = max_workers or os.cpu_count() or 1
+
+            # Hashing only reads the bytes, so a stored image is found without decoding it
+            content_hashes = fill_content_hashes(image_paths, content_hashes, max_workers=max_workers)
+
+            with self.lock, open(os.path.join(self.store_dir, TENSOR_STORE_LOCK_FILE_NAME), 'w') as lock_file:
+
+                # Only one pipeline run adds to a store at a time
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                index = self.read_index()
+                stored_positions = dict(zip(index[CONTENT_HASH], zip(index[SHARD_ID], index[SHARD_OFFSET])))
+
+                positions = np.full((len(image_paths), 2), -1, dtype=np.int64)
+                paths_to_add: list = []
+                indices_to_add: list = []
+
+                for position_index, (image_path, content_hash) in enumerate(zip(image_paths, content_hashes)):
+                    if content_hash is not None and content_hash in stored_positions:
+                        positions[position_index] = stored_positions[content_hash]
+                    else:
+                        paths_to_add.append(image_path)
+                        indices_to_add.append(position_index)
+
+                if not paths_to_add:
+                    return positions
+
+                logging.info(f"Preprocessing [{len(paths_to_add)}] images into tensor store [{self.store_dir}]")
+
+                next_shard_id = int(index[SHARD_ID].max()) + 1 if not index.empty else 0
+                shard_tensors: list = []
+                new_index_rows: list = []
+                chunksize = max(1, len(paths_to_add) // (max_workers * IMAGE_VALIDATION_CHUNKS_PER_WORKER))
+
+                # Decoding is cpu bound, tensors are written shard by shard as they arrive
+                # Spawned, forking this multithreaded process with tensorflow loaded can deadlock the workers
+                with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                    results = executor.map(preprocess_image, paths_to_add, [self.image_size] * len(paths_to_add),
+                                           [self.interpolation] * len(paths_to_add), [self.channels] * len(paths_to_add),
+                                           chunksize=chunksize)
+
+                    for position_index, (content_hash, image_tensor) in zip(indices_to_add, results):
+                        if image_tensor is None:
+                            continue
+
+                        # Duplicate images share one tensor
+                        if content_hash not in stored_positions:
+                            stored_positions[content_hash] = (next_shard_id, len(shard_tensors))
+                            new_index_rows.append({CONTENT_HASH: content_hash, SHARD_ID: next_shard_id, SHARD_OFFSET: len(shard_tensors)})
+                            shard_tensors.append(image_tensor)
+
+                        positions[position_index] = stored_positions[content_hash]
+
+                        if len(shard_tensors) == self.shard_size:
+                            self.write_shard(next_shard_id, shard_tensors)
+                            next_shard_id, shard_tensors = next_shard_id + 1, []
+
+                if shard_tensors:
+                    self.write_shard(next_shard_id, shard_tensors)
+
+                # The index is only updated once its shards are on disk
+                if new_index_rows:
+                    index = pd.concat([index, pd.DataFrame(new_index_rows)], ignore_index=True) if not index.empty else pd.DataFrame(new_index_rows)
+                    write_stats_table(index, self.index_file_path)
+
+                return positions
+
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_image(self, shard_id:int, shard_offset:int) -> np.ndarray:
+
+        """
+        Returns a stored tensor without decoding the image.
+
+            Parameters: shard_id (int), shard_offset (int)
+
+            Returns:
+                image_tensor (numpy array): uint8 tensor of image_size x image_size x channels
+        """
+
+        return self.get_shard(int(shard_id))[int(shard_offset)]
+
+    def get_images(self, positions:np.ndarray) -> np.ndarray:
+
+        """
+        Returns a batch of stored tensors, gathered shard by shard.
+
+            Parameters: positions (numpy array): Shard_Id and Shard_Offset of every image
+
+            Returns:
+                image_tensors (numpy array): uint8 tensors of shape (count, image_size, image_size, channels)
+        """
+
+        image_tensors = np.empty((len(positions), self.image_size, self.image_size, self.channels), dtype=np.uint8)
+
+        for shard_id in np.unique(positions[:, 0]):
+            is_in_shard = positions[:, 0] == shard_id
+            image_tensors[is_in_shard] = self.get_shard(int(shard_id))[positions[is_in_shard, 1]]
+
+        return image_tensors
@@ -5,6 +5,22 @@ from ensure import ensure_annotations
 from src.constant import *
 import sys,os
 import csv
+import zipfile
+import pandas as pd
+import functools
+import threading
+import collections
+import hashlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.profiler import profiled
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
 
 def read_yaml_file(file_path:str) -> dict:
     
@@ -84,6 +100,7 @@ def description_label_dirs(label_data_dir_paths:list)-> Tuple[list,list]:
             
     return label_images_paths, label_images_labels
 
+@profiled
 def convert_into_csv_format(label_images_paths:list,label_images_labels:list, store_dir:str) -> None:
     
     """
@@ -115,4 +132,774 @@ def convert_into_csv_format(label_images_paths:list,label_images_labels:list, st
         csvwriter = csv.writer(csvfile) 
         csvwriter.writerow(column_names) 
         csvwriter.writerows(row_data)
-    
\ No newline at end of file
+    
+
+
+def is_zip_member_path(path:str) -> bool:
+    
+    """
+    Checks if a path points inside a zip archive (archive.zip!member) -> bool
+    
+    Args:
+    path (str): A file or directory path
+    
+    Returns:
+    1. True if the path is of the form archive.zip!member (bool)
+    
+    """
+    
+    return ZIP_MEMBER_SEPARATOR in path and zipfile.is_zipfile(path.split(ZIP_MEMBER_SEPARATOR, 1)[0])
+
+
+def split_zip_member_path(path:str) -> Tuple[str,str]:
+    
+    """
+    Splits a streamed path into the archive path and the member name -> tuple[str,str]
+    
+    Args:
+    path (str): Path of the form archive.zip!member
+    
+    Returns:
+    
+    1. Path of the zip archive (str)
+    2. Name of the member inside the archive (str)
+    
+    """
+    
+    zip_file_path, member_name = path.split(ZIP_MEMBER_SEPARATOR, 1)
+    return zip_file_path, member_name
+
+
+@functools.lru_cache(maxsize=None)
+def _open_zip_archive(zip_file_path:str, pid:int) -> zipfile.ZipFile:
+    
+    # One open handle per archive and per process, forked workers must not share a file offset
+    return zipfile.ZipFile(zip_file_path, 'r')
+
+
+def open_zip_archive(zip_file_path:str) -> zipfile.ZipFile:
+    
+    """
+    Returns a cached, read only handle of a zip archive -> zipfile.ZipFile
+    
+    Args:
+    zip_file_path (str): Path of the zip archive
+    
+    Returns:
+    1. Open zip archive, its central directory is parsed only once (zipfile.ZipFile)
+    
+    """
+    
+    return _open_zip_archive(zip_file_path, os.getpid())
+
+
+def find_zip_member_dir(zip_file_path:str, dir_name:str) -> str:
+    
+    """
+    Finds the member directory of a given name inside a zip archive -> str
+    
+    Args:
+    zip_file_path (str): Path of the zip archive
+    dir_name (str): Name of the directory to look for (chest_xray)
+    
+    Returns:
+    1. Member path of the shallowest directory with that name (str)
+    
+    """
+    
+    for member_name in sorted(open_zip_archive(zip_file_path).namelist(), key=lambda name: name.count('/')):
+        
+        parts = member_name.split('/')
+        if ZIP_METADATA_DIR_NAME in parts or dir_name not in parts[:-1]:
+            continue
+        
+        return '/'.join(parts[:parts.index(dir_name) + 1])
+        
+    raise Exception(f"Directory [{dir_name}] is not present in zip archive [{zip_file_path}]")
+
+
+def is_record_path(path:str) -> bool:
+    
+    """
+    Checks if a path points to a record of a record shard (shard.bin@offset:length) -> bool
+    
+    Args:
+    path (str): A file path
+    
+    Returns:
+    1. True if the path is of the form shard.bin@offset:length (bool)
+    
+    """
+    
+    if RECORD_SEPARATOR not in path:
+        return False
+    
+    shard_file_path, record_range = path.rsplit(RECORD_SEPARATOR, 1)
+    return shard_file_path.endswith(RECORD_SHARD_EXTENSION) and record_range.replace(RECORD_LENGTH_SEPARATOR, '', 1).isdigit()
+
+
+def get_record_path(shard_file_path:str, offset:int, length:int) -> str:
+    
+    """
+    Returns the path of a record inside a record shard -> str
+    
+    Args:
+    shard_file_path (str): Path of the shard
+    offset (int): Byte offset of the record in the shard
+    length (int): Byte length of the record
+    
+    Returns:
+    1. Record path of the form shard.bin@offset:length (str)
+    
+    """
+    
+    return f"{shard_file_path}{RECORD_SEPARATOR}{offset}{RECORD_LENGTH_SEPARATOR}{length}"
+
+
+def split_record_path(path:str) -> Tuple[str,int,int]:
+    
+    """
+    Splits a record path into the shard path, the offset and the length of the record -> tuple[str,int,int]
+    
+    Args:
+    path (str): Path of the form shard.bin@offset:length
+    
+    Returns:
+    1. Path of the shard (str)
+    2. Byte offset of the record (int)
+    3. Byte length of the record (int)
+    
+    """
+    
+    shard_file_path, record_range = path.rsplit(RECORD_SEPARATOR, 1)
+    offset, length = record_range.split(RECORD_LENGTH_SEPARATOR)
+    return shard_file_path, int(offset), int(length)
+
+
+class RecordShardFiles:
+    
+    """
+    Open read only descriptors of record shards, at most max_open_files per process, in least
+    recently used order. A descriptor is closed when it is evicted or its split is rewritten,
+    and only once no read is using it. Forked processes close the inherited descriptors.
+    """
+    
+    def __init__(self, max_open_files:int = RECORD_SHARD_MAX_OPEN_FILES):
+        self.max_open_files = max_open_files
+        self.reset()
+        
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.reset_after_fork)
+    
+    def reset(self) -> None:
+        # Shard path -> [descriptor, readers, is_retired]
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+    
+    def reset_after_fork(self) -> None:
+        for file_descriptor, _, _ in self.entries.values():
+            try:
+                os.close(file_descriptor)
+            except OSError:
+                pass
+        self.reset()
+    
+    def retire(self, shard_file_path:str) -> None:
+        
+        # Called with the lock held, a descriptor in use is closed by its last reader
+        entry = self.entries.pop(shard_file_path)
+        entry[2] = True
+        if entry[1] == 0:
+            os.close(entry[0])
+    
+    def read(self, shard_file_path:str, offset:int, length:int) -> bytes:
+        
+        """
+        Reads length bytes at offset of a shard with one positioned read.
+        
+            Parameters: shard_file_path (str), offset (int), length (int)
+            
+            Returns:
+                record_bytes (bytes)
+        """
+        
+        with self.lock:
+            entry = self.entries.get(shard_file_path)
+            if entry is None:
+                entry = self.entries[shard_file_path] = [os.open(shard_file_path, os.O_RDONLY), 0, False]
+                while len(self.entries) > self.max_open_files:
+                    self.retire(next(iter(self.entries)))
+            else:
+                self.entries.move_to_end(shard_file_path)
+            entry[1] += 1
+        
+        try:
+            return os.pread(entry[0], length, offset)
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if entry[2] and entry[1] == 0:
+                    os.close(entry[0])
+    
+    def close(self, dir_path:str = None) -> None:
+        
+        """
+        Closes the descriptors of the shards in a directory, of every shard when dir_path is None.
+        
+            Parameters: dir_path (str)
+            
+            Returns: None
+        """
+        
+        with self.lock:
+            dir_prefix = os.path.join(os.path.abspath(dir_path), '') if dir_path is not None else None
+            for shard_file_path in list(self.entries):
+                if dir_prefix is None or os.path.abspath(shard_file_path).startswith(dir_prefix):
+                    self.retire(shard_file_path)
+
+
+record_shard_files = RecordShardFiles()
+
+
+def read_record_bytes(record_path:str) -> bytes:
+    
+    """
+    Reads a record out of a record shard with a single positioned read -> bytes
+    
+    Args:
+    record_path (str): Path of the form shard.bin@offset:length
+    
+    Returns:
+    1. Bytes of the record (bytes)
+    
+    """
+    
+    shard_file_path, offset, length = split_record_path(record_path)
+    
+    if not hasattr(os, 'pread'):
+        with open(shard_file_path, 'rb') as shard_file:
+            shard_file.seek(offset)
+            return shard_file.read(length)
+    
+    return record_shard_files.read(shard_file_path, offset, length)
+
+
+def read_image_bytes(image_path:str) -> bytes:
+    
+    """
+    Reads the encoded bytes of an image from disk, straight out of a zip archive or out of a record shard -> bytes
+    
+    Args:
+    image_path (str): Path of the image file, a streamed path (archive.zip!member) or a record path (shard.bin@offset:length)
+    
+    Returns:
+    1. Encoded image bytes (bytes)
+    
+    """
+    
+    try:
+        if is_record_path(image_path):
+            return read_record_bytes(image_path)
+        
+        if ZIP_MEMBER_SEPARATOR in image_path and not os.path.exists(image_path):
+            zip_file_path, member_name = split_zip_member_path(image_path)
+            return open_zip_archive(zip_file_path).read(member_name)
+        
+        with open(image_path, 'rb') as image_file:
+            return image_file.read()
+        
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def _scan_label_dir(split:str, label_dir_path:str, is_stat:bool) -> dict:
+    
+    # Lists the images of one label directory, os.scandir gives file type and stat without extra syscalls on most platforms
+    manifest = {SPLIT_NAME: [], LABEL_IMAGE_PATH: [], IMAGE_LABEL: []}
+    if is_stat:
+        manifest.update({FILE_SIZE: [], FILE_MTIME: []})
+    
+    label_name = os.path.basename(label_dir_path)
+    
+    with os.scandir(label_dir_path) as entries:
+        for entry in entries:
+            if entry.name.startswith('.') or not entry.is_file():
+                continue
+            
+            manifest[SPLIT_NAME].append(split)
+            manifest[LABEL_IMAGE_PATH].append(entry.path)
+            manifest[IMAGE_LABEL].append(label_name)
+            
+            if is_stat:
+                entry_stat = entry.stat()
+                manifest[FILE_SIZE].append(entry_stat.st_size)
+                manifest[FILE_MTIME].append(entry_stat.st_mtime)
+                
+    return manifest
+
+
+def _scan_zip_split_dir(split:str, split_dir_path:str, is_stat:bool) -> dict:
+    
+    # Lists the images of one split inside a zip archive from its central directory, nothing is read or extracted
+    manifest = {SPLIT_NAME: [], LABEL_IMAGE_PATH: [], IMAGE_LABEL: []}
+    if is_stat:
+        manifest.update({FILE_SIZE: [], FILE_MTIME: []})
+    
+    zip_file_path, split_member_dir = split_zip_member_path(split_dir_path)
+    split_member_dir = split_member_dir.rstrip('/') + '/'
+    
+    for zip_info in open_zip_archive(zip_file_path).infolist():
+        
+        member_name = zip_info.filename
+        
+        if zip_info.is_dir() or not member_name.startswith(split_member_dir):
+            continue
+        
+        # Only split/label/image members, skipping macOS metadata and hidden files
+        parts = member_name[len(split_member_dir):].split('/')
+        if len(parts) != 2 or parts[1].startswith('.') or ZIP_METADATA_DIR_NAME in member_name:
+            continue
+        
+        manifest[SPLIT_NAME].append(split)
+        manifest[LABEL_IMAGE_PATH].append(zip_file_path + ZIP_MEMBER_SEPARATOR + member_name)
+        manifest[IMAGE_LABEL].append(parts[0])
+        
+        if is_stat:
+            manifest[FILE_SIZE].append(zip_info.file_size)
+            manifest[FILE_MTIME].append(datetime(*zip_info.date_time).timestamp())
+            
+    return manifest
+
+
+@profiled
+def scan_label_image_dirs(split_dirs:dict, is_stat:bool = False, max_workers:int = None) -> dict:
+    
+    """
+    Scans the label directories of all splits at once on a thread pool and returns a 
+    single columnar manifest -> dict
+    
+    Args:
+    split_dirs (dict): split name -> raw data directory of the split, extracted or streamed (archive.zip!chest_xray/train)
+    is_stat (bool): Adds file size and modification time columns
+    max_workers (int): Number of scanning threads, defaults to the ThreadPoolExecutor default
+    
+    Returns:
+    
+    1. Columnar manifest, column name -> list of values (dict)
+       Columns : Split, Label_Image_Path, Image_Label and optionally File_Size, File_Mtime
+    
+    """
+    
+    try:
+        manifest = {SPLIT_NAME: [], LABEL_IMAGE_PATH: [], IMAGE_LABEL: []}
+        if is_stat:
+            manifest.update({FILE_SIZE: [], FILE_MTIME: []})
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            
+            futures = []
+            
+            for split, split_dir in split_dirs.items():
+                
+                # A streamed split is listed in one go from the zip central directory
+                if is_zip_member_path(split_dir):
+                    futures.append(executor.submit(_scan_zip_split_dir, split, split_dir, is_stat))
+                    continue
+                
+                with os.scandir(split_dir) as entries:
+                    label_dir_paths = sorted(entry.path for entry in entries if entry.is_dir())
+                    
+                for label_dir_path in label_dir_paths:
+                    futures.append(executor.submit(_scan_label_dir, split, label_dir_path, is_stat))
+            
+            # Results are merged in submission order so the manifest is deterministic
+            for future in futures:
+                for column, values in future.result().items():
+                    manifest[column].extend(values)
+                    
+        return manifest
+    
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def get_split_from_manifest(manifest:dict, split:str) -> Tuple[list,list]:
+    
+    """
+    Returns the image paths and labels of one split of a columnar manifest -> tuple[list,list]
+    
+    Args:
+    manifest (dict): Columnar manifest returned by scan_label_image_dirs
+    split (str): Name of the split
+    
+    Returns:
+    
+    1. Paths of the label images of the split (list)
+    2. Labels of the label images of the split (list)
+    
+    """
+    
+    label_images_paths:list = []
+    label_images_labels:list = []
+    
+    for row_split, path, label in zip(manifest[SPLIT_NAME], manifest[LABEL_IMAGE_PATH], manifest[IMAGE_LABEL]):
+        if row_split == split:
+            label_images_paths.append(path)
+            label_images_labels.append(label)
+            
+    return label_images_paths, label_images_labels
+
+
+def map_splits(function, splits:list, max_workers:int = None) -> dict:
+    
+    """
+    Runs a function on every split as an independent work item on a thread pool -> dict
+    Every split finishes before the first failure is raised, so no split is left half written.
+    
+    Args:
+    function (function): Called with the name of a split
+    splits (list): Names of the splits
+    max_workers (int): Number of threads, defaults to one per split
+    
+    Returns:
+    
+    1. Split name -> result of the function, in the order of splits (dict)
+    
+    """
+    
+    try:
+        if not splits:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers or len(splits), thread_name_prefix='split') as executor:
+            futures = {split: executor.submit(function, split) for split in splits}
+            
+        return {split: future.result() for split, future in futures.items()}
+    
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def get_file_content_hash(image_path:str) -> str:
+    
+    """
+    Returns the sha256 content hash of an image on disk or inside a zip archive -> str
+    
+    Args:
+    image_path (str): Path of the image file, or a streamed path (archive.zip!member)
+    
+    Returns:
+    1. Hex sha256 digest of the image bytes (str)
+    
+    """
+    
+    return hashlib.sha256(read_image_bytes(image_path)).hexdigest()
+
+
+def get_image_content_hash(image_path:str) -> str:
+
+    """
+    Returns the content hash of an image, without decoding it -> str
+
+    Args:
+    image_path (str): Path of the image file, a streamed path or a record path
+
+    Returns:
+    1. Hex sha256 digest of the image bytes, None when the image can not be read (str)
+
+    """
+
+    try:
+        return get_file_content_hash(image_path)
+    except Exception:
+        return None
+
+
+def fill_content_hashes(image_paths:list, content_hashes:list = None, max_workers:int = None) -> list:
+    
+    """
+    Hashes the images whose content hash is not known, e.g. of csv manifests -> list
+    Hashing only reads the bytes, so caches keyed by content hash are looked up without decoding.
+    
+    Args:
+    image_paths (list): Paths of the images
+    content_hashes (list): Known content hashes of the images, missing ones are None or NaN, optional
+    max_workers (int): Number of hashing threads
+    
+    Returns:
+    1. Content hash of every image, None for images that can not be read (list)
+    
+    """
+    
+    try:
+        content_hashes = [content_hash if isinstance(content_hash, str) else None
+                          for content_hash in (content_hashes if content_hashes is not None else [None] * len(image_paths))]
+        unhashed_indices = [index for index, content_hash in enumerate(content_hashes) if content_hash is None]
+        
+        # Hashing releases the GIL, so images are read on a thread pool
+        if unhashed_indices:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for index, content_hash in zip(unhashed_indices, executor.map(get_image_content_hash,
+                                                                              [image_paths[index] for index in unhashed_indices])):
+                    content_hashes[index] = content_hash
+                    
+        return content_hashes
+    
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def read_manifest_state(state_file_path:str) -> dict:
+    
+    """
+    Reads a persisted manifest state -> dict
+    
+    Args:
+    state_file_path (str): Path of the manifest state csv of the last run
+    
+    Returns:
+    1. Relative image path -> manifest state row, empty when there is no previous run (dict)
+    
+    """
+    
+    try:
+        manifest_state:dict = {}
+        
+        if not os.path.exists(state_file_path):
+            return manifest_state
+        
+        with open(state_file_path, newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                row[FILE_SIZE] = int(row[FILE_SIZE])
+                row[FILE_MTIME] = float(row[FILE_MTIME])
+                manifest_state[row[RELATIVE_IMAGE_PATH]] = row
+                
+        return manifest_state
+    
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+@profiled
+def build_manifest_state(manifest:dict, previous_manifest_state:dict, max_workers:int = None) -> list:
+    
+    """
+    Builds the manifest state (path, size, mtime and content hash) of the current source -> list
+    Content hashes of images whose size and mtime did not change are reused from the
+    previous state, so only new or modified images are read.
+    
+    Args:
+    manifest (dict): Columnar manifest with file size and mtime, returned by scan_label_image_dirs
+    previous_manifest_state (dict): Manifest state of the last run, returned by read_manifest_state
+    max_workers (int): Number of hashing threads
+    
+    Returns:
+    1. Manifest state rows (list)
+    
+    """
+    
+    try:
+        manifest_state:list = []
+        rows_to_hash:list = []
+        
+        for split, path, label, size, mtime in zip(manifest[SPLIT_NAME], manifest[LABEL_IMAGE_PATH], manifest[IMAGE_LABEL],
+                                                   manifest[FILE_SIZE], manifest[FILE_MTIME]):
+            
+            relative_path = '/'.join([split, label, os.path.basename(path)])
+            row = {RELATIVE_IMAGE_PATH: relative_path, SPLIT_NAME: split, IMAGE_LABEL: label,
+                   LABEL_IMAGE_PATH: path, FILE_SIZE: size, FILE_MTIME: mtime, CONTENT_HASH: None}
+            
+            previous_row = previous_manifest_state.get(relative_path)
+            if previous_row is not None and previous_row[FILE_SIZE] == size and previous_row[FILE_MTIME] == mtime:
+                row[CONTENT_HASH] = previous_row[CONTENT_HASH]
+            else:
+                rows_to_hash.append(row)
+                
+            manifest_state.append(row)
+            
+        # Hashing releases the GIL, so new and modified images are read on a thread pool
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for row, content_hash in zip(rows_to_hash, executor.map(get_file_content_hash, [row[LABEL_IMAGE_PATH] for row in rows_to_hash])):
+                row[CONTENT_HASH] = content_hash
+                
+        return manifest_state
+    
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+@profiled
+def diff_manifest_state(previous_manifest_state:dict, manifest_state:list) -> list:
+    
+    """
+    Compares the current manifest state with the previous one -> list
+    
+    Args:
+    previous_manifest_state (dict): Manifest state of the last run, returned by read_manifest_state
+    manifest_state (list): Manifest state rows of the current run, returned by build_manifest_state
+    
+    Returns:
+    1. Added, changed and removed manifest state rows with a Change_Type column (list)
+    
+    """
+    
+    manifest_diff:list = []
+    current_relative_paths = set()
+    
+    for row in manifest_state:
+        current_relative_paths.add(row[RELATIVE_IMAGE_PATH])
+        previous_row = previous_manifest_state.get(row[RELATIVE_IMAGE_PATH])
+        
+        if previous_row is None:
+            manifest_diff.append(dict(row, **{CHANGE_TYPE: CHANGE_TYPE_ADDED}))
+        elif previous_row[CONTENT_HASH] != row[CONTENT_HASH]:
+            manifest_diff.append(dict(row, **{CHANGE_TYPE: CHANGE_TYPE_CHANGED}))
+            
+    for relative_path, previous_row in previous_manifest_state.items():
+        if relative_path not in current_relative_paths:
+            manifest_diff.append(dict(previous_row, **{CHANGE_TYPE: CHANGE_TYPE_REMOVED}))
+            
+    return manifest_diff
+
+
+@profiled
+def write_manifest_rows(file_path:str, rows:list, column_names:list) -> None:
+    
+    """
+    Writes manifest rows into a csv file, atomically replacing an existing file -> None
+    
+    Args:
+    file_path (str): Path of the csv file
+    rows (list): Rows as dictionaries
+    column_names (list): Columns to write
+    
+    Returns: None
+    
+    """
+    
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_file_path = file_path + '.tmp'
+        
+        with open(temp_file_path, 'w', newline='') as csvfile:
+            csvwriter = csv.DictWriter(csvfile, fieldnames=column_names, extrasaction='ignore')
+            csvwriter.writeheader()
+            csvwriter.writerows(rows)
+            
+        os.replace(temp_file_path, file_path)
+        
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def is_columnar_manifest_supported() -> bool:
+    
+    """
+    Checks if pyarrow is installed to write and memory map columnar manifests -> bool
+    
+    Returns:
+    1. True if columnar manifests are supported (bool)
+    
+    """
+    
+    return pa is not None
+
+
+@profiled
+def convert_into_columnar_manifest(manifest:dict, file_path:str) -> None:
+    
+    """
+    Writes a columnar manifest as an uncompressed Arrow IPC file that readers memory map -> None
+    Split, Image_Label and the directory part of Label_Image_Path are dictionary encoded.
+    
+    Args:
+    manifest (dict): Columnar manifest returned by scan_label_image_dirs
+    file_path (str): Path of the arrow file
+    
+    Returns: None
+    
+    """
+    
+    try:
+        path_prefixes:list = []
+        file_names:list = []
+        
+        for path in manifest[LABEL_IMAGE_PATH]:
+            path_prefix, file_name = path.rsplit('/', 1)
+            path_prefixes.append(path_prefix)
+            file_names.append(file_name)
+            
+        columns = {
+            SPLIT_NAME: pa.array(manifest[SPLIT_NAME], pa.string()).dictionary_encode(),
+            IMAGE_LABEL: pa.array(manifest[IMAGE_LABEL], pa.string()).dictionary_encode(),
+            PATH_PREFIX: pa.array(path_prefixes, pa.string()).dictionary_encode(),
+            FILE_NAME: pa.array(file_names, pa.string())
+        }
+        
+        column_types = {FILE_SIZE: pa.int64(), FILE_MTIME: pa.float64(), CONTENT_HASH: pa.string()}
+        for column, column_type in column_types.items():
+            if column in manifest:
+                columns[column] = pa.array(manifest[column], column_type)
+                
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        feather.write_feather(pa.table(columns), file_path, compression='uncompressed')
+        
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+@profiled
+def read_columnar_manifest(file_path:str, split:str = None) -> pd.DataFrame:
+    
+    """
+    Memory maps a columnar manifest and returns it as a dataframe -> pd.DataFrame
+    
+    Args:
+    file_path (str): Path of the arrow file
+    split (str): Only returns the rows of this split, all rows when None
+    
+    Returns:
+    1. Dataframe with Label_Image_Path and Image_Label first, Image_Label is categorical (pd.DataFrame)
+    
+    """
+    
+    try:
+        table = feather.read_table(file_path, memory_map=True)
+        
+        if split is not None:
+            table = table.filter(pc.equal(table.column(SPLIT_NAME).cast(pa.string()), split))
+            
+        dataframe = table.to_pandas()
+        
+        label_image_path = dataframe[PATH_PREFIX].astype(object) + '/' + dataframe[FILE_NAME].astype(object)
+        dataframe.insert(0, LABEL_IMAGE_PATH, label_image_path.astype(object))
+        dataframe = dataframe.drop(columns=[PATH_PREFIX, FILE_NAME])
+        dataframe.insert(1, IMAGE_LABEL, dataframe.pop(IMAGE_LABEL))
+        
+        return dataframe
+    
+    except Exception as e:
+        raise CustomException(e,sys) from e
+
+
+def get_column_dtype_name(column:pd.Series) -> str:
+    
+    """
+    Returns the schema dtype name of a dataframe column -> str
+    Categorical and string columns holding text are reported as object, like a csv column.
+    
+    Args:
+    column (pd.Series): Dataframe column
+    
+    Returns:
+    1. Dtype name (str)
+    
+    """
+    
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return get_column_dtype_name(pd.Series(column.cat.categories))
+    
+    if pd.api.types.is_string_dtype(column.dtype):
+        return 'object'
+    
+    return str(column.dtype)
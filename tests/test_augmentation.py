@@ -0,0 +1,62 @@
+import warnings
+import numpy as np
+import pytest
+import tensorflow as tf
+from src.constant import *
+from src.utils.augmentation import augment_batch, augment_numpy_batch, get_affine_matrices, warp_batch
+from src.utils.drift_detector import ks_2samp
+from benchmarks.augmentation_benchmark import get_keras_generator, get_probe_images, get_output_features
+
+SEED = 42
+SAMPLES = 256
+
+
+def test_numpy_warp_matches_tensorflow_transform():
+    images = get_probe_images(8, np.random.default_rng(SEED))
+    matrices = get_affine_matrices(len(images), IMAGE_SIZE, IMAGE_SIZE, np.random.default_rng(SEED))
+
+    # ImageProjectiveTransformV3 maps output to input pixels with [a0, a1, a2, b0, b1, b2, 0, 0] in x, y order
+    transforms = np.stack([matrices[:, 1, 1], matrices[:, 1, 0], matrices[:, 1, 2], matrices[:, 0, 1],
+                           matrices[:, 0, 0], matrices[:, 0, 2], np.zeros(len(images)), np.zeros(len(images))], axis=1)
+    tf_warped = tf.raw_ops.ImageProjectiveTransformV3(images=images, transforms=transforms.astype(np.float32),
+                                                      output_shape=[IMAGE_SIZE, IMAGE_SIZE], fill_value=0.0,
+                                                      interpolation=AUGMENTATION_INTERPOLATION,
+                                                      fill_mode=AUGMENTATION_FILL_MODE).numpy()
+
+    assert np.abs(warp_batch(images, matrices) - tf_warped).max() < 1e-3
+
+
+@pytest.fixture(scope='module')
+def probe_images():
+    return get_probe_images(SAMPLES, np.random.default_rng(SEED))
+
+
+@pytest.fixture(scope='module')
+def keras_features(probe_images):
+    keras_generator = get_keras_generator()
+    np.random.seed(SEED)
+
+    # Keras warns about a deprecated scipy namespace on every image
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        return get_output_features(np.stack([keras_generator.random_transform(image) for image in probe_images]))
+
+
+@pytest.mark.parametrize('path', ['numpy', 'tensorflow'])
+def test_batch_augmentation_matches_image_data_generator(path, probe_images, keras_features):
+
+    if path == 'numpy':
+        rng = np.random.default_rng(SEED)
+        outputs = np.concatenate([augment_numpy_batch(probe_images[start:start + BATCH_SIZE], rng)
+                                  for start in range(0, SAMPLES, BATCH_SIZE)])
+    else:
+        outputs = np.concatenate([augment_batch(tf.constant(probe_images[start:start + BATCH_SIZE]),
+                                                tf.constant([SEED, start], dtype=tf.int64)).numpy()
+                                  for start in range(0, SAMPLES, BATCH_SIZE)])
+
+    # Bonferroni correction, every feature is one test
+    p_value_threshold = DRIFT_P_VALUE_THRESHOLD / len(keras_features)
+
+    for feature, values in get_output_features(outputs).items():
+        _, p_value = ks_2samp(keras_features[feature], values)
+        assert p_value >= p_value_threshold, f"[{feature}] of the {path} path differs from ImageDataGenerator : p = {p_value}"
@@ -0,0 +1,90 @@
+import threading
+import pytest
+from src.exception import CustomException
+from src.pipe.dag import DagExecutor
+
+
+def test_stages_get_the_artifacts_of_their_dependencies():
+    dag_executor = DagExecutor(max_parallel_stages=2)
+    dag_executor.add_stage('ingestion', lambda: 'ingested')
+    dag_executor.add_stage('validation', lambda ingested: f"{ingested} validated", dependencies=['ingestion'])
+    dag_executor.add_stage('transformation', lambda ingested: f"{ingested} transformed", dependencies=['ingestion'])
+    dag_executor.add_stage('training', lambda transformed, validated: f"{transformed}, {validated}",
+                           dependencies=['transformation', 'validation'])
+
+    assert dag_executor.run()['training'] == 'ingested transformed, ingested validated'
+
+
+def test_stage_must_be_added_after_its_dependencies():
+    dag_executor = DagExecutor()
+
+    with pytest.raises(CustomException):
+        dag_executor.add_stage('training', lambda transformed: transformed, dependencies=['transformation'])
+
+
+def get_failing_dag_executor(validate, transform, started_stages:list, discarded_artifacts:list) -> DagExecutor:
+    dag_executor = DagExecutor(max_parallel_stages=3)
+    dag_executor.add_stage('ingestion', lambda: 'ingested')
+    dag_executor.add_stage('validation', validate, dependencies=['ingestion'])
+    dag_executor.add_stage('transformation', transform, dependencies=['ingestion'], cancelled_by=['validation'],
+                           on_discarded=discarded_artifacts.append)
+    dag_executor.add_stage('training', lambda transformed, validated: started_stages.append('training'),
+                           dependencies=['transformation', 'validation'])
+    dag_executor.add_stage('report', lambda ingested: started_stages.append('report'), dependencies=['ingestion'])
+
+    return dag_executor
+
+
+def assert_transformation_cancelled(dag_executor:DagExecutor, started_stages:list, discarded_artifacts:list) -> None:
+    with pytest.raises(CustomException) as error:
+        dag_executor.run()
+
+    assert "Stage [validation] failed" in str(error.value)
+    assert "['training', 'transformation']" in str(error.value)
+    assert discarded_artifacts == ['transformed']
+    assert started_stages == ['report']
+
+
+def test_failure_cancels_running_stage():
+    started_stages, discarded_artifacts = [], []
+    is_failure_seen = threading.Event()
+
+    def transform(ingested):
+        # Completes only once the executor handled the failure of validation
+        assert is_failure_seen.wait(timeout=10)
+        return 'transformed'
+
+    def validate(ingested):
+        raise ValueError("invalid data")
+
+    dag_executor = get_failing_dag_executor(validate, transform, started_stages, discarded_artifacts)
+    get_stages_to_cancel = dag_executor.get_stages_to_cancel
+    dag_executor.get_stages_to_cancel = lambda name: is_failure_seen.set() or get_stages_to_cancel(name)
+
+    assert_transformation_cancelled(dag_executor, started_stages, discarded_artifacts)
+
+
+def test_failure_discards_completed_stage():
+    started_stages, discarded_artifacts = [], []
+    is_transformed = threading.Event()
+
+    def validate(ingested):
+        # Fails after transformation completed, collected earlier or in the same batch
+        assert is_transformed.wait(timeout=10)
+        raise ValueError("invalid data")
+
+    dag_executor = get_failing_dag_executor(validate, lambda ingested: is_transformed.set() or 'transformed',
+                                            started_stages, discarded_artifacts)
+
+    assert_transformation_cancelled(dag_executor, started_stages, discarded_artifacts)
+
+
+def test_stages_to_cancel_are_found_transitively():
+    dag_executor = DagExecutor()
+    dag_executor.add_stage('ingestion', lambda: None)
+    dag_executor.add_stage('validation', lambda ingested: None, dependencies=['ingestion'])
+    dag_executor.add_stage('transformation', lambda ingested: None, dependencies=['ingestion'], cancelled_by=['validation'])
+    dag_executor.add_stage('training', lambda transformed: None, dependencies=['transformation'])
+
+    assert dag_executor.get_stages_to_cancel('validation') == {'transformation', 'training'}
+    assert dag_executor.get_stages_to_cancel('ingestion') == {'validation', 'transformation', 'training'}
@@ -0,0 +1,154 @@
+import os
+import json
+import email.utils
+import hashlib
+import pytest
+from benchmarks.pipeline_benchmark import serve_directory
+from src.constant import *
+from src.exception import CustomException
+from src.utils import download_manager as download_manager_module
+from src.utils.download_manager import DownloadManager
+
+
+SOURCE_FILE_NAME = 'chest_xray.zip'
+SOURCE_FILE_SIZE = 3 * 1024 * 1024 + 17
+
+
+def get_sha256(data:bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def set_source(source_file_path, data:bytes, mtime:int) -> None:
+    source_file_path.write_bytes(data)
+    os.utime(source_file_path, (mtime, mtime))
+
+
+@pytest.fixture
+def source(tmp_path):
+    source_dir = tmp_path / 'source'
+    source_dir.mkdir()
+    source_file_path = source_dir / SOURCE_FILE_NAME
+    set_source(source_file_path, os.urandom(SOURCE_FILE_SIZE), mtime=1_700_000_000)
+
+    with serve_directory(str(source_dir)) as base_url:
+        yield f"{base_url}/{SOURCE_FILE_NAME}", source_file_path
+
+
+@pytest.fixture
+def download_manager(tmp_path):
+    return DownloadManager(cache_dir=str(tmp_path / 'data_cache'), chunk_size=1024 * 1024, max_retries=1)
+
+
+@pytest.fixture
+def response_codes(monkeypatch):
+    """
+    Records the status of every response the download manager gets, 304 and 416 included.
+    """
+
+    response_codes = []
+    urlopen = download_manager_module.urllib.request.urlopen
+
+    def recording_urlopen(request, *args, **kwargs):
+        try:
+            response = urlopen(request, *args, **kwargs)
+        except download_manager_module.urllib.error.HTTPError as e:
+            response_codes.append(e.code)
+            raise
+        response_codes.append(response.getcode())
+        return response
+
+    monkeypatch.setattr(download_manager_module.urllib.request, 'urlopen', recording_urlopen)
+    return response_codes
+
+
+def write_part(download_manager:DownloadManager, url:str, data:bytes, last_modified:int) -> None:
+    url_cache_dir = download_manager.get_url_cache_dir(url)
+    with open(os.path.join(url_cache_dir, DOWNLOAD_PART_FILE_NAME), 'wb') as part_file:
+        part_file.write(data)
+    with open(os.path.join(url_cache_dir, DOWNLOAD_PART_INFO_FILE_NAME), 'w') as part_info_file:
+        json.dump({DOWNLOAD_ETAG_KEY: None, DOWNLOAD_LAST_MODIFIED_KEY: email.utils.formatdate(last_modified, usegmt=True)}, part_info_file)
+
+
+def test_full_download_is_verified_and_cached(source, download_manager, response_codes):
+    url, source_file_path = source
+    sha256 = get_sha256(source_file_path.read_bytes())
+
+    cached_file_path = download_manager.download(url, sha256=sha256)
+
+    with open(cached_file_path, 'rb') as cached_file:
+        assert get_sha256(cached_file.read()) == sha256
+    assert download_manager.get_cache_index(url)[DOWNLOAD_SHA256_KEY] == sha256
+    assert download_manager.get_cache_index(url)[DOWNLOAD_LAST_MODIFIED_KEY] is not None
+
+    # A file of the expected sha256 is never requested again
+    assert download_manager.download(url, sha256=sha256) == cached_file_path
+    assert response_codes == [200]
+
+
+def test_unchanged_source_is_revalidated_without_download(source, download_manager, response_codes):
+    url, _ = source
+
+    cached_file_path = download_manager.download(url)
+
+    assert download_manager.download(url) == cached_file_path
+    assert response_codes == [200, 304]
+
+
+def test_changed_source_is_downloaded_again(source, download_manager):
+    url, source_file_path = source
+    first_file_path = download_manager.download(url)
+
+    changed_data = os.urandom(SOURCE_FILE_SIZE)
+    set_source(source_file_path, changed_data, mtime=1_700_000_100)
+
+    second_file_path = download_manager.download(url)
+
+    assert second_file_path != first_file_path
+    with open(second_file_path, 'rb') as cached_file:
+        assert cached_file.read() == changed_data
+    assert download_manager.get_cache_index(url)[DOWNLOAD_SHA256_KEY] == get_sha256(changed_data)
+
+
+def test_interrupted_download_resumes(source, download_manager, response_codes):
+    url, source_file_path = source
+    data = source_file_path.read_bytes()
+    write_part(download_manager, url, data[:1024 * 1024], last_modified=int(source_file_path.stat().st_mtime))
+
+    cached_file_path = download_manager.download(url, sha256=get_sha256(data))
+
+    with open(cached_file_path, 'rb') as cached_file:
+        assert cached_file.read() == data
+    assert response_codes == [206]
+    assert not os.path.exists(os.path.join(download_manager.get_url_cache_dir(url), DOWNLOAD_PART_INFO_FILE_NAME))
+
+
+def test_partial_download_of_changed_source_restarts(source, download_manager, response_codes):
+    url, source_file_path = source
+    data = source_file_path.read_bytes()
+    # Bytes of an older version of the source, they must not be continued
+    write_part(download_manager, url, os.urandom(1024 * 1024), last_modified=int(source_file_path.stat().st_mtime) - 100)
+
+    cached_file_path = download_manager.download(url, sha256=get_sha256(data))
+
+    with open(cached_file_path, 'rb') as cached_file:
+        assert cached_file.read() == data
+    assert response_codes == [200]
+
+
+def test_sha256_mismatch_is_not_cached(source, download_manager):
+    url, _ = source
+
+    with pytest.raises(CustomException, match="Checksum mismatch"):
+        download_manager.download(url, sha256='0' * 64)
+
+    assert download_manager.get_cache_index(url) is None
+    assert not os.path.exists(os.path.join(download_manager.get_url_cache_dir(url), DOWNLOAD_PART_FILE_NAME))
+
+
+def test_failed_revalidation_uses_cached_download(source, download_manager):
+    url, source_file_path = source
+    cached_file_path = download_manager.download(url)
+
+    source_file_path.unlink()
+
+    assert download_manager.download(url) == cached_file_path
@@ -0,0 +1,56 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from PIL import Image
+from src.constant import *
+from src.utils import image_validator as image_validator_module
+from src.utils.image_validator import validate_images
+
+
+@pytest.fixture
+def image_paths(tmp_path):
+    rng = np.random.default_rng(0)
+    image_paths = []
+    for index in range(4):
+        image_path = tmp_path / f"image_{index}.jpeg"
+        Image.fromarray(rng.integers(0, 255, (40, 50), dtype=np.uint8)).save(image_path, format='JPEG')
+        image_paths.append(str(image_path))
+
+    return image_paths
+
+
+def test_cached_images_are_not_decoded_again_without_hashes(tmp_path, image_paths, monkeypatch):
+    cache_file_path = str(tmp_path / 'image_stats_cache')
+
+    image_stats = validate_images(image_paths, cache_file_path=cache_file_path, max_workers=2)
+    assert not image_stats[IS_CORRUPT].any()
+
+    def no_decoding(*args, **kwargs):
+        raise AssertionError("Cached images must not be decoded again")
+
+    monkeypatch.setattr(image_validator_module, 'ProcessPoolExecutor', no_decoding)
+
+    # Csv manifests have no content hashes, the images are found in the cache by hashing their bytes
+    cached_image_stats = validate_images(image_paths, content_hashes=[np.nan] * len(image_paths),
+                                         cache_file_path=cache_file_path, max_workers=2)
+
+    assert cached_image_stats[LABEL_IMAGE_PATH].tolist() == image_paths
+    assert cached_image_stats[CONTENT_HASH].tolist() == image_stats[CONTENT_HASH].tolist()
+    assert cached_image_stats[IMAGE_WIDTH].tolist() == [50] * len(image_paths)
+
+
+def test_new_images_are_checked(tmp_path, image_paths, monkeypatch):
+    cache_file_path = str(tmp_path / 'image_stats_cache')
+    validate_images(image_paths[:2], cache_file_path=cache_file_path, max_workers=2)
+
+    checked_paths = []
+    get_image_stats = image_validator_module.get_image_stats
+    monkeypatch.setattr(image_validator_module, 'ProcessPoolExecutor',
+                        lambda max_workers, **kwargs: ThreadPoolExecutor(max_workers))
+    monkeypatch.setattr(image_validator_module, 'get_image_stats',
+                        lambda image_path: checked_paths.append(image_path) or get_image_stats(image_path))
+
+    image_stats = validate_images(image_paths, cache_file_path=cache_file_path, max_workers=2)
+
+    assert sorted(checked_paths) == image_paths[2:]
+    assert not image_stats[IS_CORRUPT].any()
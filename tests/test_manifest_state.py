@@ -0,0 +1,70 @@
+import os
+import hashlib
+import pytest
+from src.constant import *
+from src.utils import utils
+from src.utils.utils import build_manifest_state, diff_manifest_state, read_manifest_state, write_manifest_rows
+
+
+def get_manifest(image_dir:str, images:dict) -> dict:
+    manifest = {SPLIT_NAME: [], LABEL_IMAGE_PATH: [], IMAGE_LABEL: [], FILE_SIZE: [], FILE_MTIME: []}
+
+    for file_name, image_bytes in images.items():
+        image_path = os.path.join(image_dir, file_name)
+        with open(image_path, 'wb') as image_file:
+            image_file.write(image_bytes)
+
+        manifest[SPLIT_NAME].append(TRAIN_DATA)
+        manifest[LABEL_IMAGE_PATH].append(image_path)
+        manifest[IMAGE_LABEL].append(LABELS[0])
+        manifest[FILE_SIZE].append(os.path.getsize(image_path))
+        manifest[FILE_MTIME].append(os.path.getmtime(image_path))
+
+    return manifest
+
+
+def get_change_types(manifest_diff:list) -> dict:
+    return {os.path.basename(row[RELATIVE_IMAGE_PATH]): row[CHANGE_TYPE] for row in manifest_diff}
+
+
+@pytest.fixture
+def previous_manifest_state(tmp_path):
+    manifest = get_manifest(str(tmp_path), {'kept.jpeg': b'kept', 'changed.jpeg': b'before', 'removed.jpeg': b'removed'})
+    state_file_path = str(tmp_path / MANIFEST_STATE_FILE_NAME)
+    write_manifest_rows(file_path=state_file_path, rows=build_manifest_state(manifest=manifest, previous_manifest_state={}),
+                        column_names=MANIFEST_STATE_COLUMNS)
+
+    return read_manifest_state(state_file_path=state_file_path)
+
+
+def test_first_run_adds_every_image(tmp_path):
+    manifest = get_manifest(str(tmp_path), {'a.jpeg': b'a', 'b.jpeg': b'b'})
+    manifest_state = build_manifest_state(manifest=manifest, previous_manifest_state={})
+
+    assert [row[CONTENT_HASH] for row in manifest_state] == [hashlib.sha256(b'a').hexdigest(), hashlib.sha256(b'b').hexdigest()]
+    assert get_change_types(diff_manifest_state(previous_manifest_state={}, manifest_state=manifest_state)) == \
+           {'a.jpeg': CHANGE_TYPE_ADDED, 'b.jpeg': CHANGE_TYPE_ADDED}
+
+
+def test_diff_against_the_last_run(tmp_path, previous_manifest_state):
+    os.remove(tmp_path / 'removed.jpeg')
+    manifest = get_manifest(str(tmp_path), {'kept.jpeg': b'kept', 'changed.jpeg': b'after', 'added.jpeg': b'added'})
+    manifest_state = build_manifest_state(manifest=manifest, previous_manifest_state=previous_manifest_state)
+
+    assert get_change_types(diff_manifest_state(previous_manifest_state=previous_manifest_state, manifest_state=manifest_state)) == \
+           {'changed.jpeg': CHANGE_TYPE_CHANGED, 'added.jpeg': CHANGE_TYPE_ADDED, 'removed.jpeg': CHANGE_TYPE_REMOVED}
+
+
+def test_unchanged_images_are_not_hashed_again(tmp_path, previous_manifest_state, monkeypatch):
+    manifest = get_manifest(str(tmp_path), {'kept.jpeg': b'kept'})
+    os.utime(manifest[LABEL_IMAGE_PATH][0], (manifest[FILE_MTIME][0], previous_manifest_state[f"{TRAIN_DATA}/{LABELS[0]}/kept.jpeg"][FILE_MTIME]))
+    manifest[FILE_MTIME][0] = os.path.getmtime(manifest[LABEL_IMAGE_PATH][0])
+
+    hashed_paths = []
+    get_file_content_hash = utils.get_file_content_hash
+    monkeypatch.setattr(utils, 'get_file_content_hash', lambda path: hashed_paths.append(path) or get_file_content_hash(path))
+
+    manifest_state = build_manifest_state(manifest=manifest, previous_manifest_state=previous_manifest_state)
+
+    assert hashed_paths == []
+    assert manifest_state[0][CONTENT_HASH] == hashlib.sha256(b'kept').hexdigest()
@@ -0,0 +1,57 @@
+import time
+from src.serving.prediction_cache import PredictionCache
+
+
+def test_put_and_get():
+    prediction_cache = PredictionCache(max_entries=10, ttl_seconds=60)
+
+    assert prediction_cache.get('v1', 'image') is None
+    prediction_cache.put('v1', 'image', 0.25)
+
+    assert prediction_cache.get('v1', 'image') == 0.25
+    assert prediction_cache.get_stats()['memory_hits'] == 1
+    assert prediction_cache.get_stats()['misses'] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    prediction_cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    prediction_cache.put('v1', 'first', 0.1)
+    prediction_cache.put('v1', 'second', 0.2)
+
+    prediction_cache.get('v1', 'first')
+    prediction_cache.put('v1', 'third', 0.3)
+
+    assert prediction_cache.get('v1', 'second') is None
+    assert prediction_cache.get('v1', 'first') == 0.1
+    assert prediction_cache.get('v1', 'third') == 0.3
+
+
+def test_expired_entry_is_not_returned(monkeypatch):
+    prediction_cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    prediction_cache.put('v1', 'image', 0.5)
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+
+    assert prediction_cache.get('v1', 'image') is None
+
+
+def test_new_model_version_drops_old_predictions(tmp_path):
+    prediction_cache = PredictionCache(max_entries=10, ttl_seconds=60, sqlite_file_path=str(tmp_path / 'predictions.sqlite'))
+    prediction_cache.put('v1', 'image', 0.5)
+
+    assert prediction_cache.get('v2', 'image') is None
+    assert prediction_cache.get('v1', 'image') is None
+    assert prediction_cache.get_stats()['entries'] == 0
+
+
+def test_sqlite_file_is_shared_between_caches(tmp_path):
+    sqlite_file_path = str(tmp_path / 'predictions.sqlite')
+    PredictionCache(max_entries=10, ttl_seconds=60, sqlite_file_path=sqlite_file_path).put('v1', 'image', 0.75)
+
+    prediction_cache = PredictionCache(max_entries=10, ttl_seconds=60, sqlite_file_path=sqlite_file_path)
+
+    assert prediction_cache.get('v1', 'image') == 0.75
+    assert prediction_cache.get('v1', 'image') == 0.75
+    assert prediction_cache.get_stats()['disk_hits'] == 1
+    assert prediction_cache.get_stats()['memory_hits'] == 1
@@ -0,0 +1,76 @@
+import os
+import pytest
+from src.constant import *
+from src.utils.record_shards import ShardWriter, ShardReader
+from src.utils.utils import RecordShardFiles, read_record_bytes
+
+
+def write_split(shards_dir:str, split:str, records:list, shard_size:int) -> list:
+    with ShardWriter(shards_dir=shards_dir, split=split, shard_size=shard_size) as shard_writer:
+        return [shard_writer.write(record_bytes, f"{label}/{index}.jpeg", label)
+                for index, (record_bytes, label) in enumerate(records)]
+
+
+@pytest.fixture
+def records():
+    return [(os.urandom(100 + index), LABELS[index % 2]) for index in range(10)]
+
+
+def test_records_round_trip_across_shards(tmp_path, records):
+    record_paths = write_split(str(tmp_path), TRAIN_DATA, records, shard_size=350)
+
+    shard_reader = ShardReader(shards_dir=str(tmp_path), split=TRAIN_DATA)
+
+    assert shard_reader.is_complete()
+    assert len(shard_reader) == len(records)
+    assert len(shard_reader.shard_file_paths) > 1
+    assert [read_record_bytes(record_path) for record_path in record_paths] == [record_bytes for record_bytes, _ in records]
+    assert [shard_reader.get_record(record_id) for record_id in range(len(records))] == [record_bytes for record_bytes, _ in records]
+    assert [record_bytes for _, record_bytes in shard_reader.iter_records()] == [record_bytes for record_bytes, _ in records]
+
+
+def test_rewritten_split_is_read_again(tmp_path, records):
+    record_paths = write_split(str(tmp_path), TRAIN_DATA, records, shard_size=10 ** 6)
+    assert read_record_bytes(record_paths[0]) == records[0][0]
+
+    rewritten_records = [(os.urandom(len(record_bytes)), label) for record_bytes, label in records]
+    rewritten_record_paths = write_split(str(tmp_path), TRAIN_DATA, rewritten_records, shard_size=10 ** 6)
+
+    # Same shard path and offsets, the descriptor of the replaced shard must not be reused
+    assert rewritten_record_paths == record_paths
+    assert read_record_bytes(record_paths[0]) == rewritten_records[0][0]
+
+
+def test_aborted_split_is_left_as_it_was(tmp_path, records):
+    record_paths = write_split(str(tmp_path), TRAIN_DATA, records, shard_size=10 ** 6)
+
+    with pytest.raises(ValueError):
+        with ShardWriter(shards_dir=str(tmp_path), split=TRAIN_DATA) as shard_writer:
+            shard_writer.write(b'partial', 'NORMAL/0.jpeg', 'NORMAL')
+            raise ValueError
+
+    assert read_record_bytes(record_paths[-1]) == records[-1][0]
+
+
+def test_evicted_descriptors_are_closed(tmp_path):
+    shard_files = RecordShardFiles(max_open_files=2)
+    shard_file_paths = []
+    for index in range(3):
+        shard_file_path = tmp_path / f"shard-{index}.bin"
+        shard_file_path.write_bytes(bytes([index]) * 8)
+        shard_file_paths.append(str(shard_file_path))
+
+    file_descriptors = []
+    for shard_file_path in shard_file_paths:
+        assert shard_files.read(shard_file_path, 2, 4) == bytes([shard_file_paths.index(shard_file_path)]) * 4
+        file_descriptors.append(shard_files.entries[shard_file_path][0])
+
+    assert list(shard_files.entries) == shard_file_paths[1:]
+    with pytest.raises(OSError):
+        os.fstat(file_descriptors[0])
+
+    shard_files.close()
+    assert not shard_files.entries
+    for file_descriptor in file_descriptors[1:]:
+        with pytest.raises(OSError):
+            os.fstat(file_descriptor)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from PIL import Image
+from src.utils import tensor_store as tensor_store_module
+from src.utils.tensor_store import TensorStore
+
+
+@pytest.fixture
+def image_paths(tmp_path):
+    rng = np.random.default_rng(0)
+    image_paths = []
+    for index in range(6):
+        image_path = tmp_path / f"image_{index}.jpeg"
+        Image.fromarray(rng.integers(0, 255, (40, 50), dtype=np.uint8)).save(image_path, format='JPEG')
+        image_paths.append(str(image_path))
+
+    # Not an image, it can not be decoded
+    (tmp_path / 'broken.jpeg').write_bytes(b'not an image')
+    return image_paths + [str(tmp_path / 'broken.jpeg')]
+
+
+def test_stored_images_are_not_decoded_again_without_hashes(tmp_path, image_paths, monkeypatch):
+    tensor_store = TensorStore(store_dir=str(tmp_path / 'store'), image_size=32)
+
+    positions = tensor_store.add_images(image_paths, max_workers=2)
+    index_size = len(tensor_store.read_index())
+
+    assert index_size == len(image_paths) - 1
+    assert (positions[-1] == -1).all()
+    assert tensor_store.get_images(positions[:-1]).shape == (len(image_paths) - 1, 32, 32, 3)
+
+    def no_decoding(*args, **kwargs):
+        raise AssertionError("Stored images must not be decoded again")
+
+    monkeypatch.setattr(tensor_store_module, 'ProcessPoolExecutor', no_decoding)
+
+    # Only the broken image is tried again, the decodable ones are found by their content hash
+    repeated_positions = tensor_store.add_images(image_paths[:-1], max_workers=2)
+
+    assert (repeated_positions == positions[:-1]).all()
+    assert len(tensor_store.read_index()) == index_size
+
+
+def test_duplicate_images_share_one_tensor(tmp_path, image_paths):
+    duplicate_path = tmp_path / 'duplicate.jpeg'
+    duplicate_path.write_bytes(open(image_paths[0], 'rb').read())
+
+    tensor_store = TensorStore(store_dir=str(tmp_path / 'store'), image_size=32)
+    positions = tensor_store.add_images([image_paths[0], str(duplicate_path)], max_workers=1)
+
+    assert (positions[0] == positions[1]).all()
+    assert len(tensor_store.read_index()) == 1